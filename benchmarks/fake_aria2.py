@@ -0,0 +1,283 @@
+"""Servidor JSON-RPC que imita o aria2 para os benchmarks.
+
+Simula ``N`` downloads cujo progresso segue uma curva configurável sobre um
+relógio virtual (``advance``), de modo que duas execuções com os mesmos
+parâmetros recebem exatamente as mesmas respostas. ``latency`` acrescenta um
+atraso fixo a cada requisição HTTP, como a ida e volta até um aria2c real.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Fração concluída em função da fração do tempo decorrido (ambas em [0, 1]).
+CURVES: Dict[str, Callable[[float], float]] = {
+    "linear": lambda x: x,
+    # Começa rápido e desacelera no fim (servidor que estrangula a conexão).
+    "ease-out": lambda x: 1.0 - (1.0 - x) ** 2,
+    # Curva em S: aquecimento lento, pico no meio e cauda longa.
+    "sigmoid": lambda x: (1.0 / (1.0 + math.exp(-12.0 * (x - 0.5))) - 0.0025) / 0.995,
+    # Linear com um platô entre 40% e 60% do tempo (velocidade zero).
+    "stall": lambda x: x if x < 0.4 else (0.4 if x < 0.6 else 0.4 + (x - 0.6) * 1.5),
+}
+
+
+@dataclass
+class FakeDownload:
+    gid: str
+    url: str
+    size: int
+    duration: float
+    offset: float
+    paused: bool = False
+    removed: bool = False
+
+
+class FakeAria2:
+    """Estado dos downloads simulados e despacho dos métodos do aria2."""
+
+    def __init__(
+        self,
+        curve: str = "linear",
+        duration: float = 600.0,
+        size: int = 512 * 1024 * 1024,
+        latency: float = 0.0,
+    ) -> None:
+        self.curve = CURVES[curve]
+        self.duration = duration
+        self.size = size
+        self.latency = latency
+        self.clock = 0.0
+        self.downloads: Dict[str, FakeDownload] = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def seed(self, count: int) -> List[str]:
+        """Cria ``count`` downloads já em andamento, em fases diferentes da curva."""
+        gids = []
+        for index in range(len(self.downloads), len(self.downloads) + count):
+            gid = f"{index + 1:016x}"
+            # Início no passado, espalhado entre 0% e 90% da duração.
+            offset = self.clock - (index * 7919 % 1000) / 1000 * self.duration * 0.9
+            self.downloads[gid] = FakeDownload(
+                gid,
+                f"https://mirror{index % 8}.example/file{index}.bin",
+                self.size,
+                self.duration,
+                offset,
+            )
+            gids.append(gid)
+        return gids
+
+    def advance(self, seconds: float) -> None:
+        with self._lock:
+            self.clock += seconds
+
+    # ------------------------------------------------------------------
+    def dispatch(self, method: str, params: Sequence[Any]) -> Any:
+        if params and isinstance(params[0], str) and params[0].startswith("token:"):
+            params = params[1:]
+        handler = getattr(self, "_rpc_" + method.replace(".", "_"), None)
+        if handler is None:
+            raise RpcFault(1, f"Method {method} not supported by the fake")
+        return handler(*params)
+
+    def _rpc_system_multicall(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        results: List[Any] = []
+        for call in calls:
+            try:
+                results.append(
+                    [self.dispatch(call["methodName"], call.get("params", []))]
+                )
+            except RpcFault as fault:
+                results.append({"code": fault.code, "message": fault.message})
+        return results
+
+    def _rpc_aria2_getVersion(self) -> Dict[str, Any]:  # noqa: N802
+        return {"version": "1.37.0", "enabledFeatures": []}
+
+    def _rpc_aria2_tellStatus(  # noqa: N802
+        self, gid: str, keys: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        status = self._status(self._get(gid))
+        return {key: value for key, value in status.items() if not keys or key in keys}
+
+    def _rpc_aria2_tellActive(  # noqa: N802
+        self, keys: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return [
+            self._rpc_aria2_tellStatus(gid, keys)
+            for gid, download in self.downloads.items()
+            if self._status(download)["status"] == "active"
+        ]
+
+    def _rpc_aria2_addUri(  # noqa: N802
+        self, uris: List[str], options: Optional[Dict[str, str]] = None
+    ) -> str:
+        options = options or {}
+        gid = options.get("gid") or f"{len(self.downloads) + 1:016x}"
+        if gid in self.downloads:
+            raise RpcFault(1, f"GID {gid} is not unique")
+        with self._lock:
+            self.downloads[gid] = FakeDownload(
+                gid,
+                uris[0],
+                self.size,
+                self.duration,
+                self.clock,
+                paused=options.get("pause") == "true",
+            )
+        return gid
+
+    def _rpc_aria2_pause(self, gid: str) -> str:
+        self._get(gid).paused = True
+        return gid
+
+    _rpc_aria2_forcePause = _rpc_aria2_pause
+
+    def _rpc_aria2_unpause(self, gid: str) -> str:
+        self._get(gid).paused = False
+        return gid
+
+    def _rpc_aria2_pauseAll(self) -> str:  # noqa: N802
+        for download in self.downloads.values():
+            download.paused = True
+        return "OK"
+
+    _rpc_aria2_forcePauseAll = _rpc_aria2_pauseAll
+
+    def _rpc_aria2_unpauseAll(self) -> str:  # noqa: N802
+        for download in self.downloads.values():
+            download.paused = False
+        return "OK"
+
+    def _rpc_aria2_remove(self, gid: str) -> str:
+        self._get(gid).removed = True
+        return gid
+
+    _rpc_aria2_forceRemove = _rpc_aria2_remove
+
+    def _rpc_aria2_changeOption(  # noqa: N802
+        self, gid: str, options: Dict[str, str]
+    ) -> str:
+        self._get(gid)
+        return "OK"
+
+    def _rpc_aria2_changeGlobalOption(  # noqa: N802
+        self, options: Dict[str, str]
+    ) -> str:
+        return "OK"
+
+    def _rpc_aria2_changePosition(  # noqa: N802
+        self, gid: str, pos: int, how: str
+    ) -> int:
+        self._get(gid)
+        return 0
+
+    # ------------------------------------------------------------------
+    def _get(self, gid: str) -> FakeDownload:
+        download = self.downloads.get(gid)
+        if download is None:
+            raise RpcFault(1, f"GID {gid} is not found")
+        return download
+
+    def _status(self, download: FakeDownload) -> Dict[str, Any]:
+        elapsed = max(0.0, self.clock - download.offset)
+        fraction = min(1.0, elapsed / download.duration)
+        completed = int(download.size * min(1.0, max(0.0, self.curve(fraction))))
+        speed = 0
+        if download.removed:
+            status = "removed"
+        elif completed >= download.size:
+            status = "complete"
+        elif download.paused:
+            status = "paused"
+        else:
+            status = "active"
+            # Derivada da curva no instante atual, em bytes por segundo.
+            step = 1.0 / download.duration
+            ahead = self.curve(min(1.0, fraction + step))
+            speed = max(0, int(download.size * (ahead - self.curve(fraction))))
+        return {
+            "gid": download.gid,
+            "status": status,
+            "totalLength": str(download.size),
+            "completedLength": str(completed),
+            "downloadSpeed": str(speed),
+            "connections": "4" if status == "active" else "0",
+            "files": [{"path": "/tmp/benchmark/" + download.url.rsplit("/", 1)[-1]}],
+        }
+
+
+class RpcFault(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeAria2Server:
+    """Serve ``FakeAria2`` em ``http://127.0.0.1:<port>/jsonrpc`` numa thread."""
+
+    def __init__(self, state: FakeAria2, port: int = 0) -> None:
+        self.state = state
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "FakeAria2Server":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-aria2", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _handler_class(self) -> type:
+        state = self.state
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como o aria2
+
+            def do_POST(self) -> None:  # noqa: N802
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if state.latency:
+                    time.sleep(state.latency)
+                state.calls += 1
+                response: Dict[str, Any] = {"jsonrpc": "2.0", "id": body.get("id")}
+                try:
+                    response["result"] = state.dispatch(
+                        body["method"], body.get("params", [])
+                    )
+                except RpcFault as fault:
+                    response["error"] = {"code": fault.code, "message": fault.message}
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:  # noqa: N802
+                # Sem WebSocket: o DownloadManager continua só com polling.
+                self.send_error(404)
+
+            def log_message(self, *_args: object) -> None:
+                pass
+
+        return _Handler
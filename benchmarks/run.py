@@ -0,0 +1,341 @@
+"""Benchmarks dos caminhos quentes do Super Download.
+
+Mede, para cada quantidade de downloads (100, 1k e 10k por padrão):
+
+- ``poll_cycle``: um ciclo do ``StatusPoller`` (multicall ao aria2 + diff);
+- ``save_downloads``: gravação completa e incremental do histórico;
+- ``notify_observers``: entrega de um lote de alterações aos observers;
+- ``row_updates``: ``MainWindow._apply_changes`` com as linhas visíveis
+  (precisa de display; use ``xvfb-run`` ou ``GDK_BACKEND=broadway``).
+
+O aria2 é substituído por ``fake_aria2.FakeAria2Server``, com relógio virtual
+e latência configurável, então os números só dependem da máquina. O
+resultado é um JSON em stdout (ou ``--output``) para comparar execuções::
+
+    python benchmarks/run.py --sizes 100 1000 --latency 2 --output base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "src"))
+
+from fake_aria2 import CURVES, FakeAria2, FakeAria2Server  # noqa: E402
+from gi.repository import GLib  # noqa: E402
+
+from super_download import download_manager  # noqa: E402
+from super_download.aria2_client import Aria2Client  # noqa: E402
+from super_download.models import DownloadChangeSet, DownloadRecord  # noqa: E402
+from super_download.persistence import PersistenceStore  # noqa: E402
+from super_download.poller import PollSchedule, StatusPoller  # noqa: E402
+
+DEFAULT_SIZES = (100, 1_000, 10_000)
+# Fração dos registros alterada entre duas gravações incrementais.
+INCREMENTAL_FRACTION = 0.1
+UPDATED_FIELDS = frozenset({"progress", "speed", "avg_speed", "eta"})
+
+
+# ----------------------------------------------------------------------
+def bench_poll_cycle(
+    server: FakeAria2Server, gids: List[str], repeat: int
+) -> Dict[str, Any]:
+    client = Aria2Client(port=server.port)
+    delivered: List[int] = []
+    poller = StatusPoller(
+        client, PollSchedule(), lambda deltas: delivered.append(len(deltas))
+    )
+    # Mesmo pool de RPC que o poller usa em produção, mas sem a thread de
+    # agendamento: o benchmark dispara cada ciclo.
+    poller._executor = ThreadPoolExecutor(
+        max_workers=StatusPoller.MAX_WORKERS, thread_name_prefix="aria2-rpc"
+    )
+    try:
+        samples = _measure(
+            repeat, lambda: _next_poll(server.state, poller, gids), poller.poll_once
+        )
+        _drain_main_loop()
+    finally:
+        poller.stop()
+        client.close()
+    result = _summary(samples)
+    result["deltas_per_cycle"] = delivered[-1] if delivered else 0
+    return result
+
+
+def _next_poll(state: FakeAria2, poller: StatusPoller, gids: List[str]) -> None:
+    _drain_main_loop()
+    state.advance(1.0)
+    poller.track(gids)
+
+
+def bench_save_downloads(count: int, repeat: int, workdir: Path) -> Dict[str, Any]:
+    records = [_record(f"{index + 1:016x}", index) for index in range(count)]
+
+    full: List[float] = []
+    for run in range(repeat):
+        store = PersistenceStore(workdir / f"save-{count}-{run}")
+        start = time.perf_counter()
+        store.save_downloads(records)
+        full.append(time.perf_counter() - start)
+        store.close()
+
+    store = PersistenceStore(workdir / f"save-{count}-incremental")
+    store.save_downloads(records)
+    downloads = {record.gid: record for record in records}
+    changed = max(1, int(count * INCREMENTAL_FRACTION))
+    rounds = iter(range(1, repeat + 2))
+    changes: List[DownloadChangeSet] = []
+
+    def touch() -> None:
+        step = next(rounds)
+        change_set = DownloadChangeSet()
+        for record in records[:changed]:
+            record.progress = min(1.0, record.progress + step / 1000)
+            change_set.record_updated(record.gid, {"progress"})
+        changes[:] = [change_set]
+
+    incremental = _measure(
+        repeat, touch, lambda: store.save_changes(downloads, changes[0])
+    )
+    store.close()
+    return {"full": _summary(full), "incremental": _summary(incremental)}
+
+
+def bench_notify_observers(
+    manager: download_manager.DownloadManager, gids: List[str], repeat: int
+) -> Dict[str, Any]:
+    received: List[int] = []
+    manager.subscribe_changes(lambda changes: received.append(len(changes.updated)))
+
+    def mark_updated() -> None:
+        for gid in gids:
+            manager._changes.record_updated(gid, set(UPDATED_FIELDS))
+
+    result = _summary(_measure(repeat, mark_updated, manager._notify_observers))
+    result["updated_per_notification"] = received[-1] if received else 0
+    return result
+
+
+def bench_row_updates(
+    manager: download_manager.DownloadManager, gids: List[str], repeat: int
+) -> Dict[str, Any]:
+    try:
+        import gi
+
+        gi.require_version("Gtk", "4.0")
+        gi.require_version("Adw", "1")
+        from gi.repository import Adw, Gio, Gtk
+    except (ImportError, ValueError) as exc:
+        return {"skipped": f"GTK 4/libadwaita unavailable: {exc}"}
+    if not Gtk.init_check():
+        return {"skipped": "no display; run under xvfb-run or GDK_BACKEND=broadway"}
+
+    from super_download.ui.main_window import MainWindow
+
+    samples: List[float] = []
+
+    class _BenchApplication(Adw.Application):
+        def __init__(self) -> None:
+            super().__init__(
+                application_id="br.com.superdownload.Benchmark",
+                flags=Gio.ApplicationFlags.NON_UNIQUE,
+            )
+            self.download_manager = manager
+
+        def do_activate(self) -> None:  # noqa: N802 (PyGObject naming)
+            window = MainWindow(self)
+            window.present()
+            # Aplica a carga inicial sem esperar o frame clock.
+            window._on_frame_tick(window, None)
+            _drain_main_loop()
+            rounds = iter(range(1, repeat + 2))
+
+            def next_changes() -> None:
+                step = next(rounds)
+                for gid in gids:
+                    record = manager.get(gid)
+                    record.progress = min(1.0, record.progress + step / 1000)
+                    record.speed += 1
+
+            def apply() -> None:
+                changes = DownloadChangeSet()
+                for gid in gids:
+                    changes.record_updated(gid, {"progress", "speed"})
+                window._apply_changes(changes)
+                _drain_main_loop()
+
+            samples.extend(_measure(repeat, next_changes, apply))
+            window.destroy()
+            self.quit()
+
+    _BenchApplication().run([])
+    return _summary(samples)
+
+
+# ----------------------------------------------------------------------
+def build_manager(
+    server: FakeAria2Server, gids: List[str], workdir: Path
+) -> download_manager.DownloadManager:
+    """DownloadManager com ``gids`` no histórico, todos ativos no aria2 simulado."""
+    state_dir = workdir / f"manager-{len(gids)}"
+    seed = PersistenceStore(state_dir)
+    seed.save_config(
+        {
+            "default_path": str(workdir / "downloads"),
+            "max_concurrent": len(gids),
+            "max_per_host": 0,
+        }
+    )
+    seed.save_downloads(
+        _record(gid, index, status="active", size=server.state.size)
+        for index, gid in enumerate(gids)
+    )
+    seed.close()
+
+    manager = download_manager.DownloadManager(PersistenceStore(state_dir))
+    # Os ciclos são disparados pelos benchmarks, não pela thread do poller.
+    manager._poller.stop()
+    _drain_main_loop()
+    return manager
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="superdownload-bench-") as tmp:
+        workdir = Path(tmp)
+        for count in args.sizes:
+            state = FakeAria2(curve=args.curve, latency=args.latency / 1000)
+            server = FakeAria2Server(state).start()
+            # O manager cria seu próprio Aria2Client; aponta-o para o servidor falso.
+            download_manager.Aria2Client = functools.partial(
+                Aria2Client, port=server.port
+            )
+            try:
+                gids = state.seed(count)
+                entry: Dict[str, Any] = {"records": count}
+                entry["poll_cycle"] = bench_poll_cycle(server, gids, args.repeat)
+                entry["save_downloads"] = bench_save_downloads(
+                    count, args.repeat, workdir
+                )
+                manager = build_manager(server, gids, workdir)
+                try:
+                    entry["notify_observers"] = bench_notify_observers(
+                        manager, gids, args.repeat
+                    )
+                    if args.no_ui:
+                        entry["row_updates"] = {"skipped": "--no-ui"}
+                    else:
+                        entry["row_updates"] = bench_row_updates(
+                            manager, gids, args.repeat
+                        )
+                finally:
+                    manager.shutdown()
+                entry["rpc_requests"] = state.calls
+            finally:
+                download_manager.Aria2Client = Aria2Client
+                server.stop()
+            results.append(entry)
+            print(f"{count} records done", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency_ms": args.latency,
+            "curve": args.curve,
+        },
+        "results": results,
+    }
+
+
+# ----------------------------------------------------------------------
+def _record(
+    gid: str, index: int, status: str = "complete", size: int = 0
+) -> DownloadRecord:
+    return DownloadRecord(
+        gid=gid,
+        url=f"https://mirror{index % 8}.example/file{index}.bin",
+        filename=f"file{index}.bin",
+        status=status,
+        progress=(index % 100) / 100,
+        size=size,
+    )
+
+
+def _measure(
+    repeat: int, prepare: Callable[[], None], action: Callable[[], None]
+) -> List[float]:
+    """Roda ``action`` uma vez para aquecer e depois ``repeat`` vezes cronometrado."""
+    samples = []
+    for run in range(repeat + 1):
+        prepare()
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        if run:
+            samples.append(elapsed)
+    return samples
+
+
+def _summary(samples: Sequence[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _drain_main_loop() -> None:
+    context = GLib.MainContext.default()
+    while context.pending():
+        context.iteration(False)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="execuções medidas por cenário"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="atraso por requisição RPC, em ms"
+    )
+    parser.add_argument("--curve", choices=sorted(CURVES), default="linear")
+    parser.add_argument("--no-ui", action="store_true", help="não mede a MainWindow")
+    parser.add_argument(
+        "--output", type=Path, help="grava o JSON aqui em vez de stdout"
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat deve ser pelo menos 1")
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,15 @@
 """Super Download application package."""
 
-from .app import SuperDownloadApplication
+from typing import Any
 
 __all__ = ["SuperDownloadApplication"]
+
+
+def __getattr__(name: str) -> Any:
+    # Importar o pacote não carrega Gtk/Adw: o CLI e o modo headless usam só
+    # os submódulos de que precisam.
+    if name == "SuperDownloadApplication":
+        from .app import SuperDownloadApplication
+
+        return SuperDownloadApplication
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import logging
-from pathlib import Path
+import sys
 from typing import Iterable, Sequence
 
 import gi
@@ -13,12 +13,15 @@ gi.require_version("Adw", "1")
 
 from gi.repository import Adw, Gio, GLib
 
+from .control import ControlService
 from .download_manager import DownloadManager
+from .ipc import IpcClient, IpcError, instance_running
+from .logs import configure_logging
+from .models import DownloadChangeSet
 from .persistence import PersistenceStore
 from .tray import TrayIndicator
 from .ui.main_window import MainWindow
 
-
 APP_ID = "br.com.superdownload"
 
 
@@ -33,32 +36,64 @@ class SuperDownloadApplication(Adw.Application):
         )
         self._window: MainWindow | None = None
         self._debug = debug
-        self._persistence = PersistenceStore()
-        self.download_manager = DownloadManager()
+        # Criados em do_startup: instâncias remotas (que só repassam a linha
+        # de comando à primária) não podem tocar na fila nem no aria2.
+        self._persistence: PersistenceStore | None = None
+        self.download_manager: DownloadManager | None = None
         self.tray = TrayIndicator(self)
-        self.download_manager.subscribe(self._on_downloads_update)
+        self._control: ControlService | None = None
         self._configure_logging()
 
     def do_startup(self) -> None:  # noqa: N802 (PyGObject naming)
         logging.debug("Super Download starting up")
         Adw.Application.do_startup(self)
+        if instance_running():
+            # Um ``super-download --headless`` já é dono da fila e do aria2:
+            # esta instância só repassa as URLs a ele e sai.
+            logging.warning("Super Download headless já está em execução; usando-o")
+            return
+        # Só a instância primária passa por aqui: ela é dona da fila e atende
+        # o super-download-cli.
+        self._persistence = PersistenceStore()
+        self.download_manager = DownloadManager(self._persistence)
+        self.download_manager.subscribe_changes(self._on_downloads_change)
         self._configure_theme()
         self._register_actions()
+        self._control = ControlService(self.download_manager)
+        self._control.start()
+
+    def do_shutdown(self) -> None:  # noqa: N802
+        logging.debug("Super Download shutting down")
+        if self._control is not None:
+            self._control.stop()
+            self._control = None
+        if self.download_manager is not None:
+            self.download_manager.shutdown()
+        if self._persistence is not None:
+            self._persistence.close()
+        Adw.Application.do_shutdown(self)
 
     def do_activate(self) -> None:  # noqa: N802
         logging.debug("Super Download activate request")
+        if self.download_manager is None:
+            return  # cliente do daemon headless: não há fila local para mostrar
         if self._window is None:
             self._window = MainWindow.new(self)
         # Sempre mostra a janela (mesmo se estava oculta)
         self._window.set_visible(True)
         self._window.present()
 
-    def do_command_line(self, command_line: Gio.ApplicationCommandLine) -> int:  # noqa: N802
+    def do_command_line(  # noqa: N802
+        self, command_line: Gio.ApplicationCommandLine
+    ) -> int:
         """Handle subsequent invocations forwarding URLs to primary instance."""
         arguments = command_line.get_arguments()[1:]
         urls = [arg for arg in arguments if self._looks_like_url(arg)]
         logging.debug("Received command line with urls=%s", urls)
 
+        if self.download_manager is None:
+            return self._forward_to_daemon(urls)
+
         # Sempre ativa a janela (seja com ou sem URLs)
         self.activate()
 
@@ -75,6 +110,28 @@ class SuperDownloadApplication(Adw.Application):
         self.download_manager.enqueue_urls(urls)
         return False
 
+    @staticmethod
+    def _forward_to_daemon(urls: Sequence[str]) -> int:
+        # Sem instância gráfica, este processo é o primário: stdout é o do usuário.
+        if not urls:
+            print(
+                "O Super Download está rodando em modo headless; "
+                "use o super-download-cli para controlá-lo.",
+                file=sys.stderr,
+            )
+            return 1
+        try:
+            with IpcClient() as client:
+                result = client.request("add", urls=list(urls))
+        except IpcError as exc:
+            print(f"Erro: {exc}", file=sys.stderr)
+            return 1
+        print(
+            f"{result['added']} de {result['received']} URL(s) enviadas "
+            "ao Super Download."
+        )
+        return 0
+
     def _register_actions(self) -> None:
         def _simple_action(name: str, callback) -> None:
             action = Gio.SimpleAction.new(name, None)
@@ -111,18 +168,7 @@ class SuperDownloadApplication(Adw.Application):
         return candidate.startswith(("http://", "https://", "ftp://", "sftp://"))
 
     def _configure_logging(self) -> None:
-        log_dir = Path(GLib.get_user_state_dir()) / "superdownload"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        logfile = log_dir / "log.txt"
-        logging.basicConfig(
-            level=logging.DEBUG if self._debug else logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            handlers=[
-                logging.FileHandler(logfile, encoding="utf-8"),
-                logging.StreamHandler(),
-            ],
-        )
-        logging.debug("Logging configured with file %s", logfile)
+        configure_logging(self._debug)
 
     def _configure_theme(self) -> None:
         """Configure application theme using AdwStyleManager."""
@@ -146,6 +192,13 @@ class SuperDownloadApplication(Adw.Application):
         self.download_manager.enqueue_urls(urls)
 
     # ------------------------------------------------------------------
-    def _on_downloads_update(self, records) -> None:
-        if self.tray and self.tray.available:
-            self.tray.update_state(records)
+    def _on_downloads_change(self, changes: DownloadChangeSet) -> None:
+        if not (self.tray and self.tray.available):
+            return
+        # A bandeja só reflete transições de estado, não ticks de progresso.
+        if (
+            changes.added
+            or changes.removed
+            or any("status" in fields for fields in changes.updated.values())
+        ):
+            self.tray.update_state(self.download_manager.live_records())
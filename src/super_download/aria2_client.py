@@ -2,21 +2,58 @@
 
 from __future__ import annotations
 
+import functools
+import http.client
+import itertools
+import json
 import logging
+import queue
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 from uuid import uuid4
 
-try:
+from . import metrics
+from .filenames import FilenameAllocator
+
+if TYPE_CHECKING:  # pragma: no cover
     import aria2p
-except ImportError:  # pragma: no cover - aria2p optional at runtime
-    aria2p = None  # type: ignore[assignment]
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Campos realmente usados pelo DownloadManager; pedir só estes evita que o
+# aria2 serialize a estrutura completa (peers, bitfield, uris...) a cada poll.
+STATUS_KEYS = (
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "downloadSpeed",
+    "connections",
+    "files",
+)
+
+# Quantidade máxima de chamadas agrupadas em um único system.multicall.
+MULTICALL_CHUNK_SIZE = 500
+
+# Sinais de uma conexão keep-alive que o servidor já fechou (RemoteDisconnected
+# é uma ConnectionResetError); só nesses casos a requisição é repetida.
+_STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError)
+
+# Transportes disponíveis para as chamadas RPC de alta frequência.
+TRANSPORT_RAW = "raw"
+TRANSPORT_ARIA2P = "aria2p"
+
+
+class Aria2RpcError(Exception):
+    """Erro devolvido pelo aria2 (ou falha de transporte) numa chamada JSON-RPC."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"aria2 error {code}: {message}")
+        self.code = code
+        self.message = message
+
 
 @dataclass(frozen=True)
 class Aria2DownloadStatus:
@@ -25,28 +62,169 @@ class Aria2DownloadStatus:
     progress: float
     download_speed: int
     file_path: str
+    total_length: int = 0
+    connections: int = 0
+    completed_length: int = 0
+
+
+class _JsonRpcTransport:
+    """JSON-RPC direto para o aria2 sobre conexões HTTP keep-alive.
+
+    Mantém um pool de ``http.client.HTTPConnection`` reaproveitadas entre
+    chamadas e threads (poller e main loop), evitando o handshake TCP e os
+    objetos ricos do aria2p a cada consulta. Uma conexão reaproveitada que
+    o servidor fechou por inatividade é descartada e a chamada é repetida
+    uma vez numa conexão nova. Qualquer outra falha (inclusive timeout) não
+    é repetida: a requisição pode ter chegado ao aria2, e repetir um
+    ``aria2.addUri`` com GID fixo falharia como "GID não único".
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        secret: str | None,
+        timeout: float = 10.0,
+        pool_size: int = 4,
+    ) -> None:
+        scheme, _, address = host.partition("://")
+        self._connection_class = (
+            http.client.HTTPSConnection
+            if scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._address = address or host
+        self._port = port
+        self._token = f"token:{secret}" if secret else None
+        self._timeout = timeout
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(
+            maxsize=pool_size
+        )
+        self._ids = itertools.count(1)
+
+    def call(self, method: str, params: Sequence[Any] = ()) -> Any:
+        return self._request(method, self._with_token(params))
+
+    def multicall(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        methods = [
+            {"methodName": method, "params": self._with_token(params)}
+            for method, params in calls
+        ]
+        return self._request("system.multicall", [methods])
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ------------------------------------------------------------------
+    def _with_token(self, params: Sequence[Any]) -> List[Any]:
+        return [self._token, *params] if self._token else list(params)
+
+    def _request(self, method: str, params: List[Any]) -> Any:
+        body = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": method,
+                "params": params,
+            }
+        ).encode("utf-8")
+        while True:
+            connection, reused = self._acquire()
+            try:
+                connection.request(
+                    "POST",
+                    "/jsonrpc",
+                    body=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+            except _STALE_CONNECTION_ERRORS as exc:
+                # Conexão keep-alive fechada pelo aria2 antes de qualquer
+                # resposta: a requisição não foi processada.
+                connection.close()
+                if reused:
+                    continue
+                raise Aria2RpcError(-1, str(exc)) from exc
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                raise Aria2RpcError(-1, str(exc)) from exc
+            except ValueError as exc:
+                connection.close()
+                raise Aria2RpcError(-1, f"invalid response: {exc}") from exc
+            self._release(connection)
+            if "error" in payload:
+                error = payload["error"]
+                raise Aria2RpcError(error.get("code", -1), error.get("message", ""))
+            return payload.get("result")
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Uma conexão do pool (``True``) ou uma nova (``False``)."""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            connection = self._connection_class(
+                self._address, self._port, timeout=self._timeout
+            )
+            return connection, False
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
 
 
 class Aria2Client:
-    """Facade for communicating with aria2 daemon via JSON-RPC."""
+    """Facade for communicating with aria2 daemon via JSON-RPC.
+
+    Status queries, the hot path, go through ``transport``: ``"raw"`` speaks
+    JSON-RPC directly over pooled keep-alive connections, ``"aria2p"`` uses
+    the aria2p client. Pause/resume/remove are plain RPC calls on the same
+    transport, so the aria2p API is only imported by the legacy helpers.
+    """
 
     def __init__(
         self,
         host: str = "http://localhost",
         port: int = 6800,
         secret: str | None = None,
+        transport: str = TRANSPORT_RAW,
     ) -> None:
         self._host = host
         self._port = port
         self._secret = secret
         self._api: Optional["aria2p.API"] = None
+        self._filenames = FilenameAllocator()
+        self._transport: _JsonRpcTransport | None = None
+        if transport == TRANSPORT_RAW:
+            self._transport = _JsonRpcTransport(host, port, secret)
+        elif transport != TRANSPORT_ARIA2P:
+            LOGGER.warning("Unknown aria2 transport %r; using aria2p", transport)
+
+    @property
+    def websocket_url(self) -> str:
+        """Endpoint WebSocket do mesmo daemon, usado para as notificações."""
+        scheme, _, address = self._host.partition("://")
+        ws_scheme = "wss" if scheme == "https" else "ws"
+        return f"{ws_scheme}://{address}:{self._port}/jsonrpc"
 
     # ------------------------------------------------------------------
-    def add_uri(self, url: str, options: Optional[dict] = None, download_dir: Optional[str] = None) -> tuple[str, str]:
+    def add_uri(
+        self,
+        url: str,
+        options: Optional[dict] = None,
+        download_dir: Optional[str] = None,
+    ) -> tuple[str, str]:
         """Adiciona URI para download.
 
         Returns:
-            Tupla (gid, filename) onde filename é o nome real que será usado (incluindo renomeações).
+            Tupla (gid, filename) onde filename é o nome real que será usado
+            (incluindo renomeações).
         """
         api = self._get_api()
         filename = self.guess_filename(url)
@@ -62,8 +240,8 @@ class Aria2Client:
         opts = options or {}
         if download_dir:
             opts["dir"] = download_dir
-            # Gerar nome único se arquivo já existir
-            unique_filename = self._get_unique_filename(download_dir, filename)
+            # Gerar nome único se o arquivo já existir ou estiver reservado
+            unique_filename = self._filenames.allocate(download_dir, filename)
             if unique_filename != filename:
                 opts["out"] = unique_filename
                 filename = unique_filename  # Usar o nome único
@@ -73,118 +251,203 @@ class Aria2Client:
         LOGGER.info("Queued download %s via aria2", download.gid)
         return download.gid, filename
 
-    def tell_status(self, gid: str) -> Aria2DownloadStatus:
-        api = self._get_api()
-        if api is None:
-            return Aria2DownloadStatus(
-                gid=gid,
-                status="mock",
-                progress=0.0,
-                download_speed=0,
-                file_path="",
+    def add_uris(
+        self, jobs: Iterable[Tuple[str, Dict[str, str]]]
+    ) -> List[Optional[str]]:
+        """Adiciona vários downloads, um por ``(url, opções)``, num multicall.
+
+        As chamadas ``aria2.addUri`` são agrupadas em blocos de
+        ``MULTICALL_CHUNK_SIZE``. As opções podem fixar o ``gid`` (16 dígitos
+        hexadecimais), ``dir`` e ``out`` escolhidos pelo chamador.
+
+        Returns:
+            O GID de cada download, na ordem de entrada, ou ``None`` se o
+            aria2 o recusou.
+        """
+        jobs = list(jobs)
+        if not self._rpc_available():
+            LOGGER.warning(
+                "aria2p is not available; using mock gids for %d downloads", len(jobs)
+            )
+            return [opts.get("gid") or _mock_gid() for _, opts in jobs]
+
+        gids: List[Optional[str]] = []
+        for start in range(0, len(jobs), MULTICALL_CHUNK_SIZE):
+            chunk = jobs[start : start + MULTICALL_CHUNK_SIZE]
+            results = self._multicall(
+                [("aria2.addUri", [[url], opts]) for url, opts in chunk]
             )
-        download = api.get_download(gid)
-        completed = int(download.completed_length or 0)
-        total = int(download.total_length or 1)
-        progress = min(completed / total, 1.0) if total > 0 else 0.0
-        return Aria2DownloadStatus(
-            gid=download.gid,
-            status=download.status,
-            progress=progress,
-            download_speed=download.download_speed,
-            file_path=download.files[0].path if download.files else "",
+            for (url, _), result in zip(chunk, results):
+                if isinstance(result, list) and result:
+                    gids.append(result[0])
+                else:
+                    LOGGER.warning("aria2 rejected %s: %s", url, result)
+                    gids.append(None)
+        LOGGER.info(
+            "Queued %d of %d downloads via aria2",
+            sum(gid is not None for gid in gids),
+            len(jobs),
+        )
+        return gids
+
+    def allocate_filename(self, url: str, download_dir: Optional[str]) -> str:
+        """Nome que o download de ``url`` usará em ``download_dir``, já reservado."""
+        filename = self.guess_filename(url)
+        if not download_dir:
+            return filename
+        return self._filenames.allocate(download_dir, filename)
+
+    def tell_status(self, gid: str) -> Aria2DownloadStatus:
+        if not self._rpc_available():
+            return _mock_status(gid)
+        return _status_from_struct(
+            self._call("aria2.tellStatus", [gid, list(STATUS_KEYS)])
         )
 
+    def tell_status_many(self, gids: Iterable[str]) -> Dict[str, Aria2DownloadStatus]:
+        """Consulta o status de vários downloads via ``system.multicall``.
+
+        As consultas são agrupadas em blocos de ``MULTICALL_CHUNK_SIZE``, então
+        milhares de GIDs custam poucas idas e voltas ao daemon. GIDs que o
+        aria2 não reconhece (por exemplo após reiniciar o daemon) são omitidos
+        do resultado.
+        """
+        gids = list(gids)
+        if not self._rpc_available():
+            return {gid: _mock_status(gid) for gid in gids}
+
+        statuses: Dict[str, Aria2DownloadStatus] = {}
+        keys = list(STATUS_KEYS)
+        for start in range(0, len(gids), MULTICALL_CHUNK_SIZE):
+            chunk = gids[start : start + MULTICALL_CHUNK_SIZE]
+            results = self._multicall(
+                [("aria2.tellStatus", [gid, keys]) for gid in chunk]
+            )
+            for gid, result in zip(chunk, results):
+                # Sucesso vem como lista de um item; falhas como struct de erro.
+                if isinstance(result, list) and result:
+                    statuses[gid] = _status_from_struct(result[0])
+                else:
+                    LOGGER.debug("Status unavailable for %s: %s", gid, result)
+        return statuses
+
     def list_active(self) -> Iterable[Aria2DownloadStatus]:
         api = self._get_api()
         if api is None:
             return []
-        for download in api.get_downloads():
-            yield self.tell_status(download.gid)
+        gids = [download.gid for download in api.get_downloads()]
+        yield from self.tell_status_many(gids).values()
 
-    def pause(self, gid: str) -> None:
-        api = self._get_api()
-        if api is None:
-            return
-        try:
-            download = api.get_download(gid)
-            download.pause()
-        except Exception as exc:
-            LOGGER.warning("Failed to pause download %s: %s", gid, exc)
+    def pause(self, gid: str) -> bool:
+        return self._control("aria2.pause", [gid], f"pause download {gid}")
 
-    def resume(self, gid: str) -> None:
-        api = self._get_api()
-        if api is None:
-            return
+    def resume(self, gid: str) -> bool:
+        return self._control("aria2.unpause", [gid], f"resume download {gid}")
+
+    def pause_all(self) -> bool:
+        return self._control("aria2.pauseAll", [], "pause all downloads")
+
+    def resume_all(self) -> bool:
+        return self._control("aria2.unpauseAll", [], "resume all downloads")
+
+    def remove(self, gid: str) -> bool:
+        """Remove download from aria2 (cancela se estiver ativo)."""
+        if not self._control("aria2.forceRemove", [gid], f"remove download {gid}"):
+            return False
+        LOGGER.info("Removed download %s from aria2", gid)
+        return True
+
+    def change_position(
+        self, gid: str, position: int, how: str = "POS_SET"
+    ) -> Optional[int]:
+        """Move um download na fila de espera do aria2 (``aria2.changePosition``)."""
+        if not self._rpc_available():
+            return None
         try:
-            download = api.get_download(gid)
-            download.resume()
+            return int(self._call("aria2.changePosition", [gid, position, how]))
         except Exception as exc:
-            LOGGER.warning("Failed to resume download %s: %s", gid, exc)
+            LOGGER.warning("Failed to move download %s in aria2 queue: %s", gid, exc)
+            return None
 
-    def pause_all(self) -> None:
-        api = self._get_api()
-        if api is None:
-            return
-        api.pause_all()
+    def change_option(self, gid: str, options: Dict[str, str]) -> bool:
+        """Altera opções de um download (``aria2.changeOption``).
 
-    def resume_all(self) -> None:
-        api = self._get_api()
-        if api is None:
-            return
-        api.resume_all()
+        Para downloads ativos, opções como ``split`` fazem o aria2 reiniciar
+        a transferência (retomando do ponto em que estava).
+        """
+        if not self._rpc_available():
+            return False
+        try:
+            self._call("aria2.changeOption", [gid, options])
+        except Exception as exc:
+            LOGGER.warning("Failed to change options of %s: %s", gid, exc)
+            return False
+        return True
 
-    def remove(self, gid: str) -> None:
-        """Remove download from aria2 (cancela se estiver ativo)."""
-        api = self._get_api()
-        if api is None:
-            return
+    def change_global_option(self, options: Dict[str, str]) -> bool:
+        """Altera opções globais do aria2 em execução (``aria2.changeGlobalOption``)."""
+        if not self._rpc_available():
+            return False
         try:
-            api.remove([gid], force=True)
-            LOGGER.info("Removed download %s from aria2", gid)
+            self._call("aria2.changeGlobalOption", [options])
         except Exception as exc:
-            LOGGER.warning("Failed to remove download %s: %s", gid, exc)
+            LOGGER.warning("Failed to change aria2 global options %s: %s", options, exc)
+            return False
+        LOGGER.info("aria2 global options changed: %s", options)
+        return True
 
     @staticmethod
     def guess_filename(url: str) -> str:
         return urlparse(url).path.rsplit("/", 1)[-1] or "download"
 
-    @staticmethod
-    def _get_unique_filename(directory: str, filename: str) -> str:
-        """Gera nome único para arquivo, adicionando (1), (2), etc. se necessário."""
-        base_path = Path(directory)
-        file_path = base_path / filename
+    def reserve_filename(self, directory: str, filename: str) -> None:
+        """Impede que ``filename`` seja entregue a outro download em ``directory``."""
+        self._filenames.reserve(directory, filename)
 
-        if not file_path.exists():
-            return filename
+    def release_filename(self, directory: str, filename: str) -> None:
+        """Libera a reserva de ``add_uri``/``add_uris`` ou ``reserve_filename``."""
+        self._filenames.release(directory, filename)
 
-        # Separar nome e extensão
-        if "." in filename:
-            name_parts = filename.rsplit(".", 1)
-            name = name_parts[0]
-            ext = f".{name_parts[1]}"
-        else:
-            name = filename
-            ext = ""
-
-        # Tentar (1), (2), (3), etc.
-        counter = 1
-        while True:
-            new_filename = f"{name}({counter}){ext}"
-            new_path = base_path / new_filename
-            if not new_path.exists():
-                return new_filename
-            counter += 1
-            if counter > 1000:  # Proteção contra loop infinito
-                LOGGER.warning("Could not find unique filename after 1000 attempts")
-                return filename
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
 
     # ------------------------------------------------------------------
+    def _call(self, method: str, params: List[Any]) -> Any:
+        with metrics.RPC_DURATION.time(method):
+            if self._transport is not None:
+                return self._transport.call(method, params)
+            return self._get_api().client.call(method, params)
+
+    def _multicall(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """Executa ``system.multicall``; cada resultado é ``[valor]`` ou um erro."""
+        with metrics.RPC_DURATION.time("system.multicall"):
+            if self._transport is not None:
+                return self._transport.multicall(calls)
+            return self._get_api().client.multicall2(calls)
+
+    def _control(self, method: str, params: List[Any], action: str) -> bool:
+        """Chamada de controle sem retorno útil; falhas são registradas no log."""
+        if not self._rpc_available():
+            LOGGER.warning("No aria2 RPC backend available; cannot %s", action)
+            return False
+        try:
+            self._call(method, params)
+        except Exception as exc:
+            LOGGER.warning("Failed to %s: %s", action, exc)
+            return False
+        return True
+
+    def _rpc_available(self) -> bool:
+        """O transporte próprio dispensa o aria2p; sem nenhum dos dois, simula."""
+        return self._transport is not None or self._get_api() is not None
+
     def _get_api(self) -> Optional["aria2p.API"]:
-        if aria2p is None:
-            return None
         if self._api:
             return self._api
+        aria2p = _import_aria2p()
+        if aria2p is None:
+            return None
         client = aria2p.Client(
             host=self._host,
             port=self._port,
@@ -194,5 +457,48 @@ class Aria2Client:
         return self._api
 
 
+@functools.lru_cache(maxsize=None)
+def _import_aria2p() -> Any:
+    """Importa o aria2p sob demanda: ele custa ~200 ms e ~20 MB de RSS."""
+    try:
+        import aria2p
+    except ImportError:  # pragma: no cover - aria2p optional at runtime
+        return None
+    return aria2p
+
+
 def _mock_gid() -> str:
     return f"mock-{uuid4().hex}"
+
+
+def new_gid() -> str:
+    """GID no formato aceito pela opção ``gid`` do aria2 (16 dígitos hexadecimais)."""
+    return uuid4().hex[:16]
+
+
+def _mock_status(gid: str) -> Aria2DownloadStatus:
+    return Aria2DownloadStatus(
+        gid=gid,
+        status="mock",
+        progress=0.0,
+        download_speed=0,
+        file_path="",
+    )
+
+
+def _status_from_struct(data: Dict[str, Any]) -> Aria2DownloadStatus:
+    """Converte a resposta crua de ``aria2.tellStatus`` em ``Aria2DownloadStatus``."""
+    completed = int(data.get("completedLength") or 0)
+    total = int(data.get("totalLength") or 0)
+    progress = min(completed / total, 1.0) if total > 0 else 0.0
+    files = data.get("files") or []
+    return Aria2DownloadStatus(
+        gid=data.get("gid", ""),
+        status=data.get("status", ""),
+        progress=progress,
+        download_speed=int(data.get("downloadSpeed") or 0),
+        file_path=files[0].get("path", "") if files else "",
+        total_length=total,
+        connections=int(data.get("connections") or 0),
+        completed_length=completed,
+    )
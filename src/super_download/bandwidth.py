@@ -0,0 +1,83 @@
+"""Limite global de velocidade conforme o horário (agenda de banda)."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Any, Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BandwidthRule:
+    """Limite aplicado entre ``start`` e ``end`` nos dias da semana indicados.
+
+    ``days`` usa a numeração de ``datetime.weekday()`` (0 = segunda); ``None``
+    vale para todos os dias. Se ``end`` for menor ou igual a ``start`` a regra
+    atravessa a meia-noite e o dia considerado é o do início. ``limit`` é
+    repassado ao aria2 como ``max-overall-download-limit`` (bytes/s ou valores
+    como ``"2M"``; ``0`` = sem limite).
+    """
+
+    start: time
+    end: time
+    limit: str
+    days: Optional[frozenset[int]] = None
+
+    def matches(self, moment: datetime) -> bool:
+        current = moment.time()
+        weekday = moment.weekday()
+        if self.start < self.end:
+            return self.start <= current < self.end and self._on_day(weekday)
+        # Atravessa a meia-noite: a parte depois das 00:00 pertence ao dia anterior.
+        if current >= self.start:
+            return self._on_day(weekday)
+        if current < self.end:
+            return self._on_day((weekday - 1) % 7)
+        return False
+
+    def _on_day(self, weekday: int) -> bool:
+        return self.days is None or weekday in self.days
+
+
+class BandwidthSchedule:
+    """Lista ordenada de regras; vale a primeira que casar com o horário."""
+
+    def __init__(self, rules: Iterable[BandwidthRule], default_limit: Any = 0) -> None:
+        self.rules: Tuple[BandwidthRule, ...] = tuple(rules)
+        self.default_limit = str(default_limit or 0)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BandwidthSchedule":
+        """Monta a agenda a partir de ``bandwidth_schedule`` e ``max_global_speed``.
+
+        Entradas inválidas são ignoradas com um aviso no log.
+        """
+        rules: List[BandwidthRule] = []
+        for entry in config.get("bandwidth_schedule") or []:
+            try:
+                rules.append(_rule_from_dict(entry))
+            except (KeyError, TypeError, ValueError) as exc:
+                LOGGER.warning("Regra de banda inválida %r: %s", entry, exc)
+        return cls(rules, config.get("max_global_speed", 0))
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def limit_at(self, moment: datetime) -> str:
+        for rule in self.rules:
+            if rule.matches(moment):
+                return rule.limit
+        return self.default_limit
+
+
+def _rule_from_dict(entry: dict) -> BandwidthRule:
+    days = entry.get("days")
+    return BandwidthRule(
+        start=time.fromisoformat(entry["start"]),
+        end=time.fromisoformat(entry["end"]),
+        limit=str(entry.get("limit") or 0),
+        days=frozenset(int(day) for day in days) if days is not None else None,
+    )
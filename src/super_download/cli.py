@@ -1,13 +1,49 @@
-"""CLI utilitário para histórico do Super Download."""
+"""CLI utilitário para histórico do Super Download.
+
+Não importa PyGObject: o diretório de estado vem de :mod:`.paths` e o
+histórico é lido em fluxo, então ``listar`` parte rápido mesmo com
+históricos enormes.
+"""
 
 from __future__ import annotations
 
 import argparse
+import heapq
+import io
 import json
-from typing import Iterable
+import os
+import re
+import shutil
+import sys
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List
 
+from .ipc import IpcClient, IpcError
 from .models import DownloadRecord
 from .persistence import PersistenceStore
+from .scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+
+# URLs por requisição ao enviar listas longas para a instância em execução.
+ADD_BATCH_SIZE = 500
+
+PRIORITY_NAMES = {
+    "baixa": PRIORITY_LOW,
+    "normal": PRIORITY_NORMAL,
+    "alta": PRIORITY_HIGH,
+}
+
+STATUS_NAMES = ("queued", "waiting", "active", "paused", "complete", "error", "removed")
+
+_SINCE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Ordem das linhas em ``estado``/``acompanhar``: o que está andando primeiro.
+_STATUS_ORDER = {
+    status: index
+    for index, status in enumerate(
+        ("active", "waiting", "queued", "paused", "error", "complete", "removed")
+    )
+}
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -23,19 +59,165 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Exibe a saída em JSON.",
     )
+    list_parser.add_argument(
+        "--status",
+        action="append",
+        type=_parse_statuses,
+        help=f"Só estes status, separados por vírgula ({', '.join(STATUS_NAMES)}).",
+    )
+    list_parser.add_argument(
+        "--since",
+        type=_parse_since,
+        help="Só registros alterados desde uma data ISO (2024-05-01T08:00) ou "
+        "há um intervalo (30m, 12h, 7d).",
+    )
+    list_parser.add_argument(
+        "--limit", type=_non_negative, help="Número máximo de registros exibidos."
+    )
+    list_parser.add_argument(
+        "--offset", type=_non_negative, default=0, help="Registros a pular (paginação)."
+    )
 
     subparsers.add_parser("config", help="Mostra configurações persistidas.")
 
+    add_parser = subparsers.add_parser(
+        "adicionar",
+        aliases=["add"],
+        help="Envia URLs (uma por linha) para o Super Download em execução.",
+    )
+    add_parser.add_argument(
+        "arquivo",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default="-",
+        help="Arquivo com as URLs; '-' (padrão) lê da entrada padrão.",
+    )
+    add_parser.add_argument(
+        "--lote",
+        type=int,
+        default=ADD_BATCH_SIZE,
+        help=f"URLs enviadas por requisição (padrão: {ADD_BATCH_SIZE}).",
+    )
+    add_parser.add_argument(
+        "--prioridade",
+        choices=sorted(PRIORITY_NAMES),
+        default="normal",
+        help="Prioridade dos downloads na fila (padrão: normal).",
+    )
+    add_parser.add_argument(
+        "--url",
+        action="append",
+        dest="urls",
+        help="URL a adicionar (pode repetir); dispensa o arquivo.",
+    )
+
+    for name, alias, action in (
+        ("pausar", "pause", "Pausa"),
+        ("retomar", "resume", "Retoma"),
+    ):
+        control_parser = subparsers.add_parser(
+            name, aliases=[alias], help=f"{action} downloads na instância em execução."
+        )
+        control_parser.add_argument(
+            "gids", nargs="*", help="GIDs (ou prefixos únicos)."
+        )
+        control_parser.add_argument(
+            "--todos", action="store_true", help="Todos os downloads."
+        )
+
+    cancel_parser = subparsers.add_parser(
+        "cancelar", aliases=["cancel"], help="Cancela downloads e os remove da lista."
+    )
+    cancel_parser.add_argument("gids", nargs="+", help="GIDs (ou prefixos únicos).")
+
+    status_parser = subparsers.add_parser(
+        "estado",
+        aliases=["status"],
+        help="Estado atual dos downloads na instância em execução.",
+    )
+    status_parser.add_argument("gids", nargs="*", help="GIDs (ou prefixos únicos).")
+    status_parser.add_argument(
+        "--todos", action="store_true", help="Inclui concluídos, com erro e removidos."
+    )
+    status_parser.add_argument(
+        "--json", action="store_true", help="Exibe a saída em JSON."
+    )
+
+    watch_parser = subparsers.add_parser(
+        "acompanhar",
+        aliases=["watch"],
+        help="Acompanha os downloads ao vivo numa tabela compacta (Ctrl+C sai).",
+    )
+    watch_parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=1.0,
+        help="Segundos entre atualizações da tabela (padrão: 1; mínimo 0.2).",
+    )
+    watch_parser.add_argument(
+        "--status",
+        action="append",
+        type=_parse_statuses,
+        help=(
+            "Só estes status, separados por vírgula "
+            "(padrão: os que ainda podem mudar)."
+        ),
+    )
+
+    timings_parser = subparsers.add_parser(
+        "tempos",
+        aliases=["timings"],
+        help="Mostra percentis dos trechos críticos medidos na instância em execução.",
+    )
+    timings_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Exibe a saída em JSON.",
+    )
+
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
-    store = PersistenceStore()
+    if args.command in {"adicionar", "add"}:
+        return _cmd_adicionar(
+            io.StringIO("\n".join(args.urls)) if args.urls else args.arquivo,
+            batch_size=max(1, args.lote),
+            priority=PRIORITY_NAMES[args.prioridade],
+        )
+    if args.command in {"tempos", "timings"}:
+        return _cmd_tempos(json_output=args.json)
+    if args.command in {"pausar", "pause", "retomar", "resume"}:
+        command = "pause" if args.command in {"pausar", "pause"} else "resume"
+        if not args.gids and not args.todos:
+            parser.error("informe GIDs ou --todos")
+        return _cmd_controle(command, args.gids, all_downloads=args.todos)
+    if args.command in {"cancelar", "cancel"}:
+        return _cmd_controle("cancel", args.gids)
+    if args.command in {"estado", "status"}:
+        return _cmd_estado(args.gids, all_downloads=args.todos, json_output=args.json)
+    if args.command in {"acompanhar", "watch"}:
+        statuses = sorted({status for group in args.status or [] for status in group})
+        return _cmd_acompanhar(args.intervalo, statuses)
+
+    # Consultas não gravam nada (nem a migração do history.json).
+    store = PersistenceStore(read_only=True)
 
     if args.command == "listar":
-        return _cmd_listar(store.history, json_output=getattr(args, "json", False))
+        statuses = {status for group in args.status or [] for status in group}
+        try:
+            entries = store.iter_history(
+                statuses=statuses or None,
+                since=args.since,
+                limit=args.limit,
+                offset=args.offset,
+            )
+            return _cmd_listar(entries, json_output=args.json)
+        except ValueError as exc:
+            print(f"Erro: {exc}", file=sys.stderr)
+            return 1
     if args.command == "config":
         print(json.dumps(store.config, indent=2, ensure_ascii=False))
         return 0
@@ -45,22 +227,250 @@ def main(argv: list[str] | None = None) -> int:
 
 
 def _cmd_listar(entries: Iterable[dict], json_output: bool = False) -> int:
+    """Escreve cada registro assim que ele é lido (memória constante)."""
+    out = sys.stdout
+    try:
+        if json_output:
+            count = 0
+            out.write("[")
+            for entry in entries:
+                out.write(",\n  " if count else "\n  ")
+                out.write(json.dumps(entry, ensure_ascii=False))
+                count += 1
+            out.write("\n]\n" if count else "]\n")
+            return 0
+
+        count = 0
+        for entry in entries:
+            record = DownloadRecord.from_dict(entry)
+            out.write(
+                f"{record.gid[:8]}  {record.status:<10}  "
+                f"{record.progress * 100:>3.0f}%  {record.filename or record.url}\n"
+            )
+            count += 1
+        if not count:
+            out.write("Nenhum download registrado.\n")
+        out.flush()
+    except BrokenPipeError:
+        # ``listar | head``: o leitor saiu; não é erro.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+    return 0
+
+
+def _parse_statuses(value: str) -> List[str]:
+    statuses = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [status for status in statuses if status not in STATUS_NAMES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"status desconhecido: {', '.join(unknown)}")
+    return statuses
+
+
+def _parse_since(value: str) -> float:
+    """Timestamp Unix de uma data ISO (hora local) ou de um intervalo relativo."""
+    match = re.fullmatch(r"(\d+)([smhd])", value.strip())
+    if match:
+        return time.time() - int(match.group(1)) * _SINCE_UNITS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"data inválida: {value!r} (use 2024-05-01, 2024-05-01T08:00 ou 30m/12h/7d)"
+        ) from None
+
+
+def _non_negative(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("deve ser zero ou positivo")
+    return number
+
+
+def _cmd_adicionar(
+    stream: IO[str], batch_size: int = ADD_BATCH_SIZE, priority: int = PRIORITY_NORMAL
+) -> int:
+    """Lê as URLs em fluxo e as envia em blocos, sem carregar a lista inteira."""
+    received = added = 0
+    try:
+        with IpcClient() as client:
+            for batch in _iter_batches(_iter_urls(stream), batch_size):
+                result = client.request("add", urls=batch, priority=priority)
+                received += result["received"]
+                added += result["added"]
+    except IpcError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(f"{added} de {received} URLs adicionadas.")
+    return 0 if added == received else 2
+
+
+def _cmd_tempos(json_output: bool = False) -> int:
+    try:
+        with IpcClient() as client:
+            timings = client.request("timings")
+    except IpcError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+
     if json_output:
-        print(json.dumps(list(entries), indent=2, ensure_ascii=False))
+        print(json.dumps(timings, indent=2))
         return 0
 
-    if not entries:
-        print("Nenhum download registrado.")
+    measured = {name: summary for name, summary in timings.items() if summary["count"]}
+    if not measured:
+        print("Nenhuma medição registrada ainda.")
         return 0
 
-    for entry in entries:
-        record = DownloadRecord.from_dict(entry)
+    print(
+        f"{'trecho':<18}{'chamadas':>10}"
+        f"{'p50':>10}{'p90':>10}{'p99':>10}{'máx':>10}  (ms)"
+    )
+    for name, summary in measured.items():
         print(
-            f"{record.gid[:8]}  {record.status:<10}  "
-            f"{record.progress * 100:>3.0f}%  {record.filename or record.url}"
+            f"{name:<18}{summary['total']:>10}{summary['p50_ms']:>10.2f}"
+            f"{summary['p90_ms']:>10.2f}{summary['p99_ms']:>10.2f}{summary['max_ms']:>10.2f}"
         )
     return 0
 
 
+def _cmd_controle(command: str, gids: List[str], all_downloads: bool = False) -> int:
+    try:
+        with IpcClient() as client:
+            result = client.request(command, gids=gids, all=all_downloads)
+    except IpcError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    verb = {"pause": "pausado(s)", "resume": "retomado(s)", "cancel": "cancelado(s)"}[
+        command
+    ]
+    if result.get("all"):
+        print(f"Todos os downloads {verb}.")
+    else:
+        print(f"{len(result['gids'])} download(s) {verb}: {' '.join(result['gids'])}")
+    return 0
+
+
+def _cmd_estado(
+    gids: List[str], all_downloads: bool = False, json_output: bool = False
+) -> int:
+    try:
+        with IpcClient() as client:
+            records = client.request("status", gids=gids, all=all_downloads)
+    except IpcError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    if json_output:
+        print(json.dumps(records, indent=2, ensure_ascii=False))
+    else:
+        print("\n".join(_render_table({record["gid"]: record for record in records})))
+    return 0
+
+
+def _cmd_acompanhar(interval: float, statuses: List[str] | None = None) -> int:
+    """Redesenha a tabela a cada atualização do servidor (já limitadas ao intervalo)."""
+    records: Dict[str, Dict[str, Any]] = {}
+    clear = "\x1b[H\x1b[2J" if sys.stdout.isatty() else ""
+    try:
+        with IpcClient() as client:
+            for update in client.stream(
+                "watch", interval=interval, statuses=statuses or []
+            ):
+                for gid in update["removed"]:
+                    records.pop(gid, None)
+                for delta in update["changed"]:
+                    records.setdefault(delta["gid"], {}).update(delta)
+                if not (update["changed"] or update["removed"]) and records:
+                    continue  # só um sinal de vida do servidor
+                height = shutil.get_terminal_size().lines - 1
+                lines = _render_table(records, max_rows=max(1, height - 2))
+                sys.stdout.write(clear + "\n".join(lines) + "\n")
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        return 0
+    except IpcError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    print("O Super Download foi encerrado.", file=sys.stderr)
+    return 0
+
+
+def _render_table(
+    records: Dict[str, Dict[str, Any]], max_rows: int | None = None
+) -> List[str]:
+    def order(record: Dict[str, Any]) -> tuple:
+        return (
+            _STATUS_ORDER.get(record.get("status"), len(_STATUS_ORDER)),
+            -record.get("priority", 0),
+            record["gid"],
+        )
+
+    active = waiting = total_speed = 0
+    for record in records.values():
+        status = record.get("status")
+        active += status == "active"
+        waiting += status in {"waiting", "queued"}
+        total_speed += record.get("speed", 0)
+    lines = [
+        f"{active} ativo(s), {waiting} na fila, {len(records)} no total — "
+        f"{_format_speed(total_speed)}",
+        f"{'gid':<8}  {'estado':<9}  {'prog':>5}  "
+        f"{'veloc.':>10}  {'restante':>8}  arquivo",
+    ]
+    # Só as linhas que cabem no terminal são ordenadas e formatadas.
+    if max_rows is None:
+        shown = sorted(records.values(), key=order)
+    else:
+        shown = heapq.nsmallest(max_rows, records.values(), key=order)
+    for record in shown:
+        eta = record.get("eta", -1)
+        lines.append(
+            f"{record['gid'][:8]:<8}  {record.get('status', ''):<9}  "
+            f"{record.get('progress', 0.0) * 100:>4.0f}%  "
+            f"{_format_speed(record.get('avg_speed') or record.get('speed', 0)):>10}  "
+            f"{_format_eta(eta) if eta >= 0 else '':>8}  "
+            f"{record.get('filename') or record.get('url', '')}"
+        )
+    if len(shown) < len(records):
+        lines.append(f"… mais {len(records) - len(shown)}")
+    return lines
+
+
+def _format_speed(value: float) -> str:
+    for unit in ("B/s", "KiB/s", "MiB/s"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B/s" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB/s"
+
+
+def _format_eta(seconds: int) -> str:
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def _iter_urls(stream: IO[str]) -> Iterator[str]:
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+def _iter_batches(urls: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for url in urls:
+        batch.append(url)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
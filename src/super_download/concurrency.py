@@ -0,0 +1,69 @@
+"""Ajuste automático do número de downloads simultâneos."""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConcurrencyController:
+    """Sobe ou desce o limite de downloads simultâneos buscando a maior vazão.
+
+    A cada ``window`` amostras da velocidade total compara a média com a da
+    janela anterior: se melhorou mais que ``tolerance`` continua na mesma
+    direção, senão inverte. Só se move enquanto há fila esperando vaga; com
+    todos os downloads já em andamento mais vagas não mudariam nada e a
+    comparação recomeça do zero.
+    """
+
+    def __init__(
+        self,
+        minimum: int,
+        maximum: int,
+        initial: int,
+        window: int = 6,
+        tolerance: float = 0.05,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.window = window
+        self.tolerance = tolerance
+        self._direction = 1
+        self._samples: List[int] = []
+        self._previous: Optional[float] = None
+
+    def sample(self, total_speed: int, saturated: bool) -> Optional[int]:
+        """Registra uma amostra; devolve o novo limite quando ele muda."""
+        if not saturated:
+            self._samples.clear()
+            self._previous = None
+            return None
+        self._samples.append(total_speed)
+        if len(self._samples) < self.window:
+            return None
+        mean = sum(self._samples) / len(self._samples)
+        self._samples.clear()
+        previous, self._previous = self._previous, mean
+
+        if previous is not None and mean <= previous * (1 + self.tolerance):
+            self._direction = -self._direction
+        new_limit = self.limit + self._direction
+        if not self.minimum <= new_limit <= self.maximum:
+            self._direction = -self._direction
+            new_limit = self.limit + self._direction
+        new_limit = min(max(new_limit, self.minimum), self.maximum)
+
+        LOGGER.info(
+            "Concurrency %d -> %d (%.0f KiB/s, previous window %s)",
+            self.limit,
+            new_limit,
+            mean / 1024,
+            "n/a" if previous is None else f"{previous / 1024:.0f} KiB/s",
+        )
+        if new_limit == self.limit:
+            return None
+        self.limit = new_limit
+        return new_limit
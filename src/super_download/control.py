@@ -0,0 +1,267 @@
+"""Comandos que o ``super-download-cli`` pode executar na instância em execução."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Set
+
+from gi.repository import GLib
+
+from . import profiling
+from .download_manager import TERMINAL_STATUSES, DownloadManager
+from .ipc import IpcServer
+from .models import DownloadChangeSet, DownloadRecord
+from .scheduler import PRIORITIES, PRIORITY_NORMAL
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ControlService:
+    """Expõe o ``DownloadManager`` pelo socket de :mod:`.ipc`.
+
+    As requisições chegam nas threads do servidor; cada comando é executado
+    no main loop (onde o manager vive) e a thread aguarda o resultado.
+    """
+
+    MAIN_LOOP_TIMEOUT_SECONDS = 60.0
+    # Limites do intervalo entre atualizações do ``watch``.
+    WATCH_MIN_INTERVAL_SECONDS = 0.2
+    WATCH_DEFAULT_INTERVAL_SECONDS = 1.0
+    # Sem alterações, uma atualização vazia confirma que a conexão segue viva.
+    WATCH_HEARTBEAT_SECONDS = 15.0
+
+    def __init__(self, manager: DownloadManager) -> None:
+        self._manager = manager
+        self._commands: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "add": self._cmd_add,
+            "pause": self._cmd_pause,
+            "resume": self._cmd_resume,
+            "cancel": self._cmd_cancel,
+            "status": self._cmd_status,
+            "watch": self._cmd_watch,
+            "timings": self._cmd_timings,
+        }
+        self._server = IpcServer(self._handle)
+
+    def start(self) -> bool:
+        """Abre o socket; devolve False se não foi possível atendê-lo."""
+        try:
+            return self._server.start()
+        except OSError as exc:
+            LOGGER.warning("Controle local indisponível: %s", exc)
+            return False
+
+    def stop(self) -> None:
+        self._server.stop()
+
+    # ------------------------------------------------------------------
+    def _handle(self, command: str, payload: Dict[str, Any]) -> Any:
+        func = self._commands.get(command)
+        if func is None:
+            raise ValueError(f"comando desconhecido: {command}")
+        return _run_on_main_loop(func, payload, self.MAIN_LOOP_TIMEOUT_SECONDS)
+
+    def _cmd_add(self, payload: Dict[str, Any]) -> Dict[str, int]:
+        urls = [str(url) for url in payload.get("urls") or [] if url]
+        priority = int(payload.get("priority", PRIORITY_NORMAL))
+        if priority not in PRIORITIES:
+            raise ValueError(f"prioridade inválida: {priority}")
+        accepted = self._manager.enqueue_urls(urls, priority=priority) if urls else 0
+        return {"received": len(urls), "added": accepted}
+
+    def _cmd_pause(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if payload.get("all"):
+            self._manager.pause_all()
+            return {"all": True}
+        gids = self._resolve(payload)
+        for gid in gids:
+            self._manager.pause(gid)
+        return {"gids": gids}
+
+    def _cmd_resume(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if payload.get("all"):
+            self._manager.resume_all()
+            return {"all": True}
+        gids = self._resolve(payload)
+        for gid in gids:
+            self._manager.resume(gid)
+        return {"gids": gids}
+
+    def _cmd_cancel(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        gids = self._resolve(payload)
+        for gid in gids:
+            self._manager.cancel(gid)
+        return {"gids": gids}
+
+    def _cmd_status(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if payload.get("gids"):
+            records = [self._manager.get(gid) for gid in self._resolve(payload)]
+        elif payload.get("all"):
+            records = self._manager.snapshot()
+        else:
+            records = self._manager.live_records()
+        return [_record_dict(record) for record in records if record is not None]
+
+    def _cmd_watch(self, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Fluxo de alterações agregadas, no máximo uma atualização por intervalo.
+
+        Acompanha os downloads com os ``statuses`` pedidos (por padrão os que
+        ainda podem mudar, nunca o histórico inteiro). A primeira atualização
+        traz esses downloads; as seguintes só os campos que mudaram, e quem
+        sai do filtro vem em ``removed``. Roda na thread da conexão; o acesso
+        ao manager é feito no main loop.
+        """
+        interval = max(
+            self.WATCH_MIN_INTERVAL_SECONDS,
+            float(payload.get("interval", self.WATCH_DEFAULT_INTERVAL_SECONDS)),
+        )
+        statuses = frozenset(str(status) for status in payload.get("statuses") or [])
+        # Só percorre o histórico inteiro se algum status final foi pedido.
+        if statuses & TERMINAL_STATUSES:
+            source = self._manager.snapshot()
+        else:
+            source = self._manager.live_records()
+        lock = threading.Lock()
+        wake = threading.Event()
+        pending = [DownloadChangeSet()]
+        for record in source:
+            if _watched(record, statuses):
+                pending[0].record_added(record)
+        shown: Set[str] = set()
+
+        def on_changes(changes: DownloadChangeSet) -> None:
+            with lock:
+                pending[0].merge(changes)
+            wake.set()
+
+        def take(_payload: Dict[str, Any]) -> Dict[str, Any]:
+            with lock:
+                changes, pending[0] = pending[0], DownloadChangeSet()
+            return self._serialize_changes(changes, statuses, shown)
+
+        self._manager.subscribe_changes(on_changes, initial=False)
+        return self._watch_updates(interval, wake, take, on_changes)
+
+    def _watch_updates(
+        self,
+        interval: float,
+        wake: threading.Event,
+        take: Callable[[Dict[str, Any]], Dict[str, Any]],
+        subscriber: Callable[[DownloadChangeSet], None],
+    ) -> Iterator[Dict[str, Any]]:
+        timeout = self.MAIN_LOOP_TIMEOUT_SECONDS
+        first = True
+        try:
+            while True:
+                # O estado inicial é enviado mesmo vazio; depois, só mudanças
+                # ou o sinal de vida quando o heartbeat expira.
+                woke = first or wake.wait(self.WATCH_HEARTBEAT_SECONDS)
+                wake.clear()
+                update = _run_on_main_loop(take, {}, timeout)
+                if woke and not first and not (update["changed"] or update["removed"]):
+                    continue
+                first = False
+                yield update
+                # Agrega o que chegar até o fim do intervalo numa única atualização.
+                time.sleep(interval)
+        finally:
+            _run_on_main_loop(
+                lambda _payload: self._manager.unsubscribe_changes(subscriber),
+                {},
+                timeout,
+            )
+
+    def _cmd_timings(self, _payload: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+        return profiling.report()
+
+    # ------------------------------------------------------------------
+    def _resolve(self, payload: Dict[str, Any]) -> List[str]:
+        """GIDs completos a partir dos informados (aceita prefixos únicos)."""
+        tokens = [str(gid) for gid in payload.get("gids") or [] if gid]
+        if not tokens:
+            raise ValueError("informe ao menos um GID")
+        resolved = []
+        known = None
+        for token in tokens:
+            if self._manager.get(token) is not None:
+                resolved.append(token)
+                continue
+            if known is None:
+                known = [record.gid for record in self._manager.snapshot()]
+            matches = [gid for gid in known if gid.startswith(token)]
+            if not matches:
+                raise ValueError(f"download não encontrado: {token}")
+            if len(matches) > 1:
+                raise ValueError(f"GID ambíguo: {token} ({len(matches)} downloads)")
+            resolved.append(matches[0])
+        return resolved
+
+    def _serialize_changes(
+        self,
+        changes: DownloadChangeSet,
+        statuses: FrozenSet[str],
+        shown: Set[str],
+    ) -> Dict[str, Any]:
+        """Alterações visíveis num ``watch``; ``shown`` = GIDs que o cliente já tem."""
+        changed: List[Dict[str, Any]] = []
+        removed = [gid for gid in changes.removed if gid in shown]
+        shown.difference_update(removed)
+        updated = ((gid, fields) for gid, fields in changes.updated.items())
+        added = ((gid, None) for gid in changes.added)
+        for gid, fields in itertools.chain(added, updated):
+            record = self._manager.get(gid)
+            if record is None:
+                continue
+            if not _watched(record, statuses):
+                if gid in shown:
+                    shown.discard(gid)
+                    removed.append(gid)
+            elif gid in shown and fields is not None:
+                delta = {name: getattr(record, name) for name in fields}
+                delta["gid"] = gid
+                changed.append(delta)
+            else:
+                # Novo para este cliente (incluído ou entrou no filtro).
+                shown.add(gid)
+                changed.append(_record_dict(record))
+        return {"changed": changed, "removed": sorted(removed)}
+
+
+def _watched(record: DownloadRecord, statuses: FrozenSet[str]) -> bool:
+    if statuses:
+        return record.status in statuses
+    return record.status not in TERMINAL_STATUSES
+
+
+def _record_dict(record: DownloadRecord) -> Dict[str, Any]:
+    data = asdict(record)
+    if data.get("destination") is not None:
+        data["destination"] = str(data["destination"])
+    return data
+
+
+def _run_on_main_loop(
+    func: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any], timeout: float
+) -> Any:
+    done = threading.Event()
+    outcome: Dict[str, Any] = {}
+
+    def _invoke() -> bool:
+        try:
+            outcome["result"] = func(payload)
+        except Exception as exc:  # repassado à thread do socket
+            outcome["error"] = exc
+        finally:
+            done.set()
+        return False
+
+    GLib.idle_add(_invoke)
+    if not done.wait(timeout):
+        raise TimeoutError("o Super Download não respondeu a tempo")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
@@ -0,0 +1,67 @@
+"""Modo headless: fila, persistência e aria2 sem GTK, Adw nem bandeja."""
+
+from __future__ import annotations
+
+import logging
+import signal
+from typing import Sequence
+
+from gi.repository import GLib
+
+from .control import ControlService
+from .download_manager import DownloadManager
+from .ipc import instance_running
+from .logs import configure_logging
+from .persistence import PersistenceStore
+
+LOGGER = logging.getLogger(__name__)
+
+
+class HeadlessDaemon:
+    """Roda o ``DownloadManager`` num ``GLib.MainLoop`` simples.
+
+    Usa o mesmo histórico e a mesma configuração da aplicação gráfica e é
+    controlado pelo ``super-download-cli`` através do socket local. Só uma
+    instância (gráfica ou headless) pode atender o socket; se já houver
+    outra, o daemon sai sem tocar na fila.
+    """
+
+    def __init__(self, debug: bool = False) -> None:
+        self._debug = debug
+        self._loop = GLib.MainLoop()
+
+    def run(self, urls: Sequence[str] = ()) -> int:
+        configure_logging(self._debug)
+        if instance_running():
+            LOGGER.error("Super Download já está em execução; use o super-download-cli")
+            return 1
+
+        persistence = PersistenceStore()
+        manager = DownloadManager(persistence)
+        control = ControlService(manager)
+        if not control.start():
+            manager.shutdown()
+            persistence.close()
+            return 1
+        if urls:
+            manager.enqueue_urls(urls)
+
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signum, self._on_signal, signum)
+        LOGGER.info("Super Download running headless")
+        try:
+            self._loop.run()
+        finally:
+            control.stop()
+            manager.shutdown()
+            persistence.close()
+        LOGGER.info("Super Download headless stopped")
+        return 0
+
+    def quit(self) -> None:
+        self._loop.quit()
+
+    def _on_signal(self, signum: int) -> bool:
+        LOGGER.info("Received %s, shutting down", signal.Signals(signum).name)
+        self.quit()
+        return GLib.SOURCE_REMOVE
@@ -3,79 +3,266 @@
 from __future__ import annotations
 
 import logging
-from typing import Callable, Dict, Iterable, List, Optional
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from gi.repository import GLib
 
-from .aria2_client import Aria2Client, Aria2DownloadStatus
-from .models import DownloadRecord
+from . import metrics, profiling
+from .aria2_client import Aria2Client, new_gid
+from .bandwidth import BandwidthSchedule
+from .concurrency import ConcurrencyController
+from .models import DownloadChangeSet, DownloadRecord
+from .notifications import Aria2NotificationListener
 from .persistence import PersistenceStore
+from .poller import PollSchedule, StatusDelta, StatusPoller
+from .scheduler import PRIORITY_NORMAL, DownloadScheduler, host_of
+from .telemetry import SpeedHistory
+from .tuning import ConnectionTuner
 
 LOGGER = logging.getLogger(__name__)
 
+# Estados finais do aria2: um download nesses estados nunca mais muda.
+TERMINAL_STATUSES = frozenset({"complete", "error", "removed"})
+# Estados em que um download entregue ao aria2 ocupa uma vaga do scheduler.
+SLOT_STATUSES = frozenset({"waiting", "active"})
+# Campos do status que alimentam o histórico de velocidade/ETA.
+TELEMETRY_INPUTS = frozenset({"status", "completed", "speed", "size"})
+
 
 class DownloadManager:
     """Maintains download queue state and bridges to aria2."""
 
-    POLL_INTERVAL_SECONDS = 1
+    POLL_SCHEDULE = PollSchedule()
+    # Intervalo entre reavaliações da agenda de banda.
+    BANDWIDTH_CHECK_SECONDS = 60
+    # Intervalo entre amostras de vazão do controle adaptativo de concorrência.
+    CONCURRENCY_SAMPLE_SECONDS = 5
+    # Reajustar split de um download ativo o reinicia; só vale no começo.
+    RETUNE_MAX_PROGRESS = 0.05
+    # Intervalo entre os resumos de profiling.timed no log.
+    TIMINGS_LOG_SECONDS = 600
 
     def __init__(self, persistence: Optional[PersistenceStore] = None) -> None:
-        self._client = Aria2Client()
         self._downloads: Dict[str, DownloadRecord] = {}
+        # GIDs que ainda podem mudar de estado; só eles são consultados no aria2.
+        self._live: set[str] = set()
         self._observers: List[Callable[[List[DownloadRecord]], None]] = []
+        self._change_observers: List[Callable[[DownloadChangeSet], None]] = []
         self._persistence = persistence or PersistenceStore()
+        self._client = Aria2Client(
+            transport=self._persistence.config.get("rpc_transport", "raw")
+        )
         self._dirty = False
+        # Alterações ainda não entregues aos observers de subscribe_changes.
+        self._changes = DownloadChangeSet()
+        # Write-behind: ticks de progresso/velocidade ficam em memória e são
+        # gravados no máximo a cada flush_interval_seconds; transições de
+        # status, inclusões e remoções são gravadas na hora.
+        self._flush_interval = int(
+            self._persistence.config.get("flush_interval_seconds", 10)
+        )
+        self._persist_pending = False
+        self._persist_id = 0
+        # Alterações ainda não gravadas; só esses GIDs vão para o histórico.
+        self._unsaved = DownloadChangeSet()
+        # Opções globais já aceitas pelo aria2, para só enviar o que mudou.
+        self._global_options: Dict[str, str] = {}
+        self._bandwidth = BandwidthSchedule.from_config(self._persistence.config)
+        self._bandwidth_id = 0
+        self._concurrency: ConcurrencyController | None = None
+        self._concurrency_id = 0
+        self._configure_concurrency(self._persistence.config)
+        # Downloads com status "queued" ficam aqui até haver vaga; só então
+        # são enviados ao aria2 (com o GID já escolhido na inclusão).
+        self._scheduler = DownloadScheduler(
+            max_active=self._max_concurrent(),
+            max_per_host=int(self._persistence.config.get("max_per_host", 2)),
+        )
+        # GIDs pausados no aria2 que resume_all devolveu à fila do scheduler:
+        # ao serem liberados são retomados (unpause) em vez de reenviados.
+        self._parked: set[str] = set()
+        # split/max-connection-per-server escolhidos por host conforme a vazão medida.
+        self._tuner = ConnectionTuner()
+        self._auto_tune = bool(self._persistence.config.get("auto_tune", True))
+        # Conexões pedidas ao aria2 por GID; GIDs reajustados após saber o tamanho.
+        self._requested_connections: Dict[str, int] = {}
+        self._retuned: set[str] = set()
+        # Histórico de velocidade só dos downloads ativos (memória limitada).
+        self._telemetry: Dict[str, SpeedHistory] = {}
+        metrics.DOWNLOADS.add_collector(self._count_by_status)
+        self._metrics_server = self._start_metrics_server(
+            int(self._persistence.config.get("metrics_port", 0))
+        )
+
+        # O aria2 é consultado numa thread própria; só os deltas calculados lá
+        # voltam ao main loop, onde _apply_deltas os aplica aos registros.
+        self._poller = StatusPoller(
+            self._client, self.POLL_SCHEDULE, self._apply_deltas
+        )
 
         for item in self._persistence.history:
             record = DownloadRecord.from_dict(item)
             if record.gid:
                 self._downloads[record.gid] = record
+                if record.status == "queued":
+                    self._scheduler.push(
+                        record.gid, host_of(record.url), record.priority
+                    )
+                elif record.status in SLOT_STATUSES:
+                    self._scheduler.occupy(record.gid, host_of(record.url))
+                self._update_live_index(record)
 
-        self._poll_id = GLib.timeout_add_seconds(self.POLL_INTERVAL_SECONDS, self._poll)
+        self._poller.start()
+        # Transições de status chegam por push; enquanto o WebSocket estiver
+        # conectado o poller só acompanha progresso dos downloads ativos.
+        self._notifications = Aria2NotificationListener(
+            self._client.websocket_url,
+            self._on_notification,
+            self._on_connection_change,
+        )
+        self._notifications.start()
+        self._persistence.add_config_listener(self._on_config_changed)
+        self._apply_global_options()
+        self._schedule_bandwidth_check()
+        self._schedule_concurrency_sampling()
+        self._timings_id = GLib.timeout_add_seconds(
+            self.TIMINGS_LOG_SECONDS, self._on_timings_log
+        )
+        self._forget_lost_downloads()
+        self._release_ready()
         self._flush_changes()
 
     # ------------------------------------------------------------------
-    def enqueue_urls(self, urls: Iterable[str]) -> None:
+    def enqueue_urls(self, urls: Iterable[str], priority: int = PRIORITY_NORMAL) -> int:
+        """Queue every URL and persist them in one flush.
+
+        Downloads wait in the scheduler; those that fit the free slots are
+        sent to aria2 right away in batched RPCs. Returns how many were queued.
+        """
         download_dir = self._persistence.config.get("default_path")
+        count = 0
         for url in urls:
-            gid, filename = self._client.add_uri(url, download_dir=download_dir)
             record = DownloadRecord(
-                gid=gid,
+                gid=new_gid(),
                 url=url,
-                filename=filename,  # Usar o filename real retornado (já com renomeação se necessário)
+                filename=self._client.allocate_filename(url, download_dir),
                 status="queued",
+                priority=priority,
             )
-            LOGGER.info("Enqueued download %s (%s)", gid, url)
-            self._downloads[gid] = record
+            LOGGER.debug("Enqueued download %s (%s)", record.gid, url)
+            self._downloads[record.gid] = record
+            self._scheduler.push(record.gid, host_of(url), priority)
+            self._update_live_index(record)
+            self._changes.record_added(record)
             self._dirty = True
+            count += 1
+        self._release_ready()
+        self._flush_changes()
+        return count
+
+    def set_priority(self, gid: str, priority: int) -> None:
+        record = self._downloads.get(gid)
+        if record is None or record.priority == priority:
+            return
+        LOGGER.debug("Download %s priority %d -> %d", gid, record.priority, priority)
+        record.priority = priority
+        self._changes.record_updated(gid, {"priority"})
+        self._dirty = True
+        if (
+            not self._scheduler.set_priority(gid, priority)
+            and record.status == "waiting"
+        ):
+            # Já está na fila do aria2: coloca-o depois dos que têm prioridade
+            # igual ou maior.
+            position = sum(
+                1
+                for other_gid in self._live
+                if other_gid != gid
+                and self._downloads[other_gid].status == "waiting"
+                and self._downloads[other_gid].priority >= priority
+            )
+            self._client.change_position(gid, position)
         self._flush_changes()
 
     def pause_all(self) -> None:
         LOGGER.info("Pausing all downloads")
+        # A fila do scheduler para de liberar downloads até resume_all.
+        self._scheduler.suspended = True
         self._client.pause_all()
-        for record in self._downloads.values():
+        queued = []
+        for gid in sorted(self._live):
+            record = self._downloads[gid]
             if record.status in {"active", "waiting"}:
                 record.status = "paused"
+                self._scheduler.vacate(gid)
+                self._poller.invalidate(record.gid)
+                self._changes.record_updated(gid, {"status"})
                 self._dirty = True
+            elif gid in self._scheduler and gid not in self._parked:
+                queued.append(record)
+            self._unpark(gid)
+        if queued:
+            # Como em pause(): os que esperavam vaga entram no aria2 já
+            # pausados, e o histórico não os inicia sozinho na próxima sessão.
+            for record in queued:
+                self._scheduler.discard(record.gid)
+            self._submit(queued, paused=True)
         self._flush_changes()
 
     def resume_all(self) -> None:
         LOGGER.info("Resuming all downloads")
-        self._client.resume_all()
+        self._scheduler.suspended = False
+        # Retomar tudo direto no aria2 furaria os limites global e por host:
+        # os pausados voltam à fila e são retomados conforme houver vaga.
+        for record in sorted(self.live_records(), key=lambda record: record.gid):
+            if record.status == "paused" and record.gid not in self._scheduler:
+                self._parked.add(record.gid)
+                self._scheduler.push(record.gid, host_of(record.url), record.priority)
+        self._release_ready()
+        self._flush_changes()
 
     def pause(self, gid: str) -> None:
         LOGGER.debug("Pausing download %s", gid)
+        record = self._downloads.get(gid)
+        if gid in self._parked:
+            # Já está pausado no aria2; só deixa de esperar vaga.
+            self._unpark(gid)
+            return
+        if record is not None and gid in self._scheduler:
+            # Ainda não foi para o aria2: entra lá já pausado, fora da fila.
+            self._scheduler.discard(gid)
+            self._submit([record], paused=True)
+            self._flush_changes()
+            return
         self._client.pause(gid)
-        if gid in self._downloads:
-            self._downloads[gid].status = "paused"
+        if record is not None:
+            record.status = "paused"
+            self._scheduler.vacate(gid)
+            self._poller.invalidate(gid)
+            self._changes.record_updated(gid, {"status"})
             self._dirty = True
+            self._release_ready()
             self._flush_changes()
 
     def resume(self, gid: str) -> None:
         LOGGER.debug("Resuming download %s", gid)
+        self._unpark(gid)
+        if gid in self._scheduler:
+            # Ainda não foi para o aria2: continua na fila até haver vaga.
+            self._release_ready()
+            self._flush_changes()
+            return
         self._client.resume(gid)
-        if gid in self._downloads:
-            self._downloads[gid].status = "active"
+        record = self._downloads.get(gid)
+        if record is not None:
+            record.status = "active"
+            self._scheduler.occupy(gid, host_of(record.url))
+            self._poller.invalidate(gid)
+            self._changes.record_updated(gid, {"status"})
             self._dirty = True
             self._flush_changes()
 
@@ -83,24 +270,44 @@ class DownloadManager:
         """Remove download da lista (não cancela no aria2)."""
         LOGGER.info("Removing download %s from manager", gid)
         if gid in self._downloads:
-            self._downloads.pop(gid, None)
+            record = self._downloads.pop(gid)
+            self._unpark(gid)
+            self._scheduler.discard(gid)
+            if gid in self._live:
+                self._live.discard(gid)
+                self._poller.untrack(gid)
+                self._release_filename(record)
+                self._forget_transient(gid)
+            self._changes.record_removed(gid)
             self._dirty = True
+            self._release_ready()
             self._flush_changes()
 
     def cancel(self, gid: str) -> None:
         """Cancela download no aria2 e remove da lista."""
         LOGGER.info("Cancelling download %s", gid)
-        self._client.remove(gid)
+        if gid not in self._scheduler or gid in self._parked:
+            self._client.remove(gid)
         self.remove(gid)
 
+    def set_ui_visible(self, visible: bool) -> None:
+        """Poll active transfers quickly only while someone is looking at them."""
+        LOGGER.debug("UI visibility changed: %s", visible)
+        self._poller.set_visible(visible)
+
     def can_quit(self) -> bool:
         return not self.has_active_downloads
 
     @property
     def has_active_downloads(self) -> bool:
+        queued_counts = not self._scheduler.suspended
         return any(
-            record.status in {"active", "waiting", "queued"}
-            for record in self._downloads.values()
+            self._downloads[gid].status in SLOT_STATUSES
+            or (
+                queued_counts
+                and (self._downloads[gid].status == "queued" or gid in self._parked)
+            )
+            for gid in self._live
         )
 
     # ------------------------------------------------------------------
@@ -112,55 +319,484 @@ class DownloadManager:
         )
 
     def shutdown(self) -> None:
-        if self._poll_id:
-            GLib.source_remove(self._poll_id)
-            self._poll_id = 0
+        if self._bandwidth_id:
+            GLib.source_remove(self._bandwidth_id)
+            self._bandwidth_id = 0
+        if self._concurrency_id:
+            GLib.source_remove(self._concurrency_id)
+            self._concurrency_id = 0
+        if self._timings_id:
+            GLib.source_remove(self._timings_id)
+            self._timings_id = 0
+        self._notifications.stop()
+        self._poller.stop()
+        metrics.DOWNLOADS.remove_collector(self._count_by_status)
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
         self._flush_changes(force=True)
+        self._client.close()
+        profiling.log_report()
+
+    def get(self, gid: str) -> DownloadRecord | None:
+        return self._downloads.get(gid)
+
+    def speed_history(self, gid: str) -> List[Tuple[float, int]]:
+        """Recent ``(monotonic time, bytes downloaded)`` samples of a download."""
+        history = self._telemetry.get(gid)
+        return history.samples() if history is not None else []
+
+    def live_records(self) -> List[DownloadRecord]:
+        """Records that can still change (not complete, error or removed)."""
+        return [self._downloads[gid] for gid in self._live]
 
     def subscribe(self, callback: Callable[[List[DownloadRecord]], None]) -> None:
         self._observers.append(callback)
         callback(self.snapshot())
 
+    def subscribe_changes(
+        self, callback: Callable[[DownloadChangeSet], None], initial: bool = True
+    ) -> None:
+        """Receive only what changed since the previous notification.
+
+        Unless ``initial`` is False, the first call delivers every known record
+        as ``added`` so the subscriber can build its initial state from the
+        same code path.
+        """
+        self._change_observers.append(callback)
+        if not initial:
+            return
+        snapshot = DownloadChangeSet()
+        for record in self._downloads.values():
+            snapshot.record_added(record)
+        callback(snapshot)
+
+    def unsubscribe_changes(
+        self, callback: Callable[[DownloadChangeSet], None]
+    ) -> None:
+        if callback in self._change_observers:
+            self._change_observers.remove(callback)
+
     # ------------------------------------------------------------------
-    def _poll(self) -> bool:
+    def _on_notification(self, gid: str, delta: Dict[str, Any]) -> None:
+        """Called from the listener thread for each aria2 notification."""
+        self._poller.invalidate(gid)
+        GLib.idle_add(self._apply_notification, gid, delta)
+
+    def _on_connection_change(self, connected: bool) -> None:
+        """Called from the listener thread when the aria2 WebSocket goes up or down."""
+        self._poller.set_push_mode(connected)
+        if connected:
+            # Um aria2c reiniciado volta com as opções da linha de comando.
+            GLib.idle_add(self._reapply_global_options)
+
+    def _apply_notification(self, gid: str, delta: Dict[str, Any]) -> bool:
+        self._apply_deltas({gid: delta})
+        return False
+
+    def _apply_deltas(self, deltas: Dict[str, StatusDelta]) -> None:
+        """Apply status deltas computed by the poller thread (main loop only)."""
         changed = False
-        for gid, record in list(self._downloads.items()):
-            status = self._safe_status(gid)
-            if status is None:
+        status_changed = False
+        sampled: Dict[str, set[str]] = {}
+        for gid, delta in deltas.items():
+            record = self._downloads.get(gid)
+            if record is None:
                 continue
-            if record.status != status.status:
-                record.status = status.status
-                changed = True
-            if abs(record.progress - status.progress) > 0.0001:
-                record.progress = status.progress
-                changed = True
-            if record.speed != status.download_speed:
-                record.speed = status.download_speed
-                changed = True
-            destination = status.file_path or record.destination
-            if record.destination != destination:
-                record.destination = destination
+            previous_status = record.status
+            previous_bytes = record.completed
+            fields = set()
+            for name, value in delta.items():
+                if getattr(record, name) != value:
+                    setattr(record, name, value)
+                    fields.add(name)
+            downloaded = record.completed - previous_bytes
+            if downloaded > 0:
+                metrics.DOWNLOADED_BYTES.inc(downloaded)
+            if fields & TELEMETRY_INPUTS or not delta:
+                # Delta vazio = download ativo parado; a amostra faz a média decair.
+                fields |= self._sample_telemetry(record)
+            if fields:
                 changed = True
+                self._changes.record_updated(gid, fields)
+                sampled[gid] = fields
+            if record.status != previous_status:
+                status_changed = True
+                if record.status != "paused":
+                    self._unpark(gid)  # retomado ou removido por fora da fila
+                self._update_live_index(record)
+                if record.status in SLOT_STATUSES:
+                    self._scheduler.occupy(gid, host_of(record.url))
+                else:
+                    self._scheduler.vacate(gid)
+        if status_changed:
+            self._release_ready()
+        if sampled and self._auto_tune:
+            self._tune(sampled)
+        if sampled:
+            metrics.DOWNLOAD_SPEED.set(self._total_speed())
         if changed:
             self._dirty = True
+            self._flush_changes(urgent=status_changed)
+
+    def _sample_telemetry(self, record: DownloadRecord) -> set[str]:
+        """Update smoothed speed and ETA; returns the record fields that changed."""
+        avg_speed, eta = 0, -1
+        if record.status != "active":
+            self._telemetry.pop(record.gid, None)
+        elif record.size <= 0:
+            avg_speed = record.speed  # tamanho desconhecido: sem bytes para medir
+        else:
+            history = self._telemetry.get(record.gid)
+            if history is None:
+                history = self._telemetry[record.gid] = SpeedHistory()
+            history.add(time.monotonic(), record.completed)
+            avg_speed = int(history.speed)
+            remaining = history.eta(record.size)
+            if remaining is not None:
+                eta = int(remaining)
+        changed = set()
+        if record.avg_speed != avg_speed:
+            record.avg_speed = avg_speed
+            changed.add("avg_speed")
+        if record.eta != eta:
+            record.eta = eta
+            changed.add("eta")
+        return changed
+
+    def _tune(self, sampled: Dict[str, set[str]]) -> None:
+        """Feed throughput samples to the tuner and retune freshly sized downloads."""
+        self._tuner.observe_total(self._total_speed())
+        for gid, fields in sampled.items():
+            record = self._downloads[gid]
+            if record.status != "active":
+                continue
+            host = host_of(record.url)
+            if fields & {"speed", "connections"}:
+                self._tuner.observe(
+                    host,
+                    record.speed,
+                    record.connections,
+                    self._requested_connections.get(gid, 0),
+                )
+            if (
+                "size" in fields
+                and record.size > 0
+                and record.progress < self.RETUNE_MAX_PROGRESS
+                and gid not in self._retuned
+            ):
+                self._retuned.add(gid)
+                options = self._tuner.options_for(host, record.size)
+                connections = int(options["split"])
+                if connections != self._requested_connections.get(gid):
+                    LOGGER.info(
+                        "Tuning %s (%s, %d bytes): %d connections",
+                        gid,
+                        host,
+                        record.size,
+                        connections,
+                    )
+                    if self._client.change_option(gid, options):
+                        self._requested_connections[gid] = connections
+
+    def _on_config_changed(self, config: Dict[str, Any]) -> None:
+        flush_interval = int(config.get("flush_interval_seconds", 10))
+        if flush_interval != self._flush_interval:
+            self._flush_interval = flush_interval
+            if self._persist_id:
+                # Reagenda a gravação pendente já com o novo intervalo.
+                GLib.source_remove(self._persist_id)
+                self._persist_id = GLib.timeout_add_seconds(
+                    self._flush_interval, self._on_persist_timeout
+                )
+        self._bandwidth = BandwidthSchedule.from_config(config)
+        self._schedule_bandwidth_check()
+        self._configure_concurrency(config)
+        self._schedule_concurrency_sampling()
+        self._apply_global_options()
+        self._scheduler.max_active = self._max_concurrent()
+        self._scheduler.max_per_host = int(config.get("max_per_host", 2))
+        self._release_ready()
+        self._flush_changes()
+
+    def _release_ready(self) -> None:
+        """Send queued downloads to aria2 while the scheduler has free slots."""
+        gids = self._scheduler.take_ready()
+        fresh = []
+        for gid in gids:
+            if gid not in self._parked:
+                fresh.append(self._downloads[gid])
+                continue
+            self._parked.discard(gid)
+            self._client.resume(gid)
+            record = self._downloads[gid]
+            record.status = "waiting"
+            self._poller.invalidate(gid)
+            self._changes.record_updated(gid, {"status"})
+            self._dirty = True
+        if fresh:
+            self._submit(fresh)
+
+    def _unpark(self, gid: str) -> None:
+        """Take a paused GID queued by resume_all out of the scheduler."""
+        if gid in self._parked:
+            self._parked.discard(gid)
+            self._scheduler.discard(gid)
+
+    def _submit(self, records: List[DownloadRecord], paused: bool = False) -> None:
+        """Add the records to aria2 under their own GIDs in one batched call."""
+        jobs = []
+        for record in records:
+            options = {"gid": record.gid}
+            if record.filename != self._client.guess_filename(record.url):
+                # Só força o nome em colisões; senão o aria2 pode usar o
+                # Content-Disposition ou o nome após redirecionamentos.
+                options["out"] = record.filename
+            directory = self._download_dir(record)
+            if directory:
+                options["dir"] = directory
+            if self._auto_tune:
+                options.update(
+                    self._tuner.options_for(host_of(record.url), record.size)
+                )
+            if paused:
+                options["pause"] = "true"
+            jobs.append((record.url, options))
+        results = self._client.add_uris(jobs)
+        submitted = []
+        for record, (_, options), gid in zip(records, jobs, results):
+            if gid is None:
+                record.status = "error"
+                record.error = "aria2 recusou o download"
+                self._scheduler.vacate(record.gid)
+                self._update_live_index(record)
+                self._changes.record_updated(record.gid, {"status", "error"})
+            else:
+                record.status = "paused" if paused else "waiting"
+                if "split" in options:
+                    self._requested_connections[record.gid] = int(options["split"])
+                submitted.append(record.gid)
+                self._changes.record_updated(record.gid, {"status"})
+        self._poller.track(submitted)
+        self._dirty = True
+
+    def _apply_global_options(self, force: bool = False) -> None:
+        """Push concurrency and the current bandwidth limit to aria2 if they changed."""
+        options = {
+            "max-concurrent-downloads": str(self._max_concurrent()),
+            "max-overall-download-limit": self._bandwidth.limit_at(datetime.now()),
+        }
+        if not force:
+            options = {
+                key: value
+                for key, value in options.items()
+                if self._global_options.get(key) != value
+            }
+        if options and self._client.change_global_option(options):
+            self._global_options.update(options)
+
+    def _max_concurrent(self) -> int:
+        if self._concurrency is not None:
+            return self._concurrency.limit
+        return int(self._persistence.config.get("max_concurrent", 3))
+
+    def _total_speed(self) -> int:
+        return sum(
+            self._downloads[gid].speed
+            for gid in self._scheduler.running_gids()
+            if gid in self._downloads
+        )
+
+    def _count_by_status(self) -> Dict[Tuple[str, ...], float]:
+        """Queue depth by status, called from the metrics server thread."""
+        # list() copia os valores de uma vez só, sem ceder o GIL no meio, então
+        # o main loop pode continuar alterando o dicionário enquanto contamos.
+        counts = Counter(record.status for record in list(self._downloads.values()))
+        return {(status,): count for status, count in counts.items()}
+
+    def _start_metrics_server(self, port: int) -> Optional[metrics.MetricsServer]:
+        if port <= 0:
+            return None
+        server = metrics.MetricsServer(port)
+        try:
+            server.start()
+        except OSError as exc:
+            LOGGER.warning("Could not start metrics endpoint on port %d: %s", port, exc)
+            return None
+        return server
+
+    def _configure_concurrency(self, config: Dict[str, Any]) -> None:
+        if not config.get("adaptive_concurrency"):
+            self._concurrency = None
+            return
+        minimum = int(config.get("concurrency_min", 1))
+        maximum = int(config.get("concurrency_max", 8))
+        current = self._concurrency
+        if current is None or (current.minimum, current.maximum) != (minimum, maximum):
+            initial = current.limit if current else int(config.get("max_concurrent", 3))
+            self._concurrency = ConcurrencyController(minimum, maximum, initial)
+            LOGGER.info(
+                "Adaptive concurrency enabled (%d..%d, starting at %d)",
+                minimum,
+                maximum,
+                self._concurrency.limit,
+            )
+
+    def _schedule_concurrency_sampling(self) -> None:
+        if self._concurrency is not None and not self._concurrency_id:
+            self._concurrency_id = GLib.timeout_add_seconds(
+                self.CONCURRENCY_SAMPLE_SECONDS, self._on_concurrency_sample
+            )
+        elif self._concurrency is None and self._concurrency_id:
+            GLib.source_remove(self._concurrency_id)
+            self._concurrency_id = 0
+
+    def _on_concurrency_sample(self) -> bool:
+        scheduler = self._scheduler
+        # Só faz sentido medir mais vagas enquanto há fila esperando por elas.
+        saturated = (
+            len(scheduler) > 0
+            and not scheduler.suspended
+            and scheduler.running >= scheduler.max_active
+        )
+        new_limit = self._concurrency.sample(self._total_speed(), saturated)
+        if new_limit is not None:
+            scheduler.max_active = new_limit
+            self._apply_global_options()
+            self._release_ready()
             self._flush_changes()
         return True
 
-    def _safe_status(self, gid: str) -> Aria2DownloadStatus | None:
+    def _reapply_global_options(self) -> bool:
+        self._apply_global_options(force=True)
+        self._forget_lost_downloads()
+        return False
+
+    def _forget_lost_downloads(self) -> None:
+        """Fail downloads that aria2 no longer knows about.
+
+        An aria2c restarted without a session file forgets every GID; those
+        records would keep their scheduler slots forever, since no poll
+        result ever comes back to free them.
+        """
+        gids = [gid for gid in self._live if self._downloads[gid].status != "queued"]
+        if not gids:
+            return
         try:
-            return self._client.tell_status(gid)
-        except Exception as exc:  # pragma: no cover - defensive guard
-            LOGGER.exception("Failed to poll status for %s: %s", gid, exc)
-            return None
+            known = self._client.tell_status_many(gids)
+        except Exception as exc:
+            LOGGER.warning("Could not check downloads against aria2: %s", exc)
+            return
+        lost = [gid for gid in gids if gid not in known]
+        for gid in lost:
+            LOGGER.warning("Download %s is unknown to aria2; marking it failed", gid)
+            record = self._downloads[gid]
+            record.status = "error"
+            record.error = "download perdido pelo aria2"
+            record.speed = 0
+            self._unpark(gid)
+            self._scheduler.vacate(gid)
+            self._update_live_index(record)
+            self._changes.record_updated(gid, {"status", "error", "speed"})
+            self._dirty = True
+        if lost:
+            self._release_ready()
+            self._flush_changes()
 
-    def _flush_changes(self, force: bool = False) -> None:
+    def _schedule_bandwidth_check(self) -> None:
+        """Re-evaluate the bandwidth schedule periodically, only while one exists."""
+        if self._bandwidth and not self._bandwidth_id:
+            self._bandwidth_id = GLib.timeout_add_seconds(
+                self.BANDWIDTH_CHECK_SECONDS, self._on_bandwidth_check
+            )
+        elif not self._bandwidth and self._bandwidth_id:
+            GLib.source_remove(self._bandwidth_id)
+            self._bandwidth_id = 0
+
+    def _on_bandwidth_check(self) -> bool:
+        self._apply_global_options()
+        return True
+
+    def _on_timings_log(self) -> bool:
+        profiling.log_report()
+        return True
+
+    def _update_live_index(self, record: DownloadRecord) -> None:
+        """Keep the live-GID index, poller targets and filename reservations in sync."""
+        if record.status in TERMINAL_STATUSES:
+            if record.gid in self._live:
+                self._live.discard(record.gid)
+                self._poller.untrack(record.gid)
+                self._release_filename(record)
+                self._forget_transient(record.gid)
+        elif record.gid not in self._live:
+            self._live.add(record.gid)
+            if record.gid not in self._scheduler:
+                self._poller.track([record.gid])
+            directory = self._download_dir(record)
+            if directory and record.filename:
+                # Downloads na fila ainda não criaram o arquivo no disco.
+                self._client.reserve_filename(directory, record.filename)
+
+    def _forget_transient(self, gid: str) -> None:
+        """Drop per-download runtime state once a download can no longer change."""
+        self._requested_connections.pop(gid, None)
+        self._retuned.discard(gid)
+        self._telemetry.pop(gid, None)
+
+    def _release_filename(self, record: DownloadRecord) -> None:
+        directory = self._download_dir(record)
+        if directory and record.filename:
+            self._client.release_filename(directory, record.filename)
+
+    def _download_dir(self, record: DownloadRecord) -> Optional[str]:
+        if record.destination:
+            return str(Path(record.destination).parent)
+        return self._persistence.config.get("default_path")
+
+    def _flush_changes(self, force: bool = False, urgent: bool = True) -> None:
+        """Notify observers and persist now (urgent/force) or on the next flush tick."""
         if not self._dirty and not force:
             return
-        self._persistence.save_downloads(self._downloads.values())
-        self._notify_observers()
-        self._dirty = False
+        with profiling.timed("flush_changes"):
+            self._unsaved.merge(self._changes)
+            self._persist_pending = True
+            if urgent or force:
+                self._persist_now()
+            elif not self._persist_id:
+                self._persist_id = GLib.timeout_add_seconds(
+                    self._flush_interval, self._on_persist_timeout
+                )
+            self._notify_observers()
+            self._dirty = False
+
+    def _persist_now(self) -> None:
+        if self._persist_id:
+            GLib.source_remove(self._persist_id)
+            self._persist_id = 0
+        if not self._persist_pending:
+            return
+        changes, self._unsaved = self._unsaved, DownloadChangeSet()
+        if not self._persistence.save_changes(self._downloads, changes):
+            # Tenta de novo no próximo flush, com o que mudou desde então por cima.
+            changes.merge(self._unsaved)
+            self._unsaved = changes
+        self._persist_pending = False
+
+    def _on_persist_timeout(self) -> bool:
+        self._persist_id = 0
+        self._persist_now()
+        return False
 
     def _notify_observers(self) -> None:
+        with metrics.NOTIFY_DURATION.time(), profiling.timed("notify_observers"):
+            self._deliver_to_observers()
+
+    def _deliver_to_observers(self) -> None:
+        changes, self._changes = self._changes, DownloadChangeSet()
+        if changes:
+            for callback in self._change_observers:
+                callback(changes)
         if not self._observers:
             return
         snapshot = self.snapshot()
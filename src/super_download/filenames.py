@@ -0,0 +1,107 @@
+"""Alocação de nomes de arquivo únicos por diretório de destino."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Set, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FilenameAllocator:
+    """Entrega nomes livres (``nome(1).ext``, ``nome(2).ext``...) sem colisões.
+
+    Para cada diretório guarda a listagem do disco (relida no máximo a cada
+    ``LISTING_TTL_SECONDS``), os nomes reservados por downloads que o aria2
+    ainda não criou e, para cada nome pedido, o próximo sufixo a tentar. Como
+    o sufixo só avança, N pedidos do mesmo nome custam O(N) no total em vez
+    de O(N²) ``stat`` no disco.
+    """
+
+    LISTING_TTL_SECONDS = 30.0
+
+    def __init__(self) -> None:
+        self._directories: Dict[str, _DirectoryNames] = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, directory: str, filename: str) -> str:
+        """Reserva e devolve ``filename`` ou a primeira variante livre dele."""
+        with self._lock:
+            return self._names_for(directory).allocate(filename)
+
+    def reserve(self, directory: str, filename: str) -> None:
+        """Marca como ocupado um nome já escolhido (por exemplo, vindo do histórico)."""
+        with self._lock:
+            self._names_for(directory).reserve(filename)
+
+    def release(self, directory: str, filename: str) -> None:
+        """Libera a reserva; o nome só volta a ficar livre se não existir no disco."""
+        with self._lock:
+            names = self._directories.get(os.path.abspath(directory))
+            if names is not None:
+                names.release(filename)
+
+    def _names_for(self, directory: str) -> "_DirectoryNames":
+        key = os.path.abspath(directory)
+        names = self._directories.get(key)
+        if names is None:
+            names = self._directories[key] = _DirectoryNames(key)
+        if time.monotonic() - names.listed_at > self.LISTING_TTL_SECONDS:
+            names.refresh()
+        return names
+
+
+class _DirectoryNames:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.listed_at = float("-inf")
+        self._on_disk: Set[str] = set()
+        self._reserved: Set[str] = set()
+        self._next_suffix: Dict[str, int] = {}
+
+    def refresh(self) -> None:
+        try:
+            self._on_disk = set(os.listdir(self.path))
+        except FileNotFoundError:
+            self._on_disk = set()  # o aria2 cria o diretório ao iniciar
+        except OSError as exc:
+            LOGGER.warning("Could not list %s: %s", self.path, exc)
+            self._on_disk = set()
+        self.listed_at = time.monotonic()
+
+    def allocate(self, filename: str) -> str:
+        if not self._taken(filename):
+            self._reserved.add(filename)
+            return filename
+        name, ext = _split_extension(filename)
+        counter = self._next_suffix.get(filename, 1)
+        candidate = f"{name}({counter}){ext}"
+        while self._taken(candidate):
+            counter += 1
+            candidate = f"{name}({counter}){ext}"
+        self._next_suffix[filename] = counter + 1
+        self._reserved.add(candidate)
+        LOGGER.debug("File exists, using unique name: %s", candidate)
+        return candidate
+
+    def reserve(self, filename: str) -> None:
+        self._reserved.add(filename)
+
+    def release(self, filename: str) -> None:
+        self._reserved.discard(filename)
+        # O download pode ter criado o arquivo depois da última listagem.
+        if os.path.exists(os.path.join(self.path, filename)):
+            self._on_disk.add(filename)
+
+    def _taken(self, filename: str) -> bool:
+        return filename in self._reserved or filename in self._on_disk
+
+
+def _split_extension(filename: str) -> Tuple[str, str]:
+    if "." in filename:
+        name, ext = filename.rsplit(".", 1)
+        return name, f".{ext}"
+    return filename, ""
@@ -0,0 +1,261 @@
+"""Canal local (socket Unix) entre o ``super-download-cli`` e a instância em execução.
+
+O protocolo é JSON delimitado por linha: cada requisição é um objeto
+``{"command": ..., ...}`` e cada resposta ``{"ok": true, "result": ...}`` ou
+``{"ok": false, "error": "..."}``. Uma mesma conexão pode enviar várias
+requisições em sequência, o que permite ao CLI transmitir listas grandes em
+blocos sem reabrir o socket. Um comando cujo handler devolve um iterador
+(como ``watch``) vira um fluxo: cada item é enviado como uma resposta até o
+cliente desconectar. Este módulo não depende de GLib; quem cria o servidor
+decide em que thread os comandos são executados.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+SOCKET_NAME = "superdownload.sock"
+
+# Tamanho máximo de uma linha de requisição (protege o servidor de lixo).
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+Handler = Callable[[str, Dict[str, Any]], Any]
+
+
+class IpcError(Exception):
+    """Falha ao falar com a instância em execução (ou erro devolvido por ela)."""
+
+
+def socket_path() -> Path:
+    """Caminho do socket: ``$XDG_RUNTIME_DIR`` ou um diretório privado em /tmp."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / SOCKET_NAME
+    return _fallback_dir() / SOCKET_NAME
+
+
+def instance_running(path: Optional[Path] = None) -> bool:
+    """Há uma instância (gráfica ou headless) atendendo o socket?"""
+    return _is_listening(path or socket_path())
+
+
+class IpcServer:
+    """Atende requisições no socket Unix, uma thread por conexão.
+
+    ``handler(command, payload)`` é chamado na thread da conexão; o valor
+    devolvido vira ``result`` e uma exceção vira ``error``.
+    """
+
+    def __init__(self, handler: Handler, path: Optional[Path] = None) -> None:
+        self._handler = handler
+        self._path = Path(path) if path is not None else socket_path()
+        self._server: socketserver.ThreadingUnixStreamServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def start(self) -> bool:
+        """Abre o socket; devolve False se outra instância já o atende."""
+        if self._server is not None:
+            return True
+        self._path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private_dir(self._path.parent)
+        if self._path.exists():
+            if _is_listening(self._path):
+                LOGGER.warning(
+                    "Socket %s já está em uso por outra instância", self._path
+                )
+                return False
+            self._path.unlink()
+
+        handler = self._handler
+
+        class _RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                _serve_connection(self.rfile, self.wfile, handler)
+
+        # O socket já nasce 0600: sem janela entre o bind e um chmod.
+        previous_umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(
+                str(self._path), _RequestHandler
+            )
+        finally:
+            os.umask(previous_umask)
+        server.daemon_threads = True
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, name="superdownload-ipc", daemon=True
+        )
+        self._thread.start()
+        LOGGER.info("Controle local disponível em %s", self._path)
+        return True
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self._path.unlink()
+        except OSError:
+            pass
+
+
+class IpcClient:
+    """Conexão do CLI com a instância em execução."""
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = 30.0) -> None:
+        self._path = Path(path) if path is not None else socket_path()
+        try:
+            _check_private_dir(self._path.parent)
+        except OSError as exc:
+            raise IpcError(f"Super Download não está em execução ({exc})") from exc
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(str(self._path))
+        except OSError as exc:
+            self._socket.close()
+            raise IpcError(f"Super Download não está em execução ({exc})") from exc
+        self._reader = self._socket.makefile("rb")
+
+    def request(self, command: str, **payload: Any) -> Any:
+        message = dict(payload, command=command)
+        data = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        try:
+            self._socket.sendall(data)
+            line = self._reader.readline()
+        except OSError as exc:
+            raise IpcError(f"Falha na comunicação com o Super Download: {exc}") from exc
+        if not line:
+            raise IpcError("Conexão encerrada pelo Super Download")
+        return _unwrap(line)
+
+    def stream(self, command: str, **payload: Any) -> Iterator[Any]:
+        """Envia um comando de fluxo e devolve cada resultado conforme chega.
+
+        Sem timeout de leitura: o servidor decide o ritmo. Termina quando a
+        instância fecha a conexão.
+        """
+        message = dict(payload, command=command)
+        data = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        try:
+            self._socket.sendall(data)
+            self._socket.settimeout(None)
+            for line in self._reader:
+                yield _unwrap(line)
+        except OSError as exc:
+            raise IpcError(f"Falha na comunicação com o Super Download: {exc}") from exc
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self) -> "IpcClient":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+# ----------------------------------------------------------------------
+def _serve_connection(rfile: BinaryIO, wfile: BinaryIO, handler: Handler) -> None:
+    while True:
+        line = rfile.readline(MAX_REQUEST_BYTES)
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or "command" not in request:
+                raise ValueError("requisição sem 'command'")
+            command = str(request.pop("command"))
+            result = handler(command, request)
+            if isinstance(result, Iterator):
+                _stream(wfile, result)
+                return
+            response = {"ok": True, "result": result}
+        except Exception as exc:  # o erro volta para o cliente
+            LOGGER.debug("Requisição IPC falhou: %s", exc)
+            response = {"ok": False, "error": str(exc)}
+        if not _send(wfile, response):
+            return
+
+
+def _stream(wfile: BinaryIO, items: Iterator[Any]) -> None:
+    """Envia cada item do iterador; fecha-o quando o cliente desconecta."""
+    try:
+        for item in items:
+            if not _send(wfile, {"ok": True, "result": item}):
+                return
+    except Exception as exc:  # o erro volta para o cliente
+        LOGGER.debug("Fluxo IPC falhou: %s", exc)
+        _send(wfile, {"ok": False, "error": str(exc)})
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def _send(wfile: BinaryIO, response: Dict[str, Any]) -> bool:
+    try:
+        wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        wfile.flush()
+    except OSError:
+        return False
+    return True
+
+
+def _unwrap(line: bytes) -> Any:
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise IpcError(response.get("error") or "erro desconhecido")
+    return response.get("result")
+
+
+def _fallback_dir() -> Path:
+    return Path(tempfile.gettempdir()) / f"superdownload-{os.getuid()}"
+
+
+def _check_private_dir(directory: Path) -> None:
+    """Recusa o diretório de /tmp se outro usuário puder tê-lo criado ou alterado.
+
+    Sem ``XDG_RUNTIME_DIR`` o socket fica num diretório de nome previsível em
+    /tmp; quem o criar antes poderia capturar ou forjar o socket de controle.
+    """
+    if directory != _fallback_dir():
+        return  # $XDG_RUNTIME_DIR já é privado por definição
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{directory} não pertence a este usuário")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"{directory} está acessível a outros usuários")
+
+
+def _is_listening(path: Path) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
@@ -0,0 +1,28 @@
+"""Configuração de log compartilhada pela aplicação GTK e pelo modo headless."""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from .paths import state_dir
+
+
+def configure_logging(debug: bool = False) -> Path:
+    """Log em ``~/.local/state/superdownload/log.txt`` e no stderr.
+
+    Devolve o caminho do arquivo.
+    """
+    log_dir = state_dir()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    logfile = log_dir / "log.txt"
+    logging.basicConfig(
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.FileHandler(logfile, encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
+    logging.debug("Logging configured with file %s", logfile)
+    return logfile
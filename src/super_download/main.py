@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import argparse
+import logging
 import sys
 
-from .app import SuperDownloadApplication
+from .paths import state_dir
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -14,11 +15,47 @@ def main(argv: list[str] | None = None) -> int:
 
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--debug", action="store_true", help="Ativa logs detalhados.")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help=(
+            "Roda só a fila e o aria2, sem interface "
+            "(controle via super-download-cli)."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Grava cProfile e tracemalloc ao sair "
+            "(em ~/.local/state/superdownload/profile)."
+        ),
+    )
     known, remaining = parser.parse_known_args(argv[1:])
 
     run_arguments = [argv[0], *remaining]
-    app = SuperDownloadApplication(debug=known.debug)
-    return app.run(run_arguments)
+    profiler = None
+    if known.profile:
+        from .profiling import Profiler
+
+        profiler = Profiler(state_dir() / "profile")
+        profiler.start()
+    try:
+        if known.headless:
+            # Importado aqui para que o modo headless nunca carregue Gtk/Adw.
+            from .daemon import HeadlessDaemon
+
+            urls = [arg for arg in remaining if "://" in arg]
+            return HeadlessDaemon(debug=known.debug).run(urls)
+
+        from .app import SuperDownloadApplication
+
+        app = SuperDownloadApplication(debug=known.debug)
+        return app.run(run_arguments)
+    finally:
+        if profiler is not None:
+            for path in profiler.stop():
+                logging.info("Profile written to %s", path)
 
 
 if __name__ == "__main__":
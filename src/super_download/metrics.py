@@ -0,0 +1,331 @@
+"""Métricas no formato de texto do Prometheus e endpoint HTTP local opcional.
+
+As métricas são objetos de módulo instrumentados onde o trabalho acontece
+(``DownloadManager``, ``StatusPoller``, ``Aria2Client``, ``PersistenceStore``);
+registrar uma observação custa um lock e uma busca binária, então elas ficam
+sempre ativas. O endpoint só é aberto quando ``metrics_port`` é configurado.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+Collector = Callable[[], Dict[LabelValues, float]]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Linhas de amostra no formato de texto, sem HELP/TYPE."""
+
+    def _labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{self._labels(labels)} {_number(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo, definido com ``set`` ou calculado na hora da coleta.
+
+    Coletores (``add_collector``) devolvem ``{rótulos: valor}``; os valores
+    de vários coletores para os mesmos rótulos são somados.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collectors: List[Collector] = [collect] if collect is not None else []
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def add_collector(self, collect: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collect)
+
+    def remove_collector(self, collect: Collector) -> None:
+        with self._lock:
+            if collect in self._collectors:
+                self._collectors.remove(collect)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            collectors = list(self._collectors)
+        for collect in collectors:
+            try:
+                collected = collect()
+            except Exception as exc:  # coleta não pode derrubar o endpoint
+                LOGGER.debug("Coleta de %s falhou: %s", self.name, exc)
+                continue
+            for labels, value in collected.items():
+                values[labels] = values.get(labels, 0.0) + value
+        return [
+            f"{self.name}{self._labels(labels)} {_number(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagem por bucket..., soma, total]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        lines: List[str] = []
+        for labels, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{self._labels(labels, le)} "
+                    f"{_number(cumulative)}"
+                )
+            inf = 'le="+Inf"'
+            lines.append(
+                f"{self.name}_bucket{self._labels(labels, inf)} {_number(series[-1])}"
+            )
+            lines.append(f"{self.name}_sum{self._labels(labels)} {series[-2]!r}")
+            lines.append(
+                f"{self.name}_count{self._labels(labels)} {_number(series[-1])}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+DOWNLOAD_SPEED = REGISTRY.register(
+    Gauge(
+        "superdownload_download_speed_bytes",
+        "Aggregate download throughput of running downloads, in bytes per second.",
+    )
+)
+DOWNLOADED_BYTES = REGISTRY.register(
+    Counter(
+        "superdownload_downloaded_bytes_total",
+        "Bytes downloaded since the application started.",
+    )
+)
+DOWNLOADS = REGISTRY.register(
+    Gauge(
+        "superdownload_downloads",
+        "Known downloads by status (queue depth).",
+        labelnames=("status",),
+    )
+)
+POLL_DURATION = REGISTRY.register(
+    Histogram(
+        "superdownload_poll_duration_seconds",
+        "Duration of a status poll cycle against aria2.",
+    )
+)
+RPC_DURATION = REGISTRY.register(
+    Histogram(
+        "superdownload_rpc_duration_seconds",
+        "Latency of aria2 JSON-RPC calls.",
+        labelnames=("method",),
+    )
+)
+PERSIST_DURATION = REGISTRY.register(
+    Histogram(
+        "superdownload_persist_duration_seconds",
+        "Time spent writing the download history.",
+    )
+)
+NOTIFY_DURATION = REGISTRY.register(
+    Histogram(
+        "superdownload_observer_notify_duration_seconds",
+        "Time spent delivering changes to DownloadManager observers.",
+    )
+)
+
+
+class MetricsServer:
+    """Serve ``GET /metrics`` numa thread própria (por padrão só em localhost)."""
+
+    def __init__(
+        self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY
+    ) -> None:
+        self._address = (host, port)
+        self._registry = registry
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else self._address[1]
+
+    def start(self) -> None:
+        registry = self._registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(self._address, _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="superdownload-metrics", daemon=True
+        )
+        self._thread.start()
+        LOGGER.info(
+            "Métricas disponíveis em http://%s:%d/metrics", self._address[0], self.port
+        )
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
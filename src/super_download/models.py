@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Set
 
 
 @dataclass
@@ -16,18 +16,78 @@ class DownloadRecord:
     speed: int = 0
     error: str | None = None
     destination: str | None = None
+    priority: int = 0
+    size: int = 0
+    # Bytes já baixados, como reportados pelo aria2 (``completedLength``).
+    completed: int = 0
+    connections: int = 0
+    # Velocidade suavizada (bytes/s) e segundos restantes (-1 = desconhecido).
+    avg_speed: int = 0
+    eta: int = -1
     extra: Dict[str, Any] = field(default_factory=dict)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "DownloadRecord":
+        progress = float(data.get("progress", 0.0))
+        size = int(data.get("size", 0))
         return cls(
             gid=data.get("gid", ""),
             url=data.get("url", ""),
             filename=data.get("filename", ""),
             status=data.get("status", "queued"),
-            progress=float(data.get("progress", 0.0)),
+            progress=progress,
             speed=int(data.get("speed", 0)),
             error=data.get("error"),
             destination=data.get("destination"),
+            priority=int(data.get("priority", 0)),
+            size=size,
+            # Históricos antigos não guardavam os bytes; estima pelo progresso.
+            completed=int(data.get("completed", progress * size)),
+            connections=int(data.get("connections", 0)),
+            avg_speed=int(data.get("avg_speed", 0)),
+            eta=int(data.get("eta", -1)),
             extra=data.get("extra") or {},
         )
+
+
+@dataclass
+class DownloadChangeSet:
+    """Alterações acumuladas entre duas notificações do DownloadManager.
+
+    ``updated`` mapeia cada GID para os nomes dos campos que mudaram. As
+    operações de registro mantêm o conjunto mínimo: atualizar um download
+    recém-adicionado não gera entrada em ``updated`` e remover um download
+    adicionado no mesmo ciclo o elimina por completo.
+    """
+
+    added: Dict[str, DownloadRecord] = field(default_factory=dict)
+    updated: Dict[str, Set[str]] = field(default_factory=dict)
+    removed: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def record_added(self, record: DownloadRecord) -> None:
+        self.removed.discard(record.gid)
+        self.updated.pop(record.gid, None)
+        self.added[record.gid] = record
+
+    def record_updated(self, gid: str, fields: Set[str]) -> None:
+        if gid in self.added or not fields:
+            return
+        self.updated.setdefault(gid, set()).update(fields)
+
+    def record_removed(self, gid: str) -> None:
+        if self.added.pop(gid, None) is not None:
+            return
+        self.updated.pop(gid, None)
+        self.removed.add(gid)
+
+    def merge(self, other: "DownloadChangeSet") -> None:
+        """Acumula ``other`` (mais recente) sobre este conjunto."""
+        for gid in other.removed:
+            self.record_removed(gid)
+        for record in other.added.values():
+            self.record_added(record)
+        for gid, fields in other.updated.items():
+            self.record_updated(gid, fields)
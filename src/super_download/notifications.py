@@ -0,0 +1,147 @@
+"""Escuta as notificações que o aria2 envia pelo WebSocket RPC."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+try:
+    import websocket
+except ImportError:  # pragma: no cover - websocket-client optional at runtime
+    websocket = None  # type: ignore[assignment]
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Notificação do aria2 -> campos do DownloadRecord que ela determina.
+# onBtDownloadComplete só indica que os dados chegaram; o torrent continua
+# "active" enquanto semeia e o onDownloadComplete vem depois.
+NOTIFICATION_DELTAS: Dict[str, Dict[str, Any]] = {
+    "aria2.onDownloadStart": {"status": "active"},
+    "aria2.onDownloadPause": {"status": "paused"},
+    "aria2.onDownloadStop": {"status": "removed"},
+    "aria2.onDownloadComplete": {"status": "complete", "progress": 1.0},
+    "aria2.onDownloadError": {"status": "error"},
+    "aria2.onBtDownloadComplete": {"progress": 1.0},
+}
+
+
+class Aria2NotificationListener:
+    """Mantém uma conexão WebSocket com o aria2 numa thread dedicada.
+
+    Cada notificação reconhecida vira uma chamada a ``on_notification(gid,
+    delta)``; mudanças no estado da conexão são informadas por
+    ``on_connection_change(connected)``. Os callbacks rodam na thread do
+    listener, então quem os recebe decide como voltar ao main loop. Se a
+    conexão cair, o listener tenta reconectar a cada
+    ``RECONNECT_DELAY_SECONDS``.
+    """
+
+    RECONNECT_DELAY_SECONDS = 5.0
+    RECV_TIMEOUT_SECONDS = 1.0
+
+    def __init__(
+        self,
+        url: str,
+        on_notification: Callable[[str, Dict[str, Any]], None],
+        on_connection_change: Callable[[bool], None],
+    ) -> None:
+        self._url = url
+        self._on_notification = on_notification
+        self._on_connection_change = on_connection_change
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._socket: Any = None
+        self._connected = False
+
+    # ------------------------------------------------------------------
+    @property
+    def available(self) -> bool:
+        return websocket is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def start(self) -> None:
+        if not self.available:
+            LOGGER.info("websocket-client not available; aria2 notifications disabled")
+            return
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="aria2-notifications", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        sock = self._socket
+        if sock is not None:
+            # abort() acorda a thread bloqueada em recv() sem esperar o
+            # handshake de fechamento do servidor.
+            sock.abort()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._socket = websocket.create_connection(
+                    self._url, timeout=self.RECV_TIMEOUT_SECONDS
+                )
+            except (OSError, websocket.WebSocketException) as exc:
+                LOGGER.debug("aria2 WebSocket unavailable at %s: %s", self._url, exc)
+            else:
+                self._set_connected(True)
+                try:
+                    self._receive_loop()
+                finally:
+                    self._socket.close()
+                    self._socket = None
+                    self._set_connected(False)
+            self._stop.wait(self.RECONNECT_DELAY_SECONDS)
+
+    def _receive_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                message = self._socket.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except (OSError, websocket.WebSocketException) as exc:
+                if not self._stop.is_set():
+                    LOGGER.warning("aria2 WebSocket connection lost: %s", exc)
+                return
+            if not message:
+                return  # conexão fechada pelo servidor
+            self._handle_message(message)
+
+    def _handle_message(self, message: str | bytes) -> None:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            LOGGER.debug("Ignoring malformed aria2 notification: %r", message)
+            return
+        if not isinstance(payload, dict):
+            return
+        delta = NOTIFICATION_DELTAS.get(payload.get("method", ""))
+        if delta is None:
+            return  # respostas a chamadas RPC ou notificações desconhecidas
+        for event in payload.get("params") or []:
+            gid = event.get("gid") if isinstance(event, dict) else None
+            if gid:
+                self._on_notification(gid, dict(delta))
+
+    def _set_connected(self, connected: bool) -> None:
+        if self._connected == connected:
+            return
+        self._connected = connected
+        LOGGER.info(
+            "aria2 notifications %s", "connected" if connected else "disconnected"
+        )
+        self._on_connection_change(connected)
@@ -0,0 +1,25 @@
+"""Diretórios do Super Download segundo a especificação XDG, sem PyGObject.
+
+Equivale a ``GLib.get_user_state_dir()``, mas pode ser importado pelo
+``super-download-cli`` sem carregar o ``gi``.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+APP_DIR_NAME = "superdownload"
+
+
+def user_state_dir() -> Path:
+    """``$XDG_STATE_HOME`` ou, se ausente/relativo, ``~/.local/state``."""
+    value = os.environ.get("XDG_STATE_HOME", "")
+    if value and os.path.isabs(value):
+        return Path(value)
+    return Path.home() / ".local" / "state"
+
+
+def state_dir() -> Path:
+    """Histórico, configuração, log e perfis: ``~/.local/state/superdownload``."""
+    return user_state_dir() / APP_DIR_NAME
@@ -1,78 +1,407 @@
-"""Persistência simples em JSON para o Super Download."""
+"""Persistência do Super Download.
+
+Histórico em SQLite (ou JSON, formato antigo) e configurações em JSON.
+"""
 
 from __future__ import annotations
 
+import itertools
 import json
 import logging
+import os
+import sqlite3
+import tempfile
+import time
 from dataclasses import asdict
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
-
-from gi.repository import GLib
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+)
 
-from .models import DownloadRecord
+from . import metrics
+from .models import DownloadChangeSet, DownloadRecord
+from .paths import state_dir as default_state_dir
 
 LOGGER = logging.getLogger(__name__)
 
 CONFIG_DEFAULTS: Dict[str, Any] = {
     "default_path": str(Path.home() / "Downloads"),
     "max_concurrent": 3,
+    # Ajusta max_concurrent sozinho, entre concurrency_min e concurrency_max,
+    # buscando a maior vazão total.
+    "adaptive_concurrency": False,
+    "concurrency_min": 1,
+    "concurrency_max": 8,
+    # Downloads simultâneos por servidor (0 = sem limite).
+    "max_per_host": 2,
     "max_global_speed": 0,
+    # Regras {"start": "09:00", "end": "18:00", "limit": "2M", "days": [0, 1, 2, 3, 4]};
+    # fora delas vale max_global_speed.
+    "bandwidth_schedule": [],
     "theme": "system",
+    "history_backend": "sqlite",
+    "flush_interval_seconds": 10,
+    "rpc_transport": "raw",
+    # Escolhe split/max-connection-per-server conforme a vazão de cada host.
+    "auto_tune": True,
+    # Porta do endpoint /metrics (formato Prometheus) em 127.0.0.1; 0 desliga.
+    "metrics_port": 0,
 }
 
 
 class PersistenceStore:
-    """Gerencia leitura/escrita dos arquivos JSON persistentes."""
+    """Gerencia leitura/escrita do histórico e das configurações.
+
+    Com ``read_only`` (consultas da CLI) nada é criado nem migrado: o SQLite
+    é aberto em ``mode=ro`` e, sem banco, o ``history.json`` é lido como está.
+    """
 
-    def __init__(self, base_dir: Path | None = None) -> None:
+    def __init__(self, base_dir: Path | None = None, read_only: bool = False) -> None:
         if base_dir is None:
-            state_dir = Path(GLib.get_user_state_dir()) / "superdownload"
+            state_dir = default_state_dir()
         else:
             state_dir = Path(base_dir)
-        state_dir.mkdir(parents=True, exist_ok=True)
-        self._history_path = state_dir / "history.json"
+        self._read_only = read_only
+        if not read_only:
+            state_dir.mkdir(parents=True, exist_ok=True)
         self._config_path = state_dir / "config.json"
         self.config = self._load_config()
-        self.history = self._load_history()
+        self._config_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._history = self._open_history(state_dir)
+        self._loaded_history: List[Dict[str, Any]] | None = None
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Histórico completo, lido na primeira vez que é pedido."""
+        if self._loaded_history is None:
+            self._loaded_history = self._history.load()
+        return self._loaded_history
+
+    def iter_history(
+        self,
+        statuses: Optional[Collection[str]] = None,
+        since: Optional[float] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """Percorre o histórico sem carregá-lo inteiro, na ordem de inclusão.
+
+        ``since`` é um timestamp Unix: só entram registros gravados pela
+        última vez a partir dele (exige o backend SQLite). ``limit`` e
+        ``offset`` paginam o resultado já filtrado.
+        """
+        return self._history.iter(statuses, since, limit, offset)
 
     # ------------------------------------------------------------------
-    def save_downloads(self, downloads: Iterable[DownloadRecord]) -> None:
-        serializable: List[Dict[str, Any]] = []
-        for record in downloads:
-            data = asdict(record)
-            data["progress"] = round(record.progress, 4)
-            # Convert Path objects to strings for JSON serialization
-            if data.get("destination") and isinstance(data["destination"], Path):
-                data["destination"] = str(data["destination"])
-            serializable.append(data)
-        self._write_json(self._history_path, serializable)
-
-    def save_config(self, config: Dict[str, Any]) -> None:
+    def save_downloads(self, downloads: Iterable[DownloadRecord]) -> bool:
+        """Grava a lista completa: o histórico passa a ter só esses registros."""
+        with metrics.PERSIST_DURATION.time():
+            return self._history.save([_serialize(record) for record in downloads])
+
+    def save_changes(
+        self, downloads: Mapping[str, DownloadRecord], changes: DownloadChangeSet
+    ) -> bool:
+        """Grava só os downloads incluídos, alterados ou removidos em ``changes``.
+
+        ``downloads`` é a lista completa, consultada por GID; o backend JSON,
+        que regrava o arquivo inteiro, é o único que a percorre. Devolve
+        False se a gravação falhou (as alterações devem ser reenviadas).
+        """
+        with metrics.PERSIST_DURATION.time():
+            return self._save_changes(downloads, changes)
+
+    def _save_changes(
+        self, downloads: Mapping[str, DownloadRecord], changes: DownloadChangeSet
+    ) -> bool:
+        if not self._history.incremental:
+            return self._history.save(
+                [_serialize(record) for record in downloads.values()]
+            )
+        # Incluídos primeiro, na ordem de inclusão (é a ordem do rowid no SQLite).
+        gids = list(changes.added)
+        gids.extend(gid for gid in changes.updated if gid not in changes.added)
+        rows = [_serialize(downloads[gid]) for gid in gids if gid in downloads]
+        if not rows and not changes.removed:
+            return True
+        return self._history.write(rows, changes.removed)
+
+    def save_config(self, config: Dict[str, Any]) -> bool:
+        """Grava a configuração; só vale (e notifica) se a gravação der certo."""
         merged = CONFIG_DEFAULTS | config
-        self._write_json(self._config_path, merged)
+        if not _write_json(self._config_path, merged):
+            return False
         self.config = merged
+        for callback in self._config_listeners:
+            callback(merged)
+        return True
+
+    def add_config_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Chamado com a configuração completa sempre que ``save_config`` grava."""
+        self._config_listeners.append(callback)
+
+    def close(self) -> None:
+        self._history.close()
 
     # ------------------------------------------------------------------
     def _load_config(self) -> Dict[str, Any]:
-        data = self._read_json(self._config_path, {})
+        data = _read_json(self._config_path, {})
         return CONFIG_DEFAULTS | data
 
-    def _load_history(self) -> List[Dict[str, Any]]:
-        return self._read_json(self._history_path, [])
+    def _open_history(self, state_dir: Path) -> "_JsonHistory | _SqliteHistory":
+        json_path = state_dir / "history.json"
+        backend = self.config.get("history_backend", "sqlite")
+        if backend == "json":
+            return _JsonHistory(json_path)
+        if backend != "sqlite":
+            LOGGER.warning(
+                "Backend de histórico desconhecido %r; usando sqlite", backend
+            )
+        db_path = state_dir / "history.db"
+        if self._read_only:
+            if not db_path.exists():
+                # Ainda não migrado (ou sem histórico): não cria o banco só para ler.
+                return _JsonHistory(json_path)
+            return _SqliteHistory(db_path, read_only=True)
+        return _SqliteHistory(db_path, legacy_json=json_path)
+
+
+class _JsonHistory:
+    """Histórico em um único arquivo JSON, regravado por inteiro a cada save.
+
+    ``iter`` filtra em fluxo, mas o arquivo é sempre lido e decodificado por
+    inteiro antes; históricos grandes devem usar o backend SQLite.
+    """
+
+    incremental = False
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    def load(self) -> List[Dict[str, Any]]:
+        return _read_json(self._path, [])
+
+    def iter(
+        self,
+        statuses: Optional[Collection[str]],
+        since: Optional[float],
+        limit: Optional[int],
+        offset: int,
+    ) -> Iterator[Dict[str, Any]]:
+        if since is not None:
+            raise ValueError(
+                "o histórico em JSON não guarda datas; use history_backend sqlite"
+            )
+        rows = (
+            row for row in self.load() if not statuses or row.get("status") in statuses
+        )
+        stop = None if limit is None else offset + limit
+        return itertools.islice(rows, offset, stop)
+
+    def save(self, rows: List[Dict[str, Any]]) -> bool:
+        return _write_json(self._path, rows)
+
+    def close(self) -> None:
+        pass
 
-    def _read_json(self, path: Path, fallback: Any) -> Any:
+
+class _SqliteHistory:
+    """Histórico em SQLite (WAL) gravando apenas as linhas que mudaram.
+
+    Cada download ocupa uma linha indexada por ``gid`` e ``status``; o
+    registro completo fica serializado na coluna ``data``. ``write`` recebe
+    só as linhas alteradas e os GIDs removidos; o upsert não toca linhas
+    cujo ``data`` não mudou, então ``updated_at`` marca a última mudança real.
+    """
+
+    incremental = True
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS downloads (
+        gid TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        added_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS downloads_status ON downloads (status);
+    """
+
+    UPSERT = """
+    INSERT INTO downloads (gid, status, added_at, updated_at, data)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (gid) DO UPDATE SET
+        status = excluded.status,
+        updated_at = excluded.updated_at,
+        data = excluded.data
+    WHERE data IS NOT excluded.data
+    """
+
+    def __init__(
+        self, path: Path, legacy_json: Path | None = None, read_only: bool = False
+    ) -> None:
+        self._path = path
+        if read_only:
+            # Sem PRAGMA, schema nem migração: nenhuma escrita no banco ou no disco.
+            uri = f"{path.resolve().as_uri()}?mode=ro"
+            self._connection = sqlite3.connect(uri, uri=True)
+            return
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+        if legacy_json is not None and legacy_json.exists():
+            self._migrate_json(legacy_json)
+
+    def load(self) -> List[Dict[str, Any]]:
+        return list(self.iter(None, None, None, 0))
+
+    def iter(
+        self,
+        statuses: Optional[Collection[str]],
+        since: Optional[float],
+        limit: Optional[int],
+        offset: int,
+    ) -> Iterator[Dict[str, Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if statuses:
+            statuses = list(statuses)
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # LIMIT -1 = sem limite no SQLite
+        params.extend([-1 if limit is None else limit, offset])
+        cursor = self._connection.execute(
+            f"SELECT gid, data FROM downloads {where} ORDER BY rowid LIMIT ? OFFSET ?",
+            params,
+        )
+        # O cursor busca as linhas sob demanda: memória constante em qualquer tamanho.
+        for gid, data in cursor:
+            try:
+                yield json.loads(data)
+            except ValueError as exc:
+                LOGGER.warning("Registro corrompido %s no histórico: %s", gid, exc)
+
+    def save(self, rows: List[Dict[str, Any]]) -> bool:
+        """Substitui o histórico por ``rows`` (apaga os GIDs que não estão lá)."""
+        current = {row.get("gid") for row in rows}
+        stored = (
+            gid for (gid,) in self._connection.execute("SELECT gid FROM downloads")
+        )
+        return self.write(rows, [gid for gid in stored if gid not in current])
+
+    def write(self, rows: Iterable[Dict[str, Any]], removed: Collection[str]) -> bool:
+        now = time.time()
+        upserts = [
+            (
+                row["gid"],
+                row.get("status", ""),
+                now,
+                now,
+                json.dumps(row, ensure_ascii=False, sort_keys=True),
+            )
+            for row in rows
+            if row.get("gid")
+        ]
         try:
-            if path.exists():
-                with path.open("r", encoding="utf-8") as handle:
-                    return json.load(handle)
-        except (json.JSONDecodeError, OSError) as exc:
-            LOGGER.warning("Falha ao ler %s: %s", path, exc)
-        return fallback
-
-    def _write_json(self, path: Path, payload: Any) -> None:
+            with self._connection:
+                self._connection.executemany(self.UPSERT, upserts)
+                self._connection.executemany(
+                    "DELETE FROM downloads WHERE gid = ?", [(gid,) for gid in removed]
+                )
+        except sqlite3.Error as exc:
+            LOGGER.error("Falha ao gravar %s: %s", self._path, exc)
+            return False
+        return True
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _migrate_json(self, legacy_json: Path) -> None:
+        """Importa um ``history.json`` antigo e o renomeia para não migrar de novo."""
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM downloads").fetchone()
+        if count == 0:
+            rows = _read_json(legacy_json, [])
+            if not self.write([row for row in rows if isinstance(row, dict)], ()):
+                # Mantém o JSON no lugar para tentar de novo na próxima abertura.
+                return
+            LOGGER.info(
+                "Histórico migrado de %s (%d registros)", legacy_json, len(rows)
+            )
         try:
-            with path.open("w", encoding="utf-8") as handle:
-                json.dump(payload, handle, ensure_ascii=False, indent=2)
+            legacy_json.rename(legacy_json.with_name(legacy_json.name + ".migrated"))
         except OSError as exc:
-            LOGGER.error("Falha ao gravar %s: %s", path, exc)
+            LOGGER.warning("Falha ao renomear %s: %s", legacy_json, exc)
+
+
+def _serialize(record: DownloadRecord) -> Dict[str, Any]:
+    data = asdict(record)
+    data["progress"] = round(record.progress, 4)
+    # Convert Path objects to strings for JSON serialization
+    if data.get("destination") and isinstance(data["destination"], Path):
+        data["destination"] = str(data["destination"])
+    return data
+
+
+def _read_json(path: Path, fallback: Any) -> Any:
+    try:
+        if path.exists():
+            with path.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+    except (json.JSONDecodeError, OSError) as exc:
+        LOGGER.warning("Falha ao ler %s: %s", path, exc)
+    return fallback
+
+
+def _write_json(path: Path, payload: Any) -> bool:
+    """Grava de forma atômica: arquivo temporário, fsync e rename por cima do antigo.
+
+    Uma falha no meio da escrita deixa o arquivo anterior intacto (e devolve False).
+    """
+    tmp_name: str | None = None
+    try:
+        fd, tmp_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+        tmp_name = None
+        _fsync_dir(path.parent)
+    except OSError as exc:
+        LOGGER.error("Falha ao gravar %s: %s", path, exc)
+        return False
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+    return True
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Garante que o rename chegou ao disco (sem efeito onde não há suporte)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
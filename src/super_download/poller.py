@@ -0,0 +1,265 @@
+"""Polling de status do aria2 fora da thread principal do GTK."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List
+
+from gi.repository import GLib
+
+from . import metrics, profiling
+from .aria2_client import MULTICALL_CHUNK_SIZE, Aria2Client, Aria2DownloadStatus
+
+LOGGER = logging.getLogger(__name__)
+
+# Campo do DownloadRecord -> novo valor.
+StatusDelta = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class PollSchedule:
+    """Intervalos de polling, em segundos, conforme a situação do download."""
+
+    active: float = 1.0
+    active_hidden: float = 5.0
+    inactive: float = 10.0
+    inactive_hidden: float = 30.0
+
+    def interval_for(
+        self, status: str | None, visible: bool, push_mode: bool
+    ) -> float | None:
+        """Retorna o próximo intervalo, ou ``None`` se não há o que consultar.
+
+        Downloads pausados só mudam por ação explícita (que invalida o GID) e,
+        em modo push, as transições dos demais chegam pelas notificações.
+        Status desconhecido (consulta que falhou ou GID que não voltou) segue
+        no intervalo lento mesmo em modo push, para não ficar órfão.
+        """
+        if status == "active":
+            return self.active if visible else self.active_hidden
+        if status is not None and (status == "paused" or push_mode):
+            return None
+        return self.inactive if visible else self.inactive_hidden
+
+
+class StatusPoller:
+    """Consulta o aria2 numa thread dedicada e entrega apenas os deltas.
+
+    A thread guarda o último status entregue de cada GID e só repassa ao main
+    loop, via ``GLib.idle_add``, os campos que mudaram (um download ativo
+    que não andou recebe um delta vazio). O ``DownloadManager``
+    continua sendo o único dono dos registros: aplica os deltas na thread
+    principal e chama ``invalidate`` quando altera um registro por conta
+    própria, para que o próximo ciclo reenvie o status completo.
+
+    Cada GID tem seu próprio horário de consulta, definido por
+    ``PollSchedule`` a partir do último status visto, da visibilidade da
+    janela e do modo push (notificações do aria2 conectadas). Quando nada
+    está agendado a thread dorme até ser acordada por ``track``,
+    ``invalidate`` ou por uma mudança de modo.
+    """
+
+    MAX_WORKERS = 4
+
+    def __init__(
+        self,
+        client: Aria2Client,
+        schedule: PollSchedule,
+        on_deltas: Callable[[Dict[str, StatusDelta]], None],
+    ) -> None:
+        self._client = client
+        self._schedule = schedule
+        self._on_deltas = on_deltas
+        self._lock = threading.Lock()
+        # GID -> próximo instante (time.monotonic) em que deve ser consultado.
+        self._due: Dict[str, float] = {}
+        self._known: Dict[str, Aria2DownloadStatus] = {}
+        self._push_mode = False
+        self._visible = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS, thread_name_prefix="aria2-rpc"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="aria2-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def track(self, gids: Iterable[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for gid in gids:
+                self._due[gid] = now
+        self._wake.set()
+
+    def untrack(self, gid: str) -> None:
+        with self._lock:
+            self._due.pop(gid, None)
+            self._known.pop(gid, None)
+
+    def invalidate(self, gid: str) -> None:
+        """Esquece o último status visto e agenda uma consulta imediata."""
+        with self._lock:
+            self._known.pop(gid, None)
+            if gid in self._due:
+                self._due[gid] = time.monotonic()
+        self._wake.set()
+
+    def set_push_mode(self, enabled: bool) -> None:
+        """Liga/desliga o modo push; sem notificações, volta a consultar tudo."""
+        with self._lock:
+            self._push_mode = enabled
+        self._reschedule_all()
+
+    def set_visible(self, visible: bool) -> None:
+        """Informa se a janela está visível (polling rápido) ou na bandeja."""
+        with self._lock:
+            if self._visible == visible:
+                return
+            self._visible = visible
+        self._reschedule_all()
+
+    # ------------------------------------------------------------------
+    def poll_once(self) -> None:
+        """Consulta os GIDs cujo horário já chegou e reagenda cada um deles."""
+        now = time.monotonic()
+        with self._lock:
+            gids = [gid for gid, due in self._due.items() if due <= now]
+        if not gids:
+            return
+
+        with metrics.POLL_DURATION.time(), profiling.timed("poll"):
+            self._poll_gids(gids)
+
+    def _poll_gids(self, gids: List[str]) -> None:
+        statuses = self._fetch(gids)
+
+        deltas: Dict[str, StatusDelta] = {}
+        now = time.monotonic()
+        with self._lock:
+            for gid in gids:
+                if gid not in self._due:
+                    continue  # removido enquanto a consulta estava em andamento
+                status = statuses.get(gid)
+                if status is not None:
+                    previous = self._known.get(gid)
+                    delta = _diff_status(previous, status)
+                    if previous is not None and "progress" not in delta:
+                        # Compara sempre com o último progresso entregue:
+                        # avanços abaixo do limiar se acumulam até passar dele.
+                        status = replace(status, progress=previous.progress)
+                    self._known[gid] = status
+                    if delta or status.status == "active":
+                        # Delta vazio de um download ativo: nada andou, mas a
+                        # velocidade suavizada precisa da amostra para cair.
+                        deltas[gid] = delta
+                interval = self._schedule.interval_for(
+                    status.status if status else None, self._visible, self._push_mode
+                )
+                self._due[gid] = now + interval if interval is not None else math.inf
+
+        if deltas:
+            GLib.idle_add(self._deliver, deltas)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            delay = self._next_delay()
+            if delay is None or delay > 0:
+                # Sem nada agendado espera indefinidamente por track/invalidate.
+                self._wake.wait(delay)
+                continue
+            try:
+                self.poll_once()
+            except Exception as exc:  # pragma: no cover - defensive guard
+                LOGGER.exception("Status poll failed: %s", exc)
+
+    def _next_delay(self) -> float | None:
+        with self._lock:
+            next_due = min(self._due.values(), default=math.inf)
+        if next_due == math.inf:
+            return None
+        return max(0.0, next_due - time.monotonic())
+
+    def _reschedule_all(self) -> None:
+        """Reavalia todos os GIDs na próxima volta, com o novo modo em vigor."""
+        now = time.monotonic()
+        with self._lock:
+            for gid in self._due:
+                self._due[gid] = now
+        self._wake.set()
+
+    def _fetch(self, gids: List[str]) -> Dict[str, Aria2DownloadStatus]:
+        """Dispara os blocos de multicall em paralelo e junta os resultados."""
+        chunks = [
+            gids[start : start + MULTICALL_CHUNK_SIZE]
+            for start in range(0, len(gids), MULTICALL_CHUNK_SIZE)
+        ]
+        if len(chunks) == 1 or self._executor is None:
+            return self._safe_fetch(gids)
+
+        statuses: Dict[str, Aria2DownloadStatus] = {}
+        for partial in self._executor.map(self._safe_fetch, chunks):
+            statuses.update(partial)
+        return statuses
+
+    def _safe_fetch(self, gids: List[str]) -> Dict[str, Aria2DownloadStatus]:
+        try:
+            with profiling.timed("safe_fetch"):
+                return self._client.tell_status_many(gids)
+        except Exception as exc:
+            LOGGER.warning("Failed to poll status for %d downloads: %s", len(gids), exc)
+            return {}
+
+    def _deliver(self, deltas: Dict[str, StatusDelta]) -> bool:
+        if not self._stop.is_set():
+            self._on_deltas(deltas)
+        return False
+
+
+def _diff_status(
+    previous: Aria2DownloadStatus | None, current: Aria2DownloadStatus
+) -> StatusDelta:
+    """Traduz a diferença entre dois status do aria2 em campos do DownloadRecord."""
+    delta: StatusDelta = {}
+    if previous is None or previous.status != current.status:
+        delta["status"] = current.status
+    if previous is None or abs(previous.progress - current.progress) > 0.0001:
+        delta["progress"] = current.progress
+    if previous is None or previous.download_speed != current.download_speed:
+        delta["speed"] = current.download_speed
+    if current.file_path and (
+        previous is None or previous.file_path != current.file_path
+    ):
+        delta["destination"] = current.file_path
+    if previous is None or previous.total_length != current.total_length:
+        delta["size"] = current.total_length
+    if previous is None or previous.completed_length != current.completed_length:
+        delta["completed"] = current.completed_length
+    if previous is None or previous.connections != current.connections:
+        delta["connections"] = current.connections
+    return delta
@@ -0,0 +1,137 @@
+"""Cronômetros dos caminhos quentes e captura opcional com cProfile/tracemalloc.
+
+Os cronômetros (``timed``) ficam sempre ligados: cada um guarda as últimas
+``TIMER_CAPACITY`` durações num anel de memória fixa e resume-as em
+percentis, registrados no log pelo ``DownloadManager`` e consultados pelo
+``super-download-cli tempos``. ``Profiler`` só é usado com ``--profile``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import math
+import threading
+import time
+import tracemalloc
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+LOGGER = logging.getLogger(__name__)
+
+# Durações guardadas por cronômetro (8 bytes cada).
+TIMER_CAPACITY = 512
+PERCENTILES = (50, 90, 99)
+# Alocações listadas no resumo texto do tracemalloc.
+TRACEMALLOC_TOP = 50
+
+
+class RollingTimer:
+    """Anel com as durações mais recentes de um trecho de código."""
+
+    def __init__(self, capacity: int = TIMER_CAPACITY) -> None:
+        self._samples = array("d", [0.0]) * capacity
+        self._next = 0
+        self._count = 0
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples[self._next] = seconds
+            self._next = (self._next + 1) % len(self._samples)
+            self._count = min(self._count + 1, len(self._samples))
+            self._total += 1
+
+    def summary(self) -> Dict[str, float]:
+        """Percentis em ms sobre a janela; ``total`` conta todas as chamadas."""
+        with self._lock:
+            ordered = sorted(self._samples[: self._count])
+            total = self._total
+        result: Dict[str, float] = {"count": len(ordered), "total": total}
+        if not ordered:
+            return result
+        for percentile in PERCENTILES:
+            rank = max(0, math.ceil(percentile / 100 * len(ordered)) - 1)
+            result[f"p{percentile}_ms"] = round(ordered[rank] * 1000, 3)
+        result["max_ms"] = round(ordered[-1] * 1000, 3)
+        return result
+
+
+_TIMERS: Dict[str, RollingTimer] = {}
+_TIMERS_LOCK = threading.Lock()
+
+
+def timer(name: str) -> RollingTimer:
+    timer_ = _TIMERS.get(name)
+    if timer_ is None:
+        with _TIMERS_LOCK:
+            timer_ = _TIMERS.setdefault(name, RollingTimer())
+    return timer_
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    recorder = timer(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record(time.perf_counter() - start)
+
+
+def report() -> Dict[str, Dict[str, float]]:
+    """Resumo de todos os cronômetros que já registraram algo."""
+    with _TIMERS_LOCK:
+        timers = sorted(_TIMERS.items())
+    return {name: timer_.summary() for name, timer_ in timers}
+
+
+def log_report(level: int = logging.INFO) -> None:
+    for name, summary in report().items():
+        if not summary["count"]:
+            continue
+        LOGGER.log(
+            level,
+            "Timing %s: p50=%.1fms p90=%.1fms p99=%.1fms max=%.1fms (last %d of %d)",
+            name,
+            summary["p50_ms"],
+            summary["p90_ms"],
+            summary["p99_ms"],
+            summary["max_ms"],
+            summary["count"],
+            summary["total"],
+        )
+
+
+class Profiler:
+    """cProfile (thread do main loop) e tracemalloc durante toda a execução."""
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        tracemalloc.start(25)
+        self._profile.enable()
+
+    def stop(self) -> List[Path]:
+        """Interrompe a captura e grava os arquivos; devolve os caminhos."""
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        stats_path = self._directory / f"profile-{stamp}.pstats"
+        snapshot_path = self._directory / f"memory-{stamp}.tracemalloc"
+        top_path = self._directory / f"memory-{stamp}.txt"
+
+        self._profile.dump_stats(stats_path)
+        snapshot.dump(str(snapshot_path))
+        lines = [str(stat) for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]]
+        top_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return [stats_path, snapshot_path, top_path]
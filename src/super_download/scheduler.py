@@ -0,0 +1,129 @@
+"""Fila de prioridade dos downloads que ainda não foram entregues ao aria2."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+PRIORITY_LOW = -1
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 1
+PRIORITIES = (PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH)
+
+_Entry = Tuple[int, int, str]  # (-prioridade, ordem de chegada, gid)
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+class DownloadScheduler:
+    """Decide quais downloads da fila podem ir para o aria2.
+
+    Cada host tem seu próprio heap ordenado por prioridade e ordem de
+    chegada; ``take_ready`` escolhe o melhor topo entre os hosts que ainda
+    não atingiram ``max_per_host``, até ocupar ``max_active`` vagas. Assim
+    um espelho lento com centenas de itens na fila não bloqueia os outros.
+    As vagas são ocupadas pelo próprio ``take_ready`` (ou por ``occupy``) e
+    liberadas com ``vacate`` quando o download pausa, termina ou sai da lista.
+    """
+
+    def __init__(self, max_active: int = 3, max_per_host: int = 0) -> None:
+        self.max_active = max_active
+        self.max_per_host = max_per_host  # 0 = sem limite por host
+        # Com a fila suspensa (pausar tudo) nada é liberado.
+        self.suspended = False
+        self._queues: Dict[str, List[_Entry]] = {}
+        self._queued: Dict[str, Tuple[str, _Entry]] = {}
+        self._running: Dict[str, str] = {}
+        self._running_per_host: Counter[str] = Counter()
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def __contains__(self, gid: object) -> bool:
+        return gid in self._queued
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def running_gids(self) -> List[str]:
+        return list(self._running)
+
+    # ------------------------------------------------------------------
+    def push(self, gid: str, host: str, priority: int = PRIORITY_NORMAL) -> None:
+        self._enqueue(gid, host, (-priority, next(self._sequence), gid))
+
+    def set_priority(self, gid: str, priority: int) -> bool:
+        """Reordena um item da fila mantendo sua ordem de chegada."""
+        queued = self._queued.get(gid)
+        if queued is None:
+            return False
+        host, (_, sequence, _) = queued
+        self._enqueue(gid, host, (-priority, sequence, gid))
+        return True
+
+    def discard(self, gid: str) -> None:
+        """Tira o GID da fila e libera a vaga que ele ocupava, se houver."""
+        self._queued.pop(gid, None)  # a entrada no heap é descartada ao chegar ao topo
+        self.vacate(gid)
+
+    def occupy(self, gid: str, host: str) -> None:
+        if gid not in self._running:
+            self._running[gid] = host
+            self._running_per_host[host] += 1
+
+    def vacate(self, gid: str) -> bool:
+        host = self._running.pop(gid, None)
+        if host is None:
+            return False
+        self._running_per_host[host] -= 1
+        if not self._running_per_host[host]:
+            del self._running_per_host[host]
+        return True
+
+    def take_ready(self) -> List[str]:
+        """Tira da fila e marca como em execução os GIDs que cabem nas vagas."""
+        ready: List[str] = []
+        if self.suspended:
+            return ready
+        while len(self._running) < self.max_active:
+            best_host = None
+            best_entry: _Entry | None = None
+            for host, heap in self._queues.items():
+                if (
+                    self.max_per_host
+                    and self._running_per_host[host] >= self.max_per_host
+                ):
+                    continue
+                self._prune(heap)
+                if heap and (best_entry is None or heap[0] < best_entry):
+                    best_host, best_entry = host, heap[0]
+            if best_host is None:
+                break
+            heapq.heappop(self._queues[best_host])
+            gid = best_entry[2]
+            del self._queued[gid]
+            self.occupy(gid, best_host)
+            ready.append(gid)
+        for host in [host for host, heap in self._queues.items() if not heap]:
+            del self._queues[host]
+        return ready
+
+    # ------------------------------------------------------------------
+    def _enqueue(self, gid: str, host: str, entry: _Entry) -> None:
+        self._queued[gid] = (host, entry)
+        heapq.heappush(self._queues.setdefault(host, []), entry)
+
+    def _prune(self, heap: List[_Entry]) -> None:
+        """Descarta do topo entradas removidas ou substituídas por ``set_priority``."""
+        while heap:
+            queued = self._queued.get(heap[0][2])
+            if queued is not None and queued[1] == heap[0]:
+                return
+            heapq.heappop(heap)
@@ -0,0 +1,77 @@
+"""Histórico de velocidade por download: velocidade suavizada e ETA."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import List, Optional, Tuple
+
+# Amostras guardadas por download (memória fixa: 16 bytes por amostra).
+DEFAULT_CAPACITY = 32
+# Constante de tempo da média móvel exponencial, em segundos.
+EWMA_TAU_SECONDS = 10.0
+
+
+class SpeedHistory:
+    """Anel de tamanho fixo com amostras ``(instante, bytes baixados)``.
+
+    Os dados ficam em dois ``array`` pré-alocados, então um download ativo
+    ocupa sempre a mesma memória, seja qual for sua duração. A velocidade
+    suavizada é uma média móvel exponencial ponderada pelo intervalo entre
+    amostras, de modo que polls a cada 1 s ou a cada 5 s convergem igual.
+    """
+
+    __slots__ = ("_times", "_bytes", "_next", "_count", "speed")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self._times = array("d", [0.0]) * capacity
+        self._bytes = array("q", [0]) * capacity
+        self._next = 0
+        self._count = 0
+        self.speed = 0.0  # bytes/s suavizados
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, timestamp: float, completed: int) -> None:
+        capacity = len(self._times)
+        if self._count:
+            last = (self._next - 1) % capacity
+            elapsed = timestamp - self._times[last]
+            if elapsed <= 0:
+                return
+            downloaded = completed - self._bytes[last]
+            if downloaded < 0:
+                # O aria2 recomeçou o arquivo; amostras antigas não valem mais.
+                self.clear()
+            else:
+                rate = downloaded / elapsed
+                if self._count == 1 and not self.speed:
+                    self.speed = rate
+                else:
+                    alpha = 1.0 - math.exp(-elapsed / EWMA_TAU_SECONDS)
+                    self.speed += alpha * (rate - self.speed)
+        self._times[self._next] = timestamp
+        self._bytes[self._next] = completed
+        self._next = (self._next + 1) % capacity
+        self._count = min(self._count + 1, capacity)
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+        self.speed = 0.0
+
+    def eta(self, total: int) -> Optional[float]:
+        """Segundos restantes pela velocidade suavizada (``None`` se desconhecido)."""
+        if not self._count or total <= 0 or self.speed <= 0:
+            return None
+        remaining = total - self._bytes[(self._next - 1) % len(self._times)]
+        return max(0.0, remaining / self.speed)
+
+    def samples(self) -> List[Tuple[float, int]]:
+        """Amostras da mais antiga para a mais recente."""
+        capacity = len(self._times)
+        return [
+            (self._times[index % capacity], self._bytes[index % capacity])
+            for index in range(self._next - self._count, self._next)
+        ]
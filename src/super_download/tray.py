@@ -206,7 +206,8 @@ class TrayIndicator:
 
         if method_name == "GetLayout":
             # Build complete menu structure with items
-            # DBusMenu format: (uint revision, (int id, dict properties, variant[] children))
+            # DBusMenu format:
+            # (uint revision, (int id, dict properties, variant[] children))
             revision = 1
             root_id = 0
 
@@ -264,19 +265,23 @@ class TrayIndicator:
             if event_id == "clicked":
                 if item_id == 1:  # Abrir
                     LOGGER.info("Menu: Abrir clicked")
+
                     def activate_app():
                         LOGGER.info("Executing activate")
                         self._app.activate()
                         return False
+
                     GLib.idle_add(activate_app)
                 elif item_id == 3:  # Sair
                     LOGGER.info("Menu: Sair clicked")
+
                     def quit_app():
                         LOGGER.info("Executing quit")
                         quit_action = self._app.lookup_action("quit")
                         if quit_action:
                             quit_action.activate(None)
                         return False
+
                     GLib.idle_add(quit_app)
 
             invocation.return_value(None)
@@ -0,0 +1,100 @@
+"""Escolha de ``split``/``max-connection-per-server`` pela vazão de cada host."""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# Limite do próprio aria2 para max-connection-per-server.
+MAX_CONNECTIONS = 16
+# Conexões usadas num host que ainda não foi medido.
+DEFAULT_CONNECTIONS = 4
+# Mesmo valor padrão do min-split-size do aria2: segmentos menores não compensam.
+MIN_SEGMENT_BYTES = 20 * 1024 * 1024
+# Peso de cada nova amostra nas médias móveis.
+EWMA_ALPHA = 0.2
+# Amostras ativas com uma só conexão (tendo pedido mais) para concluir que o
+# servidor não aceita requisições parciais (Range).
+NO_RANGE_SAMPLES = 5
+
+
+@dataclass
+class HostProfile:
+    """O que já se sabe sobre um servidor."""
+
+    per_connection_speed: float = 0.0  # bytes/s por conexão (média móvel)
+    supports_ranges: Optional[bool] = None
+    single_connection_samples: int = 0
+
+
+class ConnectionTuner:
+    """Aprende a vazão por conexão de cada host e sugere quantas conexões usar.
+
+    A conta é: conexões suficientes para que ``vazão por conexão × conexões``
+    alcance o pico de banda já observado no enlace, mais uma para descobrir se
+    o enlace comporta mais, limitado pelo tamanho do arquivo (no máximo um
+    segmento por ``MIN_SEGMENT_BYTES``) e por ``MAX_CONNECTIONS``. Arquivos
+    pequenos e servidores sem suporte a Range ficam com uma única conexão.
+    """
+
+    def __init__(self) -> None:
+        self._hosts: Dict[str, HostProfile] = {}
+        self._link_peak = 0.0
+
+    def profile(self, host: str) -> HostProfile:
+        return self._hosts.setdefault(host, HostProfile())
+
+    @property
+    def link_peak(self) -> float:
+        return self._link_peak
+
+    # ------------------------------------------------------------------
+    def observe(self, host: str, speed: int, connections: int, requested: int) -> None:
+        """Registra uma amostra de um download ativo do host."""
+        if speed <= 0 or connections <= 0:
+            return
+        profile = self.profile(host)
+        per_connection = speed / connections
+        if profile.per_connection_speed:
+            profile.per_connection_speed += EWMA_ALPHA * (
+                per_connection - profile.per_connection_speed
+            )
+        else:
+            profile.per_connection_speed = per_connection
+        if connections > 1:
+            profile.supports_ranges = True
+            profile.single_connection_samples = 0
+        elif requested > 1 and profile.supports_ranges is None:
+            profile.single_connection_samples += 1
+            if profile.single_connection_samples >= NO_RANGE_SAMPLES:
+                profile.supports_ranges = False
+                LOGGER.info("Host %s does not seem to support ranged requests", host)
+
+    def observe_total(self, total_speed: int) -> None:
+        """Soma das velocidades de todos os downloads num ciclo de atualização."""
+        if total_speed > self._link_peak:
+            self._link_peak = float(total_speed)
+        else:
+            # Decai devagar para acompanhar quedas reais de capacidade.
+            self._link_peak -= EWMA_ALPHA * 0.05 * (self._link_peak - total_speed)
+
+    def connections_for(self, host: str, size: int = 0) -> int:
+        profile = self._hosts.get(host)
+        if profile is not None and profile.supports_ranges is False:
+            return 1
+        if 0 < size < 2 * MIN_SEGMENT_BYTES:
+            return 1
+        wanted = DEFAULT_CONNECTIONS
+        if profile is not None and profile.per_connection_speed and self._link_peak:
+            wanted = math.ceil(self._link_peak / profile.per_connection_speed) + 1
+        if size:
+            wanted = min(wanted, size // MIN_SEGMENT_BYTES)
+        return max(1, min(wanted, MAX_CONNECTIONS))
+
+    def options_for(self, host: str, size: int = 0) -> Dict[str, str]:
+        connections = str(self.connections_for(host, size))
+        return {"split": connections, "max-connection-per-server": connections}
@@ -0,0 +1,68 @@
+"""Modelo GObject que alimenta a lista virtualizada de downloads."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from gi.repository import GObject
+
+from ..models import DownloadRecord
+
+# Campos do DownloadRecord espelhados como propriedades do item.
+ITEM_FIELDS = (
+    "url",
+    "filename",
+    "status",
+    "progress",
+    "speed",
+    "destination",
+    "priority",
+    "avg_speed",
+    "eta",
+)
+
+
+class DownloadItem(GObject.Object):
+    """Um download no ``Gio.ListStore`` da janela principal.
+
+    ``update_from`` só altera as propriedades cujo valor realmente mudou e
+    emite ``changed`` uma única vez com o conjunto desses campos; as linhas
+    visíveis escutam esse sinal em vez de um ``notify`` por propriedade.
+    """
+
+    __gtype_name__ = "SuperDownloadItem"
+    __gsignals__ = {"changed": (GObject.SignalFlags.RUN_FIRST, None, (object,))}
+
+    gid = GObject.Property(type=str, default="")
+    url = GObject.Property(type=str, default="")
+    filename = GObject.Property(type=str, default="")
+    status = GObject.Property(type=str, default="queued")
+    progress = GObject.Property(type=float, default=0.0)
+    speed = GObject.Property(type=GObject.TYPE_INT64, default=0)
+    destination = GObject.Property(type=str, default="")
+    priority = GObject.Property(type=int, default=0)
+    avg_speed = GObject.Property(type=GObject.TYPE_INT64, default=0)
+    eta = GObject.Property(type=int, default=-1)
+
+    def __init__(self, record: DownloadRecord) -> None:
+        super().__init__(gid=record.gid)
+        self.update_from(record)
+
+    def update_from(
+        self, record: DownloadRecord, fields: Iterable[str] = ITEM_FIELDS
+    ) -> None:
+        changed = set()
+        with self.freeze_notify():
+            for name in fields:
+                if name not in ITEM_FIELDS:
+                    continue
+                value = getattr(record, name)
+                if value is None:
+                    value = ""
+                elif name == "destination":
+                    value = str(value)
+                if self.get_property(name) != value:
+                    self.set_property(name, value)
+                    changed.add(name)
+        if changed:
+            self.emit("changed", frozenset(changed))
@@ -2,26 +2,34 @@
 
 from __future__ import annotations
 
-from typing import Iterable, TYPE_CHECKING
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Iterable
 
 import gi
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 
-from gi.repository import Adw, Gio, GLib, Gtk, Pango, Gdk
+from gi.repository import Adw, Gdk, Gio, GLib, GObject, Gtk, Pango
+
+from .. import profiling
+from ..models import DownloadChangeSet
+from ..scheduler import PRIORITIES
+from .download_item import ITEM_FIELDS, DownloadItem
 
 if TYPE_CHECKING:  # pragma: no cover
     from ..app import SuperDownloadApplication
-    from ..download_manager import DownloadManager, DownloadRecord
+    from ..download_manager import DownloadManager
 else:
     SuperDownloadApplication = "SuperDownloadApplication"
     DownloadManager = "DownloadManager"
-    DownloadRecord = "DownloadRecord"
 
 
 _STYLE_PROVIDER: Gtk.CssProvider | None = None
 
+# Rótulos do seletor de prioridade, na ordem de ``PRIORITIES``.
+_PRIORITY_LABELS = ("Baixa", "Normal", "Alta")
+
 
 def _ensure_styles_loaded() -> None:
     """Register lightweight CSS tweaks shared across window widgets."""
@@ -37,6 +45,10 @@ def _ensure_styles_loaded() -> None:
         padding-right: 12px;
     }
 
+    .super-download-list {
+        background: transparent;
+    }
+
     .super-download-row {
         padding: 12px;
         border-radius: 14px;
@@ -70,16 +82,24 @@ class MainWindow(Adw.ApplicationWindow):
         self.set_icon_name("br.com.superdownload")
 
         _ensure_styles_loaded()
-        self._download_rows: dict[str, Gtk.ListBoxRow] = {}
+        # Modelo da lista: a ListView só cria widgets para as linhas visíveis.
+        self._store = Gio.ListStore.new(DownloadItem)
+        self._items: dict[str, DownloadItem] = {}
+        # Alterações recebidas do manager e ainda não aplicadas ao modelo;
+        # são aplicadas no máximo uma vez por frame e nunca com a janela oculta.
+        self._pending_changes = DownloadChangeSet()
+        self._tick_id = 0
         self._new_download_dialog: Adw.MessageDialog | None = None
 
         # Conectar handler para interceptar o fechamento da janela
         self.connect("close-request", self._on_close_request)
+        # Polling rápido só enquanto a janela está visível (não na bandeja)
+        self.connect("notify::visible", self._on_visibility_changed)
 
         self._build_ui()
 
-        # Inscreve-se para atualizações automáticas da fila
-        app.download_manager.subscribe(self._on_queue_change)
+        # Inscreve-se para receber apenas o que mudou na fila
+        app.download_manager.subscribe_changes(self._on_queue_change)
 
     # ------------------------------------------------------------------
     @classmethod
@@ -138,10 +158,14 @@ class MainWindow(Adw.ApplicationWindow):
         scroller.set_margin_end(12)
         scroller.set_margin_bottom(12)
 
-        self._list_box = Gtk.ListBox()
-        self._list_box.set_selection_mode(Gtk.SelectionMode.NONE)
-        self._list_box.add_css_class("boxed-list")
-        scroller.set_child(self._list_box)
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_row_setup)
+        factory.connect("bind", self._on_row_bind)
+        factory.connect("unbind", self._on_row_unbind)
+
+        self._list_view = Gtk.ListView.new(Gtk.NoSelection.new(self._store), factory)
+        self._list_view.add_css_class("super-download-list")
+        scroller.set_child(self._list_view)
 
         self._info_label = Gtk.Label(label="Nenhum download no momento.")
         self._info_label.add_css_class("dim-label")
@@ -172,7 +196,12 @@ class MainWindow(Adw.ApplicationWindow):
 
     def refresh_queue(self) -> None:
         manager: DownloadManager = self.get_application().download_manager  # type: ignore[assignment]
-        self._on_queue_change(manager.snapshot())
+        self._pending_changes = DownloadChangeSet()
+        self._items = {
+            record.gid: DownloadItem(record) for record in manager.snapshot()
+        }
+        self._store.splice(0, self._store.get_n_items(), list(self._items.values()))
+        self._update_empty_state()
 
     def ask_quit_confirmation(self) -> None:
         dialog = Adw.MessageDialog.new(
@@ -188,159 +217,102 @@ class MainWindow(Adw.ApplicationWindow):
         dialog.present()
 
     # ------------------------------------------------------------------
-    def _update_rows(self, records: Iterable[DownloadRecord]) -> None:
-        seen = set()
-        for record in records:
-            row = self._download_rows.get(record.gid)
-            if row is None:
-                row = self._create_row(record)
-                self._download_rows[record.gid] = row
-                self._list_box.append(row)
-            self._update_row_content(row, record)
-            seen.add(record.gid)
-
-        # Remove rows no longer present
-        for gid in list(self._download_rows.keys()):
-            if gid not in seen:
-                row = self._download_rows.pop(gid)
-                self._list_box.remove(row)
-
-    def _create_row(self, record: DownloadRecord) -> Gtk.ListBoxRow:
-        row = Gtk.ListBoxRow()
-        row.set_selectable(False)
-        row.set_activatable(False)
-        row.set_margin_top(4)
-        row.set_margin_bottom(4)
-
-        main_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
-        main_box.add_css_class("super-download-row")
-        main_box.add_css_class("card")
-        main_box.set_margin_start(12)
-        main_box.set_margin_end(12)
-        main_box.set_margin_top(8)
-        main_box.set_margin_bottom(8)
-        main_box.set_hexpand(True)
-        row.set_child(main_box)
-
-        icon_image = Gtk.Image.new_from_gicon(self._icon_for_record(record))
-        icon_image.set_pixel_size(48)
-        icon_image.set_valign(Gtk.Align.CENTER)
-        main_box.append(icon_image)
-
-        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
-        info_box.set_hexpand(True)
-        main_box.append(info_box)
-
-        name_label = Gtk.Label(xalign=0)
-        name_label.set_ellipsize(Pango.EllipsizeMode.END)
-        name_label.add_css_class("title-4")
-        info_box.append(name_label)
-
-        status_label = Gtk.Label(xalign=0)
-        status_label.add_css_class("dim-label")
-        status_label.set_wrap(True)
-        info_box.append(status_label)
-
-        progress = Gtk.ProgressBar()
-        progress.set_hexpand(True)
-        progress.set_show_text(False)
-        info_box.append(progress)
-
-        action_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
-        action_box.set_valign(Gtk.Align.CENTER)
-        main_box.append(action_box)
-
-        pause_button = Gtk.Button(icon_name="media-playback-pause-symbolic")
-        pause_button.set_tooltip_text("Pausar")
-        pause_button.connect("clicked", self._on_pause_clicked, record.gid)
-
-        resume_button = Gtk.Button(icon_name="media-playback-start-symbolic")
-        resume_button.set_tooltip_text("Retomar")
-        resume_button.connect("clicked", self._on_resume_clicked, record.gid)
-
-        cancel_button = Gtk.Button(icon_name="process-stop-symbolic")
-        cancel_button.set_tooltip_text("Cancelar download")
-        cancel_button.connect("clicked", self._on_cancel_clicked, record.gid)
+    def _on_row_setup(
+        self, _factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem
+    ) -> None:
+        list_item.set_activatable(False)
+        list_item.set_child(DownloadRow(self._on_row_action, self._on_row_priority))
+
+    def _on_row_bind(
+        self, _factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem
+    ) -> None:
+        list_item.get_child().bind(list_item.get_item())
+
+    def _on_row_unbind(
+        self, _factory: Gtk.SignalListItemFactory, list_item: Gtk.ListItem
+    ) -> None:
+        list_item.get_child().unbind()
+
+    def _on_row_action(self, action: str, gid: str) -> None:
+        manager: DownloadManager = self.get_application().download_manager  # type: ignore[assignment]
+        if action == "pause":
+            manager.pause(gid)
+        elif action == "resume":
+            manager.resume(gid)
+        elif action == "cancel":
+            # Cancela download no aria2 e remove da lista
+            manager.cancel(gid)
+        elif action == "remove":
+            # Remove download da lista sem cancelar (apenas limpa a lista)
+            manager.remove(gid)
+        elif action == "open":
+            self._open_folder(gid)
+
+    def _on_row_priority(self, gid: str, priority: int) -> None:
+        manager: DownloadManager = self.get_application().download_manager  # type: ignore[assignment]
+        manager.set_priority(gid, priority)
 
-        open_button = Gtk.Button(icon_name="folder-open-symbolic")
-        open_button.set_tooltip_text("Abrir pasta")
-        open_button.connect("clicked", self._on_open_folder, record.gid)
+    # ------------------------------------------------------------------
+    def _on_queue_change(self, changes: DownloadChangeSet) -> None:
+        self._pending_changes.merge(changes)
+        self._schedule_frame_update()
 
-        remove_button = Gtk.Button(icon_name="user-trash-symbolic")
-        remove_button.set_tooltip_text("Remover da lista")
-        remove_button.connect("clicked", self._on_remove_clicked, record.gid)
-        remove_button.add_css_class("destructive-action")
+    def _schedule_frame_update(self) -> None:
+        if self._tick_id or not self._pending_changes or not self.get_visible():
+            return
+        self._tick_id = self.add_tick_callback(self._on_frame_tick)
 
-        for button in (pause_button, resume_button, cancel_button, open_button, remove_button):
-            button.set_valign(Gtk.Align.CENTER)
-            action_box.append(button)
+    def _on_frame_tick(self, _widget: Gtk.Widget, _frame_clock: Gdk.FrameClock) -> bool:
+        self._tick_id = 0
+        changes, self._pending_changes = self._pending_changes, DownloadChangeSet()
+        self._apply_changes(changes)
+        return GLib.SOURCE_REMOVE
 
-        row.icon_image = icon_image  # type: ignore[attr-defined]
-        row.name_label = name_label  # type: ignore[attr-defined]
-        row.status_label = status_label  # type: ignore[attr-defined]
-        row.progress_bar = progress  # type: ignore[attr-defined]
-        row.pause_button = pause_button  # type: ignore[attr-defined]
-        row.resume_button = resume_button  # type: ignore[attr-defined]
-        row.cancel_button = cancel_button  # type: ignore[attr-defined]
-        row.open_button = open_button  # type: ignore[attr-defined]
-        row.remove_button = remove_button  # type: ignore[attr-defined]
-        return row
-
-    def _icon_for_record(self, record: DownloadRecord) -> Gio.Icon:
-        """Infer an icon representing the download target."""
-        source = record.destination or record.filename or record.url
-        if source:
-            try:
-                source_str = str(source)
-                content_type, _ = Gio.content_type_guess(source_str, None)
-            except (TypeError, ValueError):
-                content_type = None
-            if content_type:
-                icon = Gio.content_type_get_icon(content_type)
-                if icon is not None:
-                    return icon
-        return Gio.ThemedIcon.new("text-x-generic")
-
-    def _update_row_content(self, row: Gtk.ListBoxRow, record: DownloadRecord) -> None:
-        row.name_label.set_label(record.filename or record.url)  # type: ignore[attr-defined]
-
-        status_label = row.status_label  # type: ignore[attr-defined]
-        status_parts = [
-            record.status.replace("_", " ").title(),
-            f"{record.progress * 100:.0f}%",
-        ]
-        if record.speed:
-            status_parts.append(f"{record.speed / 1024:.0f} KiB/s")
-        status_label.set_label(" | ".join(status_parts))
-
-        row.icon_image.set_from_gicon(self._icon_for_record(record))  # type: ignore[attr-defined]
-
-        progress_bar = row.progress_bar  # type: ignore[attr-defined]
-        progress_bar.set_fraction(record.progress)
-        progress_bar.set_text(f"{record.progress * 100:.0f}%")
-
-        # Mostrar/ocultar botões baseado no status
-        is_active = record.status in {"active", "waiting", "queued"}
-        is_paused = record.status == "paused"
-        is_complete = record.status == "complete"
-        is_error = record.status == "error"
-        can_cancel = is_active or is_paused
-
-        row.pause_button.set_visible(is_active)  # type: ignore[attr-defined]
-        row.resume_button.set_visible(is_paused)  # type: ignore[attr-defined]
-        row.cancel_button.set_visible(can_cancel)  # type: ignore[attr-defined]
-        row.open_button.set_visible(is_complete)  # type: ignore[attr-defined]
-        # Botão remover sempre visível para downloads completos/cancelados/com erro
-        row.remove_button.set_visible(is_complete or is_error or record.status == "removed")  # type: ignore[attr-defined]
+    def _apply_changes(self, changes: DownloadChangeSet) -> None:
+        with profiling.timed("update_rows"):
+            self._update_rows(changes)
 
-    # ------------------------------------------------------------------
-    def _on_queue_change(self, records: Iterable[DownloadRecord]) -> None:
-        list_records = list(records)
-        self._update_rows(list_records)
-        if len(list_records) == 0:
-            self._stack.set_visible_child_name("empty")
-        else:
+    def _update_rows(self, changes: DownloadChangeSet) -> None:
+        manager: DownloadManager = self.get_application().download_manager  # type: ignore[assignment]
+        if changes.removed:
+            # O store segue a ordem de ``self._items`` (splice no fim ao
+            # adicionar), então as posições saem de uma única passada.
+            positions = [
+                position
+                for position, gid in enumerate(self._items)
+                if gid in changes.removed
+            ]
+            for gid in changes.removed:
+                self._items.pop(gid, None)
+            # Cada trecho contíguo sai num splice, do fim para o início
+            for start, count in reversed(_contiguous_runs(positions)):
+                self._store.splice(start, count, [])
+
+        new_items = []
+        for gid, record in changes.added.items():
+            item = self._items.get(gid)
+            if item is None:
+                item = DownloadItem(record)
+                self._items[gid] = item
+                new_items.append(item)
+            else:
+                item.update_from(record)
+        if new_items:
+            # Uma única emissão de items-changed para o lote inteiro
+            self._store.splice(self._store.get_n_items(), 0, new_items)
+
+        for gid, fields in changes.updated.items():
+            item = self._items.get(gid)
+            record = manager.get(gid)
+            if item is not None and record is not None:
+                item.update_from(record, fields)
+        self._update_empty_state()
+
+    def _update_empty_state(self) -> None:
+        if self._store.get_n_items():
             self._stack.set_visible_child_name("list")
+        else:
+            self._stack.set_visible_child_name("empty")
 
     def _on_add_url(self, entry: Gtk.SearchEntry) -> None:
         text = entry.get_text().strip()
@@ -348,7 +320,9 @@ class MainWindow(Adw.ApplicationWindow):
             return
         urls = [part for part in text.split() if self._looks_like_url(part)]
         if not urls:
-            entry.set_icon_from_icon_name(Gtk.EntryIconPosition.SECONDARY, "dialog-error-symbolic")
+            entry.set_icon_from_icon_name(
+                Gtk.EntryIconPosition.SECONDARY, "dialog-error-symbolic"
+            )
             return
         entry.set_text("")
         entry.set_icon_from_icon_name(Gtk.EntryIconPosition.SECONDARY, None)
@@ -402,6 +376,7 @@ class MainWindow(Adw.ApplicationWindow):
                 dlg.destroy()
 
         entry.connect("activate", lambda *_: dialog.response("add"))
+
         def on_changed(_entry: Gtk.Entry) -> None:
             if entry.has_css_class("error"):
                 entry.remove_css_class("error")
@@ -421,27 +396,10 @@ class MainWindow(Adw.ApplicationWindow):
 
         GLib.idle_add(focus_entry)
 
-    def _on_pause_clicked(self, _button: Gtk.Button, gid: str) -> None:
-        self.get_application().download_manager.pause(gid)  # type: ignore[attr-defined]
-
-    def _on_resume_clicked(self, _button: Gtk.Button, gid: str) -> None:
-        self.get_application().download_manager.resume(gid)  # type: ignore[attr-defined]
-
-    def _on_cancel_clicked(self, _button: Gtk.Button, gid: str) -> None:
-        """Cancela download no aria2 e remove da lista."""
-        self.get_application().download_manager.cancel(gid)  # type: ignore[attr-defined]
-
-    def _on_remove_clicked(self, _button: Gtk.Button, gid: str) -> None:
-        """Remove download da lista sem cancelar (apenas limpa a lista)."""
-        self.get_application().download_manager.remove(gid)  # type: ignore[attr-defined]
-
-    def _on_open_folder(self, _button: Gtk.Button, gid: str) -> None:
+    def _open_folder(self, gid: str) -> None:
         from pathlib import Path
 
-        record = next(
-            (item for item in self.get_application().download_manager.snapshot() if item.gid == gid),  # type: ignore[attr-defined]
-            None,
-        )
+        record = self.get_application().download_manager.get(gid)  # type: ignore[attr-defined]
         if not record or not record.destination:
             return
 
@@ -469,6 +427,18 @@ class MainWindow(Adw.ApplicationWindow):
             app.quit()
         dialog.destroy()
 
+    def _on_visibility_changed(
+        self, _window: Gtk.Window, _pspec: GObject.ParamSpec
+    ) -> None:
+        app: SuperDownloadApplication = self.get_application()  # type: ignore[assignment]
+        app.download_manager.set_ui_visible(self.get_visible())
+        if self.get_visible():
+            # Aplica o que acumulou enquanto a janela estava na bandeja
+            self._schedule_frame_update()
+        elif self._tick_id:
+            self.remove_tick_callback(self._tick_id)
+            self._tick_id = 0
+
     def _on_close_request(self, _window: Gtk.Window) -> bool:
         """Intercepta o fechamento da janela.
 
@@ -486,3 +456,277 @@ class MainWindow(Adw.ApplicationWindow):
     @staticmethod
     def _looks_like_url(candidate: str) -> bool:
         return candidate.startswith(("http://", "https://", "ftp://", "sftp://"))
+
+
+class DownloadRow(Gtk.Box):
+    """Widget de uma linha, reaproveitado pela ListView entre itens.
+
+    ``bind`` associa a linha a um ``DownloadItem`` e passa a escutar seu
+    sinal ``changed``; cada lote de campos alterados atualiza uma vez só os
+    widgets que dependem deles, e só quando o valor exibido realmente muda (cada setter
+    GTK pode disparar um novo layout).
+    """
+
+    def __init__(
+        self,
+        on_action: Callable[[str, str], None],
+        on_priority: Callable[[str, int], None],
+    ) -> None:
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        self._on_action = on_action
+        self._on_priority = on_priority
+        self._item: DownloadItem | None = None
+        self._changed_id = 0
+        # Último valor aplicado a cada widget, para pular setters redundantes.
+        self._shown: dict[str, object] = {}
+
+        self.add_css_class("super-download-row")
+        self.add_css_class("card")
+        self.set_margin_start(12)
+        self.set_margin_end(12)
+        self.set_margin_top(8)
+        self.set_margin_bottom(8)
+        self.set_hexpand(True)
+
+        self.icon_image = Gtk.Image()
+        self.icon_image.set_pixel_size(48)
+        self.icon_image.set_valign(Gtk.Align.CENTER)
+        self.append(self.icon_image)
+
+        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        info_box.set_hexpand(True)
+        self.append(info_box)
+
+        self.name_label = Gtk.Label(xalign=0)
+        self.name_label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.name_label.add_css_class("title-4")
+        info_box.append(self.name_label)
+
+        self.status_label = Gtk.Label(xalign=0)
+        self.status_label.add_css_class("dim-label")
+        self.status_label.set_wrap(True)
+        info_box.append(self.status_label)
+
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_hexpand(True)
+        self.progress_bar.set_show_text(False)
+        info_box.append(self.progress_bar)
+
+        action_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        action_box.set_valign(Gtk.Align.CENTER)
+        self.append(action_box)
+
+        self.priority_dropdown = Gtk.DropDown.new_from_strings(list(_PRIORITY_LABELS))
+        self.priority_dropdown.set_tooltip_text("Prioridade")
+        self.priority_dropdown.set_valign(Gtk.Align.CENTER)
+        self.priority_dropdown.connect("notify::selected", self._on_priority_selected)
+        action_box.append(self.priority_dropdown)
+
+        self.pause_button = self._action_button(
+            "media-playback-pause-symbolic", "Pausar", "pause"
+        )
+        self.resume_button = self._action_button(
+            "media-playback-start-symbolic", "Retomar", "resume"
+        )
+        self.cancel_button = self._action_button(
+            "process-stop-symbolic", "Cancelar download", "cancel"
+        )
+        self.open_button = self._action_button(
+            "folder-open-symbolic", "Abrir pasta", "open"
+        )
+        self.remove_button = self._action_button(
+            "user-trash-symbolic", "Remover da lista", "remove"
+        )
+        self.remove_button.add_css_class("destructive-action")
+
+        for button in (
+            self.pause_button,
+            self.resume_button,
+            self.cancel_button,
+            self.open_button,
+            self.remove_button,
+        ):
+            action_box.append(button)
+
+    def _action_button(self, icon_name: str, tooltip: str, action: str) -> Gtk.Button:
+        button = Gtk.Button(icon_name=icon_name)
+        button.set_tooltip_text(tooltip)
+        button.set_valign(Gtk.Align.CENTER)
+        button.connect("clicked", self._on_button_clicked, action)
+        return button
+
+    # ------------------------------------------------------------------
+    def bind(self, item: DownloadItem) -> None:
+        self._item = item
+        self._changed_id = item.connect("changed", self._on_item_changed)
+        self._refresh(ITEM_FIELDS)
+
+    def unbind(self) -> None:
+        if self._item is not None and self._changed_id:
+            self._item.disconnect(self._changed_id)
+        self._item = None
+        self._changed_id = 0
+
+    def _on_button_clicked(self, _button: Gtk.Button, action: str) -> None:
+        if self._item is not None:
+            self._on_action(action, self._item.gid)
+
+    def _on_priority_selected(
+        self, dropdown: Gtk.DropDown, _pspec: GObject.ParamSpec
+    ) -> None:
+        index = dropdown.get_selected()
+        if self._item is None or not 0 <= index < len(PRIORITIES):
+            return
+        # Mudanças vindas do próprio item (bind/notify) não voltam ao manager.
+        if PRIORITIES[index] != self._item.priority:
+            self._on_priority(self._item.gid, PRIORITIES[index])
+
+    def _on_item_changed(self, _item: DownloadItem, fields: frozenset) -> None:
+        self._refresh(fields)
+
+    def _refresh(self, fields: Iterable[str]) -> None:
+        item = self._item
+        if item is None:
+            return
+        fields = set(fields)
+
+        if fields & {"filename", "url"}:
+            self._show("name", item.filename or item.url, self.name_label.set_label)
+
+        if fields & {"filename", "destination", "url"}:
+            icon = _ICON_CACHE.lookup(item.destination or item.filename or item.url)
+            self._show("icon", icon, self.icon_image.set_from_gicon)
+
+        if fields & {"status", "progress", "speed", "avg_speed", "eta"}:
+            status_parts = [
+                item.status.replace("_", " ").title(),
+                f"{item.progress * 100:.0f}%",
+            ]
+            # A velocidade suavizada não oscila a cada poll; a instantânea
+            # fica para quando ainda não há histórico.
+            speed = item.avg_speed or item.speed
+            if speed:
+                status_parts.append(f"{speed / 1024:.0f} KiB/s")
+            if item.eta >= 0:
+                status_parts.append(_format_eta(item.eta))
+            self._show("status", " | ".join(status_parts), self.status_label.set_label)
+
+        if "progress" in fields:
+            # Variações abaixo de 0,1% não mudam nenhum pixel da barra
+            self._show(
+                "fraction", round(item.progress, 3), self.progress_bar.set_fraction
+            )
+            self._show(
+                "percent", f"{item.progress * 100:.0f}%", self.progress_bar.set_text
+            )
+
+        if "priority" in fields and item.priority in PRIORITIES:
+            self._show(
+                "priority",
+                PRIORITIES.index(item.priority),
+                self.priority_dropdown.set_selected,
+            )
+
+        if "status" in fields:
+            # Mostrar/ocultar botões baseado no status
+            is_active = item.status in {"active", "waiting", "queued"}
+            is_paused = item.status == "paused"
+            is_complete = item.status == "complete"
+            is_error = item.status == "error"
+            can_cancel = is_active or is_paused
+
+            self._show("pause", is_active, self.pause_button.set_visible)
+            self._show("resume", is_paused, self.resume_button.set_visible)
+            self._show("cancel", can_cancel, self.cancel_button.set_visible)
+            self._show("open", is_complete, self.open_button.set_visible)
+            self._show(
+                "priority_visible", can_cancel, self.priority_dropdown.set_visible
+            )
+            # Botão remover sempre visível para downloads completos/cancelados/com erro
+            self._show(
+                "remove",
+                is_complete or is_error or item.status == "removed",
+                self.remove_button.set_visible,
+            )
+
+    def _show(self, key: str, value: object, setter: Callable[[object], None]) -> None:
+        if key in self._shown and self._shown[key] == value:
+            return
+        self._shown[key] = value
+        setter(value)
+
+
+def _contiguous_runs(positions: list[int]) -> list[tuple[int, int]]:
+    """Agrupa posições crescentes em ``(início, quantidade)`` contíguos."""
+    runs: list[tuple[int, int]] = []
+    for position in positions:
+        if runs and runs[-1][0] + runs[-1][1] == position:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((position, 1))
+    return runs
+
+
+def _format_eta(seconds: int) -> str:
+    if seconds < 60:
+        return f"{seconds} s restantes"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s restantes"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min restantes"
+
+
+class _IconCache:
+    """Resolve ícones por extensão com despejo LRU.
+
+    ``Gio.content_type_guess`` só depende do nome do arquivo, então o
+    resultado é memorizado por extensão (limitado a ``max_entries``); os
+    ícones em si são compartilhados por tipo de conteúdo, de modo que
+    linhas do mesmo tipo reutilizam o mesmo ``Gio.Icon``.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self._max_entries = max_entries
+        self._by_extension: OrderedDict[str, Gio.Icon] = OrderedDict()
+        self._by_content_type: dict[str, Gio.Icon] = {}
+        self._fallback = Gio.ThemedIcon.new("text-x-generic")
+
+    def lookup(self, source: str) -> Gio.Icon:
+        key = _extension_key(source)
+        icon = self._by_extension.get(key)
+        if icon is not None:
+            self._by_extension.move_to_end(key)
+            return icon
+
+        icon = self._resolve(source)
+        self._by_extension[key] = icon
+        if len(self._by_extension) > self._max_entries:
+            self._by_extension.popitem(last=False)
+        return icon
+
+    def _resolve(self, source: str) -> Gio.Icon:
+        """Infer an icon representing the download target."""
+        if not source:
+            return self._fallback
+        try:
+            content_type, _ = Gio.content_type_guess(source, None)
+        except (TypeError, ValueError):
+            content_type = None
+        if not content_type:
+            return self._fallback
+        icon = self._by_content_type.get(content_type)
+        if icon is None:
+            icon = Gio.content_type_get_icon(content_type) or self._fallback
+            self._by_content_type[content_type] = icon
+        return icon
+
+
+def _extension_key(source: str) -> str:
+    """Chave do cache: a extensão ou, sem extensão, o próprio nome do arquivo."""
+    name = source.rsplit("/", 1)[-1].lower()
+    base, dot, extension = name.rpartition(".")
+    return f".{extension}" if dot and base else name
+
+
+_ICON_CACHE = _IconCache()
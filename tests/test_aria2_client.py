@@ -0,0 +1,96 @@
+import http.client
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from fake_aria2 import FakeAria2, FakeAria2Server  # noqa: E402
+
+from super_download import aria2_client  # noqa: E402
+from super_download.aria2_client import (  # noqa: E402
+    Aria2Client,
+    Aria2RpcError,
+    _JsonRpcTransport,
+)
+
+
+class _FakeConnection:
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = 0
+
+    def request(self, *_args, **_kwargs):
+        self.requests += 1
+        if self.error is not None:
+            raise self.error
+
+    def getresponse(self):
+        class _Response:
+            @staticmethod
+            def read():
+                return json.dumps({"id": 1, "result": "OK"}).encode()
+
+        return _Response()
+
+    def close(self):
+        pass
+
+
+def _transport(monkeypatch, pooled, fresh):
+    transport = _JsonRpcTransport("http://localhost", 6800, None)
+    for connection in pooled:
+        transport._pool.put_nowait(connection)
+    monkeypatch.setattr(transport, "_connection_class", lambda *_args, **_kwargs: fresh)
+    return transport
+
+
+def test_stale_pooled_connection_is_retried_on_a_new_one(monkeypatch):
+    stale = _FakeConnection(http.client.RemoteDisconnected("closed"))
+    fresh = _FakeConnection()
+    transport = _transport(monkeypatch, [stale], fresh)
+
+    assert transport.call("aria2.addUri", [["https://exemplo.com/a"]]) == "OK"
+    assert (stale.requests, fresh.requests) == (1, 1)
+
+
+def test_timeouts_and_fresh_connection_errors_are_not_retried(monkeypatch):
+    # A requisição pode ter chegado ao aria2: repetir um addUri duplicaria o GID.
+    slow = _FakeConnection(TimeoutError("timed out"))
+    fresh = _FakeConnection()
+    transport = _transport(monkeypatch, [slow], fresh)
+    with pytest.raises(Aria2RpcError, match="timed out"):
+        transport.call("aria2.addUri", [["https://exemplo.com/a"]])
+    assert fresh.requests == 0
+
+    refused = _FakeConnection(ConnectionResetError("reset"))
+    transport = _transport(monkeypatch, [], refused)
+    with pytest.raises(Aria2RpcError, match="reset"):
+        transport.call("aria2.getVersion")
+    assert refused.requests == 1
+
+
+def test_control_calls_use_the_raw_transport_without_aria2p(monkeypatch):
+    monkeypatch.setattr(
+        aria2_client, "_import_aria2p", lambda: pytest.fail("aria2p imported")
+    )
+    state = FakeAria2()
+    server = FakeAria2Server(state).start()
+    client = Aria2Client(port=server.port)
+    try:
+        (gid,) = state.seed(1)
+        assert client.pause(gid)
+        assert state.downloads[gid].paused
+        assert client.resume_all()
+        assert not state.downloads[gid].paused
+        assert client.pause_all()
+        assert client.resume(gid)
+        assert not state.downloads[gid].paused
+        assert client.remove(gid)
+        assert state.downloads[gid].removed
+        assert not client.pause("0000000000000000")
+    finally:
+        client.close()
+        server.stop()
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from super_download.bandwidth import BandwidthSchedule
+
+
+def test_schedule_limits_business_hours_and_crosses_midnight():
+    schedule = BandwidthSchedule.from_config(
+        {
+            "max_global_speed": "5M",
+            "bandwidth_schedule": [
+                {
+                    "start": "09:00",
+                    "end": "18:00",
+                    "limit": "2M",
+                    "days": [0, 1, 2, 3, 4],
+                },
+                {"start": "23:00", "end": "06:00", "limit": 0, "days": [4]},
+                {"start": "25:00", "end": "06:00", "limit": 1},  # inválida
+            ],
+        }
+    )
+
+    assert len(schedule.rules) == 2
+    assert schedule.limit_at(datetime(2024, 5, 6, 10, 30)) == "2M"  # segunda
+    assert schedule.limit_at(datetime(2024, 5, 6, 18, 0)) == "5M"
+    assert schedule.limit_at(datetime(2024, 5, 11, 10, 30)) == "5M"  # sábado
+    assert schedule.limit_at(datetime(2024, 5, 10, 23, 30)) == "0"  # sexta à noite
+    assert schedule.limit_at(datetime(2024, 5, 11, 2, 0)) == "0"  # madrugada de sábado
+    assert schedule.limit_at(datetime(2024, 5, 12, 2, 0)) == "5M"
+
+
+def test_empty_schedule_uses_max_global_speed():
+    schedule = BandwidthSchedule.from_config({"max_global_speed": 0})
+
+    assert not schedule
+    assert schedule.limit_at(datetime(2024, 5, 6, 12, 0)) == "0"
@@ -0,0 +1,50 @@
+import json
+
+from super_download import cli
+from super_download.models import DownloadRecord
+from super_download.persistence import PersistenceStore
+
+
+def test_listar_streams_filtered_pages(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    store = PersistenceStore()
+    store.save_downloads(
+        DownloadRecord(
+            gid=f"{index:016x}",
+            url=f"https://exemplo.com/{index}.iso",
+            filename=f"{index}.iso",
+            status="complete" if index % 3 else "paused",
+        )
+        for index in range(30)
+    )
+    store.close()
+
+    assert (
+        cli.main(
+            [
+                "listar",
+                "--status",
+                "complete",
+                "--offset",
+                "2",
+                "--limit",
+                "3",
+                "--json",
+            ]
+        )
+        == 0
+    )
+    entries = json.loads(capsys.readouterr().out)
+    assert [entry["filename"] for entry in entries] == ["4.iso", "5.iso", "7.iso"]
+
+    assert (
+        cli.main(
+            ["listar", "--status", "paused,error", "--since", "1h", "--limit", "2"]
+        )
+        == 0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 and all("paused" in line for line in lines)
+
+    assert cli.main(["listar", "--status", "active"]) == 0
+    assert "Nenhum download" in capsys.readouterr().out
@@ -0,0 +1,27 @@
+from super_download.concurrency import ConcurrencyController
+
+
+def _run_window(controller, speed, saturated=True):
+    result = None
+    for _ in range(controller.window):
+        result = controller.sample(speed, saturated)
+    return result
+
+
+def test_hill_climbs_while_throughput_improves_then_backs_off():
+    controller = ConcurrencyController(minimum=2, maximum=6, initial=3, window=2)
+
+    assert _run_window(controller, 3000) == 4  # primeira janela: explora para cima
+    assert _run_window(controller, 4000) == 5  # melhorou: continua subindo
+    assert _run_window(controller, 4050) == 4  # ganho abaixo da tolerância: volta
+    assert _run_window(controller, 3000) == 5  # piorou: inverte de novo
+
+
+def test_respects_bounds_and_ignores_unsaturated_periods():
+    controller = ConcurrencyController(minimum=1, maximum=2, initial=2, window=1)
+
+    assert controller.sample(1000, saturated=True) == 1  # no teto: desce
+    assert controller.sample(500, saturated=True) == 2  # piorou: sobe
+
+    assert controller.sample(9999, saturated=False) is None
+    assert controller.limit == 2
@@ -0,0 +1,48 @@
+from super_download.control import ControlService
+from super_download.models import DownloadChangeSet, DownloadRecord
+
+
+class _Manager:
+    def __init__(self, records):
+        self.records = {record.gid: record for record in records}
+
+    def get(self, gid):
+        return self.records.get(gid)
+
+
+def test_watch_only_sends_live_downloads_and_drops_finished_ones():
+    active = DownloadRecord(
+        gid="a", url="https://exemplo.com/a", filename="a", status="active"
+    )
+    done = DownloadRecord(
+        gid="b", url="https://exemplo.com/b", filename="b", status="complete"
+    )
+    manager = _Manager([active, done])
+    service = ControlService(manager)
+    shown = set()
+
+    initial = DownloadChangeSet()
+    initial.record_added(active)
+    initial.record_added(done)
+    update = service._serialize_changes(initial, frozenset(), shown)
+    assert [entry["gid"] for entry in update["changed"]] == ["a"]
+
+    active.progress = 0.5
+    progress = DownloadChangeSet()
+    progress.record_updated("a", {"progress"})
+    assert service._serialize_changes(progress, frozenset(), shown)["changed"] == [
+        {"gid": "a", "progress": 0.5}
+    ]
+
+    active.status = "complete"
+    finished = DownloadChangeSet()
+    finished.record_updated("a", {"status"})
+    assert service._serialize_changes(finished, frozenset(), shown) == {
+        "changed": [],
+        "removed": ["a"],
+    }
+    assert shown == set()
+
+    # Com --status complete o mesmo download volta, agora com o registro inteiro.
+    entered = service._serialize_changes(finished, frozenset({"complete"}), shown)
+    assert entered["changed"][0]["filename"] == "a"
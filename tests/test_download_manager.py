@@ -0,0 +1,271 @@
+import functools
+import sys
+import types
+from pathlib import Path
+
+import pytest
+from gi.repository import GLib
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from fake_aria2 import CURVES, FakeAria2, FakeAria2Server  # noqa: E402
+
+from super_download import download_manager  # noqa: E402
+from super_download.aria2_client import Aria2Client  # noqa: E402
+from super_download.persistence import PersistenceStore  # noqa: E402
+from super_download.poller import PollSchedule  # noqa: E402
+
+
+def _drain_main_loop():
+    context = GLib.MainContext.default()
+    while context.pending():
+        context.iteration(False)
+
+
+@pytest.fixture
+def aria2(monkeypatch):
+    state = FakeAria2(duration=100.0, size=1000)
+    server = FakeAria2Server(state).start()
+    monkeypatch.setattr(
+        download_manager,
+        "Aria2Client",
+        functools.partial(Aria2Client, port=server.port),
+    )
+    yield state
+    server.stop()
+
+
+@pytest.fixture
+def make_manager(tmp_path, monkeypatch):
+    # Os ciclos de polling são disparados pelo teste, não pela thread do poller.
+    monkeypatch.setattr(download_manager.StatusPoller, "start", lambda self: None)
+    managers = []
+
+    def make(**config):
+        store = PersistenceStore(tmp_path / "state")
+        store.save_config({"default_path": str(tmp_path / "downloads"), **config})
+        manager = download_manager.DownloadManager(store)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def _poll(manager):
+    manager._poller.poll_once()
+    _drain_main_loop()
+
+
+def test_resume_all_respects_caps_and_refreshes_status(aria2, make_manager):
+    manager = make_manager(max_concurrent=2, max_per_host=0)
+    manager.enqueue_urls([f"https://cdn.example/{index}.iso" for index in range(4)])
+    _poll(manager)
+    assert sorted(record.status for record in manager.snapshot()) == [
+        "active",
+        "active",
+        "queued",
+        "queued",
+    ]
+
+    manager.pause_all()
+    _poll(manager)
+    assert {record.status for record in manager.live_records()} == {"paused"}
+
+    manager.resume_all()
+    _poll(manager)
+    # Só as duas vagas andam; os pausados esperam a vez na fila do scheduler.
+    assert sorted(record.status for record in manager.snapshot()) == [
+        "active",
+        "active",
+        "paused",
+        "paused",
+    ]
+    assert sum(not download.paused for download in aria2.downloads.values()) == 2
+    assert manager.has_active_downloads
+
+    for record in manager.snapshot():
+        if record.status == "active":
+            manager.cancel(record.gid)
+    _poll(manager)
+    assert [record.status for record in manager.snapshot()] == ["active", "active"]
+
+
+def test_mixed_host_batch_gets_its_own_split_and_names(
+    aria2, make_manager, monkeypatch
+):
+    manager = make_manager(max_concurrent=10, max_per_host=0)
+    jobs = []
+    original = manager._client.add_uris
+
+    def add_uris(batch):
+        batch = list(batch)
+        jobs.extend(batch)
+        return original(batch)
+
+    monkeypatch.setattr(manager._client, "add_uris", add_uris)
+    monkeypatch.setattr(
+        manager._tuner,
+        "options_for",
+        lambda host, size: {"split": "8" if host == "fast.example" else "2"},
+    )
+    manager.enqueue_urls(
+        [
+            "https://fast.example/a.iso",
+            "https://slow.example/b.iso",
+            "https://slow.example/b.iso",
+        ]
+    )
+
+    by_url = {}
+    for url, options in jobs:
+        by_url.setdefault(url, []).append(options)
+    assert by_url["https://fast.example/a.iso"][0]["split"] == "8"
+    assert [options.get("out") for options in by_url["https://slow.example/b.iso"]] == [
+        None,
+        "b(1).iso",
+    ]
+    requested = {
+        manager.get(options["gid"]).url: manager._requested_connections[options["gid"]]
+        for _, options in jobs
+    }
+    assert requested == {
+        "https://fast.example/a.iso": 8,
+        "https://slow.example/b.iso": 2,
+    }
+
+
+def test_failed_poll_in_push_mode_is_retried(aria2, make_manager, monkeypatch):
+    manager = make_manager()
+    manager._poller._schedule = PollSchedule(inactive=0.0, inactive_hidden=0.0)
+    manager.enqueue_urls(["https://cdn.example/a.iso"])
+    manager._poller.set_push_mode(True)
+    client = manager._client
+    original = client.tell_status_many
+    monkeypatch.setattr(
+        client, "tell_status_many", lambda gids: (_ for _ in ()).throw(OSError("boom"))
+    )
+    _poll(manager)
+    (gid,) = manager._poller._due
+
+    monkeypatch.setattr(client, "tell_status_many", original)
+    _poll(manager)
+    assert manager.get(gid).status == "active"
+
+
+def test_stalled_download_keeps_decaying_its_smoothed_speed(
+    aria2, make_manager, monkeypatch
+):
+    aria2.curve = CURVES["stall"]
+    clock = types.SimpleNamespace(monotonic=lambda: aria2.clock)
+    monkeypatch.setattr(download_manager, "time", clock)
+    manager = make_manager()
+    manager._poller._schedule = PollSchedule(active=0.0, active_hidden=0.0)
+    manager.enqueue_urls(["https://cdn.example/a.iso"])
+    (gid,) = [record.gid for record in manager.snapshot()]
+    for _ in range(4):
+        aria2.advance(10.0)
+        _poll(manager)
+
+    # Platô do meio da curva: o aria2 não reporta mais nenhuma mudança.
+    speeds = []
+    for _ in range(3):
+        aria2.advance(5.0)
+        _poll(manager)
+        speeds.append(manager.get(gid).avg_speed)
+    assert manager.get(gid).progress == pytest.approx(0.4)
+    assert speeds[0] > speeds[1] > speeds[2] > 0
+
+
+def test_slow_large_download_samples_real_byte_counts(aria2, make_manager, monkeypatch):
+    # 50 GiB a 2 MiB/s: o progresso anda ~0,0002 por poll de 5 s.
+    aria2.size = 50 * 1024**3
+    aria2.duration = aria2.size / (2 * 1024**2)
+    clock = types.SimpleNamespace(monotonic=lambda: aria2.clock)
+    monkeypatch.setattr(download_manager, "time", clock)
+    manager = make_manager()
+    manager._poller._schedule = PollSchedule(active=0.0, active_hidden=0.0)
+    manager.enqueue_urls(["https://cdn.example/huge.iso"])
+    (gid,) = [record.gid for record in manager.snapshot()]
+    for _ in range(6):
+        aria2.advance(5.0)
+        _poll(manager)
+
+    record = manager.get(gid)
+    assert record.completed == pytest.approx(30 * 2 * 1024**2, rel=1e-6)
+    assert record.avg_speed == pytest.approx(2 * 1024**2, rel=0.01)
+    assert record.eta > 0
+
+
+def test_downloads_lost_by_a_restarted_aria2_free_their_slots(aria2, make_manager):
+    manager = make_manager(max_concurrent=1, max_per_host=0)
+    manager.enqueue_urls(["https://cdn.example/a.iso", "https://other.example/b.iso"])
+    manager.shutdown()
+    # aria2c reiniciado sem arquivo de sessão: nenhum GID antigo existe mais.
+    aria2.downloads.clear()
+
+    manager = make_manager(max_concurrent=1, max_per_host=0)
+    statuses = {record.url: record.status for record in manager.snapshot()}
+    assert statuses == {
+        "https://cdn.example/a.iso": "error",
+        "https://other.example/b.iso": "waiting",
+    }
+
+
+def test_resume_leaves_a_queued_download_in_the_scheduler(aria2, make_manager):
+    manager = make_manager(max_concurrent=1, max_per_host=0)
+    manager.enqueue_urls(["https://cdn.example/a.iso", "https://cdn.example/b.iso"])
+    queued = next(record for record in manager.snapshot() if record.status == "queued")
+
+    manager.resume(queued.gid)
+
+    assert manager.get(queued.gid).status == "queued"
+    assert queued.gid not in aria2.downloads
+
+
+def test_pause_all_keeps_queued_downloads_paused_across_restarts(aria2, make_manager):
+    manager = make_manager(max_concurrent=1, max_per_host=0)
+    manager.enqueue_urls(["https://cdn.example/a.iso", "https://cdn.example/b.iso"])
+    manager.pause_all()
+    assert [record.status for record in manager.snapshot()] == ["paused", "paused"]
+    manager.shutdown()
+
+    manager = make_manager(max_concurrent=1, max_per_host=0)
+    assert [record.status for record in manager.snapshot()] == ["paused", "paused"]
+    assert all(download.paused for download in aria2.downloads.values())
+
+    manager.resume_all()
+    _poll(manager)
+    assert sorted(record.status for record in manager.snapshot()) == [
+        "active",
+        "paused",
+    ]
+
+
+def test_progress_ticks_are_coalesced_into_one_write(aria2, make_manager, monkeypatch):
+    manager = make_manager(flush_interval_seconds=10)
+    manager.enqueue_urls(["https://cdn.example/a.iso"])
+    (gid,) = [record.gid for record in manager.snapshot()]
+    writes = []
+    original = manager._persistence.save_changes
+
+    def save_changes(downloads, changes):
+        writes.append({**changes.updated})
+        return original(downloads, changes)
+
+    monkeypatch.setattr(manager._persistence, "save_changes", save_changes)
+    for completed in (100, 200, 300):
+        manager._apply_deltas({gid: {"completed": completed, "speed": completed}})
+    assert writes == []
+
+    # Mudar o intervalo reagenda a gravação pendente em vez de esperar o antigo.
+    pending = manager._persist_id
+    config = {**manager._persistence.config, "flush_interval_seconds": 2}
+    manager._persistence.save_config(config)
+    assert manager._flush_interval == 2
+    assert manager._persist_id not in (0, pending)
+
+    manager._on_persist_timeout()
+    assert len(writes) == 1
+    assert {"completed", "speed"} <= writes[0][gid]
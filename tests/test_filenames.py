@@ -0,0 +1,31 @@
+from super_download.filenames import FilenameAllocator
+
+
+def test_same_name_in_one_batch_gets_distinct_suffixes(tmp_path):
+    (tmp_path / "arquivo.zip").write_text("x")
+    (tmp_path / "arquivo(2).zip").write_text("x")
+    allocator = FilenameAllocator()
+
+    names = [allocator.allocate(str(tmp_path), "arquivo.zip") for _ in range(4)]
+
+    assert names == [
+        "arquivo(1).zip",
+        "arquivo(3).zip",
+        "arquivo(4).zip",
+        "arquivo(5).zip",
+    ]
+    assert allocator.allocate(str(tmp_path), "outro") == "outro"
+    assert allocator.allocate(str(tmp_path), "outro") == "outro(1)"
+
+
+def test_released_name_is_reused_only_if_missing_on_disk(tmp_path):
+    allocator = FilenameAllocator()
+    directory = str(tmp_path)
+
+    assert allocator.allocate(directory, "a.iso") == "a.iso"
+    allocator.release(directory, "a.iso")
+    assert allocator.allocate(directory, "a.iso") == "a.iso"
+
+    (tmp_path / "a.iso").write_text("x")  # criado depois da listagem
+    allocator.release(directory, "a.iso")
+    assert allocator.allocate(directory, "a.iso") == "a(1).iso"
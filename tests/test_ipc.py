@@ -0,0 +1,134 @@
+import io
+import os
+import socket
+import stat
+import tempfile
+
+import pytest
+
+from super_download import cli
+from super_download.ipc import IpcClient, IpcError, IpcServer, instance_running
+
+
+@pytest.fixture
+def runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_cli_streams_urls_in_batches(runtime_dir, capsys):
+    batches = []
+
+    def handler(command, payload):
+        assert command == "add"
+        batches.append(payload["urls"])
+        return {"received": len(payload["urls"]), "added": len(payload["urls"])}
+
+    server = IpcServer(handler)
+    assert server.start()
+    try:
+        urls = [f"https://example.com/{index}.iso" for index in range(7)]
+        stream = io.StringIO("# lista\n" + "\n".join(urls) + "\n\n")
+        assert cli._cmd_adicionar(stream, batch_size=3) == 0
+    finally:
+        server.stop()
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert sum(batches, []) == urls
+    assert "7 de 7" in capsys.readouterr().out
+    assert not (runtime_dir / "superdownload.sock").exists()
+
+
+def test_handler_errors_are_returned_and_stale_socket_is_replaced(runtime_dir):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(runtime_dir / "superdownload.sock"))
+    stale.close()  # arquivo fica para trás sem ninguém escutando
+
+    def handler(command, payload):
+        raise ValueError(f"comando desconhecido: {command}")
+
+    assert not instance_running()
+    server = IpcServer(handler)
+    assert server.start()
+    try:
+        assert instance_running()
+        with IpcClient() as client:
+            with pytest.raises(IpcError, match="desconhecido: status"):
+                client.request("status")
+        assert not IpcServer(handler).start()
+    finally:
+        server.stop()
+
+    assert not instance_running()
+    with pytest.raises(IpcError):
+        IpcClient()
+
+
+def test_generator_results_are_streamed_line_by_line(runtime_dir, capsys):
+    closed = []
+
+    def updates():
+        try:
+            yield {
+                "changed": [
+                    {
+                        "gid": "0123456789abcdef",
+                        "status": "active",
+                        "progress": 0.5,
+                        "speed": 2048,
+                        "filename": "a.iso",
+                    }
+                ],
+                "removed": [],
+            }
+            yield {
+                "changed": [{"gid": "0123456789abcdef", "progress": 0.75}],
+                "removed": [],
+            }
+            raise ValueError("encerrando")
+        finally:
+            closed.append(True)
+
+    def handler(command, payload):
+        if command == "watch":
+            assert payload == {"interval": 0.5}
+            return updates()
+        assert command == "pause" and payload == {"gids": ["0123"], "all": False}
+        return {"gids": ["0123456789abcdef"]}
+
+    server = IpcServer(handler)
+    assert server.start()
+    try:
+        with IpcClient() as client:
+            stream = client.stream("watch", interval=0.5)
+            assert next(stream)["changed"][0]["status"] == "active"
+            assert next(stream)["changed"][0]["progress"] == 0.75
+            with pytest.raises(IpcError, match="encerrando"):
+                next(stream)
+        assert closed == [True]
+
+        assert cli.main(["pausar", "0123"]) == 0
+        assert "0123456789abcdef" in capsys.readouterr().out
+    finally:
+        server.stop()
+
+
+def test_fallback_socket_dir_must_be_private(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    directory = tmp_path / f"superdownload-{os.getuid()}"
+    directory.mkdir(mode=0o755)
+    directory.chmod(0o755)  # pré-criado aberto, como faria outro usuário
+
+    server = IpcServer(lambda command, payload: None)
+    with pytest.raises(PermissionError):
+        server.start()
+    with pytest.raises(IpcError, match="outros usuários"):
+        IpcClient()
+
+    directory.chmod(0o700)
+    assert server.start()
+    try:
+        assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+    finally:
+        server.stop()
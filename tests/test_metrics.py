@@ -0,0 +1,71 @@
+import urllib.request
+
+from super_download.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+def test_text_exposition_of_counters_gauges_and_histograms():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("bytes_total", "Bytes."))
+    gauge = registry.register(
+        Gauge(
+            "downloads",
+            "By status.",
+            labelnames=("status",),
+            collect=lambda: {("active",): 2},
+        )
+    )
+    histogram = registry.register(
+        Histogram("rpc_seconds", "Latency.", labelnames=("method",), buckets=(0.1, 1.0))
+    )
+
+    counter.inc(1024)
+    gauge.set(1, "paused")
+    histogram.observe(0.05, "aria2.tellStatus")
+    histogram.observe(0.5, "aria2.tellStatus")
+    histogram.observe(5, "aria2.tellStatus")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE bytes_total counter" in lines
+    assert "bytes_total 1024" in lines
+    assert 'downloads{status="active"} 2' in lines
+    assert 'downloads{status="paused"} 1' in lines
+    assert 'rpc_seconds_bucket{method="aria2.tellStatus",le="0.1"} 1' in lines
+    assert 'rpc_seconds_bucket{method="aria2.tellStatus",le="1"} 2' in lines
+    assert 'rpc_seconds_bucket{method="aria2.tellStatus",le="+Inf"} 3' in lines
+    assert 'rpc_seconds_sum{method="aria2.tellStatus"} 5.55' in lines
+    assert 'rpc_seconds_count{method="aria2.tellStatus"} 3' in lines
+
+
+def test_server_exposes_registry_on_localhost():
+    registry = MetricsRegistry()
+    registry.register(Counter("hits_total", "Hits.")).inc()
+    server = MetricsServer(0, registry=registry)
+    server.start()
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{server.port}/metrics", timeout=5
+        ) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "hits_total 1" in resp.read().decode()
+    finally:
+        server.stop()
+
+
+def test_gauge_collectors_are_summed_and_can_be_removed():
+    gauge = Gauge("downloads", "By status.", labelnames=("status",))
+    first = lambda: {("active",): 2}  # noqa: E731
+    gauge.add_collector(first)
+    gauge.add_collector(lambda: {("active",): 1, ("paused",): 4})
+    assert gauge.render()[2:] == [
+        'downloads{status="active"} 3',
+        'downloads{status="paused"} 4',
+    ]
+
+    gauge.remove_collector(first)
+    assert 'downloads{status="active"} 1' in gauge.render()
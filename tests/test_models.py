@@ -0,0 +1,61 @@
+from super_download.models import DownloadChangeSet, DownloadRecord
+
+
+def _record(gid):
+    return DownloadRecord(gid=gid, url=f"https://example.com/{gid}", filename=gid)
+
+
+def test_updated_then_removed_keeps_only_the_removal():
+    changes = DownloadChangeSet()
+    changes.record_updated("g1", {"progress"})
+    changes.record_removed("g1")
+
+    assert changes.updated == {}
+    assert changes.removed == {"g1"}
+
+
+def test_added_then_updated_stays_a_single_addition():
+    changes = DownloadChangeSet()
+    record = _record("g1")
+    changes.record_added(record)
+    changes.record_updated("g1", {"status"})
+
+    assert changes.added == {"g1": record}
+    assert changes.updated == {}
+
+
+def test_added_then_removed_in_the_same_cycle_vanishes():
+    changes = DownloadChangeSet()
+    changes.record_added(_record("g1"))
+    changes.record_removed("g1")
+
+    assert not changes
+
+
+def test_merge_unions_updated_fields_and_applies_newer_removals():
+    older = DownloadChangeSet()
+    older.record_updated("g1", {"progress"})
+    older.record_updated("g2", {"speed"})
+    newer = DownloadChangeSet()
+    newer.record_updated("g1", {"status", "speed"})
+    newer.record_removed("g2")
+
+    older.merge(newer)
+
+    assert older.updated == {"g1": {"progress", "status", "speed"}}
+    assert older.removed == {"g2"}
+
+
+def test_merge_of_a_readded_download_drops_the_earlier_removal():
+    older = DownloadChangeSet()
+    older.record_removed("g1")
+    newer = DownloadChangeSet()
+    record = _record("g1")
+    newer.record_added(record)
+    newer.record_updated("g1", {"progress"})
+
+    older.merge(newer)
+
+    assert older.added == {"g1": record}
+    assert older.removed == set()
+    assert older.updated == {}
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import queue
+import socket
+import threading
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+pytest.importorskip("websocket")
+
+from super_download.notifications import Aria2NotificationListener
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeAria2WebSocket:
+    """Servidor WebSocket mínimo que imita as notificações do aria2."""
+
+    def __init__(self) -> None:
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        self._outbox: "queue.Queue[bytes | None]" = queue.Queue()
+        self.accepted = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/jsonrpc"
+
+    def notify(self, method: str, gid: str) -> None:
+        message = {"jsonrpc": "2.0", "method": method, "params": [{"gid": gid}]}
+        self._outbox.put(json.dumps(message).encode("utf-8"))
+
+    def drop_connection(self) -> None:
+        self._outbox.put(None)
+
+    def close(self) -> None:
+        self._server.close()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                self._handshake(conn)
+                self.accepted.set()
+                while (payload := self._outbox.get()) is not None:
+                    # Frames do servidor não são mascarados; payloads curtos.
+                    conn.sendall(bytes([0x81, len(payload)]) + payload)
+                conn.sendall(bytes([0x88, 0]))
+
+    @staticmethod
+    def _handshake(conn: socket.socket) -> None:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += conn.recv(4096)
+        headers = dict(
+            line.split(": ", 1)
+            for line in request.decode("latin-1").split("\r\n")[1:]
+            if ": " in line
+        )
+        key = headers["Sec-WebSocket-Key"] + _WS_GUID
+        accept = base64.b64encode(hashlib.sha1(key.encode()).digest()).decode()
+        conn.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode("latin-1")
+        )
+
+
+def test_listener_reports_status_transitions() -> None:
+    server = FakeAria2WebSocket()
+    events: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+    states: List[bool] = []
+    listener = Aria2NotificationListener(
+        server.url, lambda gid, delta: events.put((gid, delta)), states.append
+    )
+    listener.start()
+    try:
+        assert server.accepted.wait(5)
+        server.notify("aria2.onDownloadComplete", "0000000000000001")
+        server.notify("aria2.onDownloadError", "0000000000000002")
+
+        assert events.get(timeout=5) == (
+            "0000000000000001",
+            {"status": "complete", "progress": 1.0},
+        )
+        assert events.get(timeout=5) == ("0000000000000002", {"status": "error"})
+        assert listener.connected
+    finally:
+        listener.stop()
+        server.close()
+
+
+def test_listener_signals_disconnect_and_reconnects() -> None:
+    server = FakeAria2WebSocket()
+    states: "queue.Queue[bool]" = queue.Queue()
+    listener = Aria2NotificationListener(server.url, lambda *_: None, states.put)
+    listener.RECONNECT_DELAY_SECONDS = 0.05
+    listener.start()
+    try:
+        assert states.get(timeout=5) is True
+        server.accepted.clear()
+        server.drop_connection()
+        assert states.get(timeout=5) is False
+        assert server.accepted.wait(5)
+        assert states.get(timeout=5) is True
+    finally:
+        listener.stop()
+        server.close()
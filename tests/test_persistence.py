@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import json
+import sqlite3
 from pathlib import Path
 
-from super_download.models import DownloadRecord
+from super_download import persistence
+from super_download.models import DownloadChangeSet, DownloadRecord
 from super_download.persistence import CONFIG_DEFAULTS, PersistenceStore
 
 
@@ -37,3 +40,145 @@ def test_config_defaults_are_merged(tmp_path: Path) -> None:
         assert key in reloaded.config
         if key not in custom:
             assert reloaded.config[key] == value
+
+
+def test_sqlite_history_only_rewrites_changed_rows(tmp_path: Path, monkeypatch) -> None:
+    store = PersistenceStore(base_dir=tmp_path)
+    first = DownloadRecord(gid="a", url="https://exemplo.com/a", filename="a")
+    second = DownloadRecord(gid="b", url="https://exemplo.com/b", filename="b")
+
+    monkeypatch.setattr(persistence.time, "time", lambda: 1000.0)
+    store.save_downloads([first, second])
+
+    second.progress = 0.5
+    monkeypatch.setattr(persistence.time, "time", lambda: 2000.0)
+    store.save_downloads([first, second])
+    store.close()
+
+    with sqlite3.connect(tmp_path / "history.db") as connection:
+        updated = dict(connection.execute("SELECT gid, updated_at FROM downloads"))
+    assert updated == {"a": 1000.0, "b": 2000.0}
+
+
+def test_history_json_is_migrated_to_sqlite(tmp_path: Path) -> None:
+    legacy = [{"gid": "old", "url": "https://exemplo.com/x", "status": "complete"}]
+    (tmp_path / "history.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    store = PersistenceStore(base_dir=tmp_path)
+
+    assert [entry["gid"] for entry in store.history] == ["old"]
+    assert not (tmp_path / "history.json").exists()
+    assert (tmp_path / "history.json.migrated").exists()
+    assert [entry["gid"] for entry in PersistenceStore(base_dir=tmp_path).history] == [
+        "old"
+    ]
+
+
+def test_failed_json_write_keeps_previous_file(tmp_path: Path, monkeypatch) -> None:
+    store = PersistenceStore(base_dir=tmp_path)
+    store.save_config({"theme": "dark"})
+    notified = []
+    store.add_config_listener(notified.append)
+
+    def broken_dump(*_args, **_kwargs) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(persistence.json, "dump", broken_dump)
+    assert not store.save_config({"theme": "light"})
+    monkeypatch.undo()
+
+    # O que não foi gravado também não passa a valer em memória.
+    assert store.config["theme"] == "dark"
+    assert notified == []
+    assert PersistenceStore(base_dir=tmp_path).config["theme"] == "dark"
+    assert [path.name for path in tmp_path.glob("*.tmp")] == []
+
+
+def test_iter_history_filters_and_paginates_without_loading(
+    tmp_path: Path, monkeypatch
+) -> None:
+    store = PersistenceStore(base_dir=tmp_path)
+    records = [
+        DownloadRecord(
+            gid=f"g{index}",
+            url=f"https://exemplo.com/{index}",
+            filename=str(index),
+            status="complete" if index % 2 else "error",
+        )
+        for index in range(10)
+    ]
+    monkeypatch.setattr(persistence.time, "time", lambda: 1000.0)
+    store.save_downloads(records[:6])
+    monkeypatch.setattr(persistence.time, "time", lambda: 2000.0)
+    store.save_downloads(records)
+    store.close()
+
+    reader = PersistenceStore(base_dir=tmp_path)
+    complete = reader.iter_history(statuses={"complete"}, limit=2, offset=1)
+    assert [entry["gid"] for entry in complete] == ["g3", "g5"]
+    recent = reader.iter_history(since=1500.0)
+    assert [entry["gid"] for entry in recent] == ["g6", "g7", "g8", "g9"]
+    assert reader._loaded_history is None
+
+
+def test_save_changes_writes_only_the_changed_rows(tmp_path: Path, monkeypatch) -> None:
+    store = PersistenceStore(base_dir=tmp_path)
+    downloads = {
+        gid: DownloadRecord(gid=gid, url=f"https://exemplo.com/{gid}", filename=gid)
+        for gid in ("a", "b", "c")
+    }
+    monkeypatch.setattr(persistence.time, "time", lambda: 1000.0)
+    assert store.save_downloads(downloads.values())
+
+    serialized = []
+    original = persistence._serialize
+
+    def spy(record: DownloadRecord) -> dict:
+        serialized.append(record.gid)
+        return original(record)
+
+    monkeypatch.setattr(persistence, "_serialize", spy)
+    downloads["b"].progress = 0.5
+    changes = DownloadChangeSet()
+    changes.record_updated("b", {"progress"})
+    changes.record_removed("c")
+    del downloads["c"]
+    monkeypatch.setattr(persistence.time, "time", lambda: 2000.0)
+    assert store.save_changes(downloads, changes)
+    store.close()
+
+    assert serialized == ["b"]
+    with sqlite3.connect(tmp_path / "history.db") as connection:
+        updated = dict(connection.execute("SELECT gid, updated_at FROM downloads"))
+    assert updated == {"a": 1000.0, "b": 2000.0}
+
+
+def test_failed_migration_keeps_history_json(tmp_path: Path, monkeypatch) -> None:
+    legacy = [{"gid": "old", "url": "https://exemplo.com/x", "status": "complete"}]
+    (tmp_path / "history.json").write_text(json.dumps(legacy), encoding="utf-8")
+    monkeypatch.setattr(
+        persistence._SqliteHistory, "UPSERT", "INSERT INTO nada VALUES (?)"
+    )
+
+    PersistenceStore(base_dir=tmp_path).close()
+
+    assert (tmp_path / "history.json").exists()
+    assert not (tmp_path / "history.json.migrated").exists()
+
+
+def test_read_only_store_neither_migrates_nor_writes(tmp_path: Path) -> None:
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([{"gid": "g1", "status": "complete"}]))
+
+    store = PersistenceStore(base_dir=tmp_path, read_only=True)
+    assert [row["gid"] for row in store.iter_history()] == ["g1"]
+    store.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["history.json"]
+
+    PersistenceStore(base_dir=tmp_path).close()  # migra
+    database = (tmp_path / "history.db").read_bytes()
+    store = PersistenceStore(base_dir=tmp_path, read_only=True)
+    assert [row["gid"] for row in store.iter_history(statuses={"complete"})] == ["g1"]
+    assert not store.save_downloads([])
+    store.close()
+    assert (tmp_path / "history.db").read_bytes() == database
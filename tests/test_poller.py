@@ -0,0 +1,73 @@
+from super_download import poller
+from super_download.aria2_client import Aria2DownloadStatus
+from super_download.poller import PollSchedule, StatusPoller
+
+
+def test_schedule_parks_paused_and_push_driven_downloads():
+    schedule = PollSchedule()
+
+    assert schedule.interval_for("active", visible=True, push_mode=True) == 1.0
+    assert schedule.interval_for("active", visible=False, push_mode=False) == 5.0
+    assert schedule.interval_for("waiting", visible=True, push_mode=False) == 10.0
+    assert schedule.interval_for("paused", visible=True, push_mode=False) is None
+    assert schedule.interval_for("waiting", visible=True, push_mode=True) is None
+
+
+def test_unknown_status_keeps_slow_polling_in_push_mode():
+    # Uma consulta que falhou não pode tirar o GID do agendamento.
+    schedule = PollSchedule()
+
+    assert schedule.interval_for(None, visible=True, push_mode=True) == 10.0
+    assert schedule.interval_for(None, visible=False, push_mode=True) == 30.0
+    assert schedule.interval_for(None, visible=True, push_mode=False) == 10.0
+
+
+def test_stalled_active_download_still_gets_an_empty_delta(monkeypatch):
+    status = Aria2DownloadStatus("g1", "active", 0.5, 0, "/tmp/a.iso", 1000, 1)
+
+    class _Client:
+        @staticmethod
+        def tell_status_many(gids):
+            return {gid: status for gid in gids}
+
+    delivered = []
+    monkeypatch.setattr(poller.GLib, "idle_add", lambda func, *args: func(*args))
+    status_poller = StatusPoller(
+        _Client(), PollSchedule(active_hidden=0.0), delivered.append
+    )
+    status_poller.track(["g1"])
+    status_poller.poll_once()
+    status_poller.poll_once()
+
+    assert delivered[0]["g1"]["progress"] == 0.5
+    # Nada mudou, mas o manager precisa da amostra para a média de velocidade cair.
+    assert delivered[1] == {"g1": {}}
+
+
+def test_small_progress_steps_accumulate_until_delivered(monkeypatch):
+    # 50 GiB a 2 MiB/s: cada poll anda menos que o limiar de progresso.
+    progress = iter([0.1, 0.10004, 0.10008, 0.10012])
+
+    class _Client:
+        @staticmethod
+        def tell_status_many(gids):
+            value = next(progress)
+            return {
+                gid: Aria2DownloadStatus("g1", "active", value, 0, "") for gid in gids
+            }
+
+    delivered = []
+    monkeypatch.setattr(poller.GLib, "idle_add", lambda func, *args: func(*args))
+    status_poller = StatusPoller(
+        _Client(), PollSchedule(active_hidden=0.0), delivered.append
+    )
+    status_poller.track(["g1"])
+    for _ in range(4):
+        status_poller.poll_once()
+
+    assert [delta["g1"].get("progress") for delta in delivered] == [
+        0.1,
+        None,
+        None,
+        0.10012,
+    ]
@@ -0,0 +1,32 @@
+import pstats
+
+from super_download.profiling import Profiler, RollingTimer
+
+
+def test_rolling_timer_reports_percentiles_over_recent_window():
+    timer = RollingTimer(capacity=100)
+    assert timer.summary() == {"count": 0, "total": 0}
+
+    for _ in range(50):
+        timer.record(10.0)  # amostras antigas saem do anel
+    for ms in range(1, 101):
+        timer.record(ms / 1000)
+
+    summary = timer.summary()
+    assert summary["count"] == 100
+    assert summary["total"] == 150
+    assert summary["p50_ms"] == 50.0
+    assert summary["p90_ms"] == 90.0
+    assert summary["p99_ms"] == 99.0
+    assert summary["max_ms"] == 100.0
+
+
+def test_profiler_dumps_cprofile_and_tracemalloc(tmp_path):
+    profiler = Profiler(tmp_path / "profile")
+    profiler.start()
+    sorted(str(n) for n in range(1000))
+    paths = profiler.stop()
+
+    assert {path.suffix for path in paths} == {".pstats", ".tracemalloc", ".txt"}
+    assert all(path.exists() for path in paths)
+    pstats.Stats(str(paths[0]))
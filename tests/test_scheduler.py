@@ -0,0 +1,40 @@
+from super_download.scheduler import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    DownloadScheduler,
+    host_of,
+)
+
+
+def test_priority_order_and_per_host_cap():
+    scheduler = DownloadScheduler(max_active=3, max_per_host=2)
+    for index in range(5):
+        scheduler.push(f"slow{index}", "mirror.lento", PRIORITY_HIGH)
+    scheduler.push("fast0", "cdn.rapido")
+    scheduler.push("fast1", "cdn.rapido", PRIORITY_LOW)
+
+    # O espelho lento tem prioridade, mas só pode ocupar duas vagas.
+    assert scheduler.take_ready() == ["slow0", "slow1", "fast0"]
+    assert scheduler.take_ready() == []
+
+    scheduler.vacate("fast0")
+    assert scheduler.take_ready() == ["fast1"]
+
+    scheduler.vacate("slow0")
+    scheduler.set_priority("slow4", PRIORITY_HIGH + 1)
+    assert scheduler.take_ready() == ["slow4"]
+    assert len(scheduler) == 2
+
+
+def test_discard_suspend_and_host_parsing():
+    scheduler = DownloadScheduler(max_active=1)
+    scheduler.push("a", "h")
+    scheduler.push("b", "h")
+    scheduler.discard("a")
+    scheduler.suspended = True
+    assert scheduler.take_ready() == []
+
+    scheduler.suspended = False
+    assert scheduler.take_ready() == ["b"]
+    assert "b" not in scheduler and scheduler.running == 1
+    assert host_of("https://Example.COM:8443/x.iso") == "example.com"
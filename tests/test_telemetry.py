@@ -0,0 +1,32 @@
+import sys
+
+from super_download.telemetry import SpeedHistory
+
+
+def test_smoothed_speed_and_eta_ignore_jitter():
+    history = SpeedHistory(capacity=8)
+    completed = 0
+    for second in range(20):
+        # 1 MiB/s em média, alternando 0,5 e 1,5 MiB por tick.
+        completed += (512 if second % 2 else 1536) * 1024
+        history.add(float(second), completed)
+
+    assert 0.8 * 1024 * 1024 < history.speed < 1.2 * 1024 * 1024
+    eta = history.eta(completed + 10 * 1024 * 1024)
+    assert 8 < eta < 12
+    assert len(history) == 8
+    assert [timestamp for timestamp, _ in history.samples()] == [
+        float(s) for s in range(12, 20)
+    ]
+
+
+def test_memory_is_fixed_and_restart_resets_history():
+    history = SpeedHistory(capacity=4)
+    size = sys.getsizeof(history._times) + sys.getsizeof(history._bytes)
+    for second in range(100):
+        history.add(float(second), second * 1000)
+    assert sys.getsizeof(history._times) + sys.getsizeof(history._bytes) == size
+
+    history.add(100.0, 0)  # o aria2 recomeçou o arquivo
+    assert len(history) == 1 and history.speed == 0.0
+    assert history.eta(5000) is None
@@ -0,0 +1,37 @@
+from super_download.tuning import (
+    DEFAULT_CONNECTIONS,
+    MAX_CONNECTIONS,
+    MIN_SEGMENT_BYTES,
+    NO_RANGE_SAMPLES,
+    ConnectionTuner,
+)
+
+MiB = 1024 * 1024
+
+
+def test_connections_follow_per_connection_throughput_and_size():
+    tuner = ConnectionTuner()
+    assert tuner.connections_for("novo.example") == DEFAULT_CONNECTIONS
+
+    # Servidor que entrega 1 MiB/s por conexão num enlace que já fez 8 MiB/s.
+    tuner.observe("espelho.example", speed=4 * MiB, connections=4, requested=4)
+    tuner.observe_total(8 * MiB)
+    assert tuner.connections_for("espelho.example") == 9
+    assert tuner.connections_for("espelho.example", size=5 * MIN_SEGMENT_BYTES) == 5
+    assert tuner.connections_for("espelho.example", size=MIN_SEGMENT_BYTES) == 1
+    assert tuner.options_for("espelho.example", size=1) == {
+        "split": "1",
+        "max-connection-per-server": "1",
+    }
+
+    tuner.observe_total(1000 * MiB)
+    assert tuner.connections_for("espelho.example") == MAX_CONNECTIONS
+
+
+def test_host_without_range_support_falls_back_to_one_connection():
+    tuner = ConnectionTuner()
+    for _ in range(NO_RANGE_SAMPLES):
+        tuner.observe("sem-range.example", speed=MiB, connections=1, requested=4)
+
+    assert tuner.profile("sem-range.example").supports_ranges is False
+    assert tuner.connections_for("sem-range.example", size=100 * MIN_SEGMENT_BYTES) == 1